@@ -0,0 +1,66 @@
+"""
+Micro-benchmark: NginxParser fast path vs. the original groupdict/strptime parser.
+
+Run with ``make bench`` (or ``uv run python -m benchmarks.bench_nginx_parser``).
+"""
+
+import re
+import timeit
+from datetime import datetime
+
+from src.models import LogEntry
+from src.parsers.nginx import NginxParser
+
+LINES = [
+    f"10.0.{i % 256}.{i % 7} - - [07/Jan/2026:13:{(i // 600) % 60:02d}:{(i // 10) % 60:02d} +0300] "
+    f'"GET /api/v1/items/{i} HTTP/1.1" {200 if i % 9 else 404} {i * 3}'
+    for i in range(20_000)
+]
+
+
+class ReferenceNginxParser:
+    """The original implementation, kept here as the baseline."""
+
+    LOG_PATTERN = re.compile(
+        r'(?P<ip>\S+) \S+ \S+ \[(?P<time>.*?)\] "(?P<request>.*?)" (?P<status>\d+) (?P<bytes>\d+)'
+    )
+    DATE_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
+
+    def parse(self, line: str) -> LogEntry | None:
+        match = self.LOG_PATTERN.match(line)
+        if not match:
+            return None
+        data = match.groupdict()
+        return LogEntry(
+            timestamp=datetime.strptime(data["time"], self.DATE_FORMAT),
+            source_ip=data.get("ip", ""),
+            message=data.get("request", ""),
+            status_code=int(data.get("status", -1)),
+            service_name=NginxParser.SERVICE_NAME,
+            metadata={"bytes": int(data.get("bytes", 0))},
+        )
+
+
+def bench(parser, repeat: int = 5) -> float:
+    """Best-of-``repeat`` lines per second."""
+    best = min(timeit.repeat(lambda: [parser.parse(line) for line in LINES], number=1, repeat=repeat))
+    return len(LINES) / best
+
+
+def main():
+    reference, fast = ReferenceNginxParser(), NginxParser()
+    assert [reference.parse(line) for line in LINES] == [fast.parse(line) for line in LINES]
+
+    assert fast.parse_batch(LINES).to_entries() == [fast.parse(line) for line in LINES]
+
+    baseline = bench(reference)
+    optimized = bench(fast)
+    batched = len(LINES) / min(timeit.repeat(lambda: fast.parse_batch(LINES), number=1, repeat=5))
+    print(f"reference (groupdict + strptime): {baseline:>12,.0f} lines/s")
+    print(f"NginxParser (fast path):          {optimized:>12,.0f} lines/s")
+    print(f"NginxParser.parse_batch:          {batched:>12,.0f} lines/s")
+    print(f"speedup: {optimized / baseline:.1f}x per line, {batched / baseline:.1f}x batched")
+
+
+if __name__ == "__main__":
+    main()
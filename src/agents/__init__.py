@@ -1,6 +1,18 @@
-from src.agents.base import AgentConfig, BaseAgent, FileAgentConfig
+from src.agents.base import AgentConfig, BaseAgent, FileAgentConfig, GlobAgentConfig, TailConfig
 from src.agents.factory import AgentFactory
 from src.agents.file_agent import FileAgent
-from src.agents.http_client import LogSentinelClient
+from src.agents.glob_agent import GlobAgent
+from src.agents.http_client import BufferedLogSentinelClient, LogSentinelClient
 
-__all__ = ["BaseAgent", "AgentConfig", "FileAgent", "FileAgentConfig", "LogSentinelClient", "AgentFactory"]
+__all__ = [
+    "BaseAgent",
+    "AgentConfig",
+    "FileAgent",
+    "FileAgentConfig",
+    "GlobAgent",
+    "GlobAgentConfig",
+    "TailConfig",
+    "LogSentinelClient",
+    "BufferedLogSentinelClient",
+    "AgentFactory",
+]
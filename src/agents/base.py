@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from collections.abc import Callable
+from typing import Any, Literal
 
 from pydantic import BaseModel
 
+from src.exceptions import ConfigurationError
+from src.factory import ParserFactory
+from src.interfaces import LogParser
+from src.models import LogBatch
+
 
 class AgentConfig(BaseModel):
     """Base configuration for all agents."""
@@ -13,12 +19,33 @@ class AgentConfig(BaseModel):
     metadata: dict[str, Any] = {}
 
 
-class FileAgentConfig(AgentConfig):
-    """Configuration specific to FileAgent."""
+class TailConfig(AgentConfig):
+    """Settings shared by agents that tail files."""
 
-    file_path: str
     poll_interval: float = 1.0  # seconds
     read_from_end: bool = True
+    watch_mode: Literal["auto", "inotify", "poll"] = "auto"
+    idle_timeout: float = 30.0  # seconds; safety re-check when no inotify event arrives
+    read_chunk_size: int = 65536  # bytes per read
+    batch_size: int = 500  # lines per on_lines_received call
+    max_line_bytes: int = 1048576  # longer lines are skipped
+    checkpoint_path: str | None = None  # state file for durable offsets; None keeps them in memory
+    checkpoint_interval: float = 1.0  # seconds; the state file is rewritten at most this often
+    fingerprint_bytes: int = 1024  # head bytes hashed to recognise the file after a restart
+    parse_locally: bool = False  # parse on the agent and hand LogBatches to on_entries_received
+
+
+class FileAgentConfig(TailConfig):
+    """Configuration specific to FileAgent."""
+
+    file_path: str
+
+
+class GlobAgentConfig(TailConfig):
+    """Configuration specific to GlobAgent."""
+
+    paths: list[str]  # glob patterns, e.g. /var/log/nginx/*.access.log
+    rescan_interval: float = 10.0  # seconds between glob rescans for new files
 
 
 class BaseAgent(ABC):
@@ -47,3 +74,54 @@ class BaseAgent(ABC):
     def get_status(self) -> dict[str, Any]:
         """Return the current status of the agent."""
         pass
+
+
+class TailingAgent(BaseAgent):
+    """
+    Base class for agents that tail files; turns the line batches read by
+    FileTailer into callbacks.
+
+    ``on_line_received`` is called once per line; ``on_lines_received`` gets
+    the same lines in lists of at most ``batch_size``. With ``parse_locally``
+    each batch is first parsed on the agent with the ``parser_type`` parser and
+    the resulting LogBatch goes to ``on_entries_received``, so the API only
+    stores it. A batch counts as acknowledged unless a batch callback returns
+    False; unacknowledged lines are re-read on the next poll. Only the batch
+    callbacks can report a failed delivery, so checkpointing with just
+    ``on_line_received`` is warned about.
+    """
+
+    def __init__(
+        self,
+        config: TailConfig,
+        on_line_received: Callable[[str], None] = None,
+        on_lines_received: Callable[[list[str]], bool | None] = None,
+        on_entries_received: Callable[[LogBatch], bool | None] = None,
+    ):
+        super().__init__(config)
+        self.on_line_received = on_line_received
+        self.on_lines_received = on_lines_received
+        self.on_entries_received = on_entries_received
+        if config.checkpoint_path and on_lines_received is None and on_entries_received is None:
+            print(
+                f"Agent {config.name} checkpoints offsets but has no batch callback to acknowledge them; "
+                "lines passed to on_line_received count as delivered."
+            )
+
+        self._parser: LogParser | None = None
+        if config.parse_locally:
+            if on_entries_received is None:
+                raise ConfigurationError("parse_locally requires an on_entries_received callback")
+            self._parser = ParserFactory.get_parser(config.parser_type)
+
+    def _emit(self, lines: list[str]) -> bool:
+        if self._parser is not None:
+            batch = self._parser.parse_batch(lines)
+            if batch and self.on_entries_received(batch) is False:
+                return False
+        if self.on_lines_received and self.on_lines_received(lines) is False:
+            return False
+        if self.on_line_received:
+            for line in lines:
+                self.on_line_received(line)
+        return True
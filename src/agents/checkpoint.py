@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import BinaryIO
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Where tailing of one file stopped, plus enough identity to recognise the file again."""
+
+    offset: int
+    device: int
+    inode: int
+    fingerprint: str  # sha256 of the first fingerprint_size bytes
+    fingerprint_size: int
+
+
+def fingerprint(f: BinaryIO, size: int) -> tuple[str, int]:
+    """Hashes up to ``size`` bytes from the start of an open file; returns (digest, bytes hashed)."""
+    head = os.pread(f.fileno(), size, 0)
+    return hashlib.sha256(head).hexdigest(), len(head)
+
+
+class CheckpointStore:
+    """
+    Small JSON state file mapping tailed file paths to their last acknowledged checkpoint.
+
+    Writes go through a temporary file, fsync and an atomic rename, so a crash
+    leaves either the old or the new state, never a torn one. They are coalesced:
+    the file is rewritten at most once per ``commit_interval`` seconds, with
+    every checkpoint committed in between. A crash can therefore lose up to that
+    much progress, which means lines are sent again after a restart, never skipped.
+    """
+
+    def __init__(self, path: str, commit_interval: float = 0.0):
+        self.path = path
+        self.commit_interval = commit_interval
+        self._lock = threading.Lock()
+        self._checkpoints: dict[str, Checkpoint] = {}
+        self._dirty = False
+        self._written_at = float("-inf")
+        self._timer: threading.Timer | None = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable checkpoint file {self.path}: {e}")
+            return
+
+        for file_path, fields in data.get("files", {}).items():
+            try:
+                self._checkpoints[file_path] = Checkpoint(**fields)
+            except TypeError:
+                print(f"Ignoring malformed checkpoint for {file_path}")
+
+    def get(self, file_path: str) -> Checkpoint | None:
+        return self._checkpoints.get(os.path.abspath(file_path))
+
+    def commit(self, file_path: str, checkpoint: Checkpoint):
+        """
+        Records the checkpoint for file_path. It is written at once if the file
+        was last written ``commit_interval`` seconds ago or more, else together
+        with later commits when the interval is up.
+        """
+        with self._lock:
+            self._checkpoints[os.path.abspath(file_path)] = checkpoint
+            self._dirty = True
+            delay = self._written_at + self.commit_interval - time.monotonic()
+            if delay <= 0:
+                self._write()
+            elif self._timer is None:
+                self._timer = threading.Timer(delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Durably writes checkpoints still waiting for their interval; call before exiting."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._write()
+
+    def _write(self):
+        payload = {"files": {path: asdict(cp) for path, cp in self._checkpoints.items()}}
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        self._dirty = False
+        self._written_at = time.monotonic()
@@ -1,7 +1,8 @@
 from typing import Any
 
-from src.agents.base import AgentConfig, BaseAgent, FileAgentConfig
+from src.agents.base import AgentConfig, BaseAgent, FileAgentConfig, GlobAgentConfig
 from src.agents.file_agent import FileAgent
+from src.agents.glob_agent import GlobAgent
 from src.exceptions import ConfigurationError
 
 
@@ -12,10 +13,12 @@ class AgentFactory:
 
     _agent_map: dict[str, type[BaseAgent]] = {
         "file": FileAgent,
+        "glob": GlobAgent,
     }
 
     _config_map: dict[str, type[AgentConfig]] = {
         "file": FileAgentConfig,
+        "glob": GlobAgentConfig,
     }
 
     @classmethod
@@ -1,22 +1,43 @@
 import os
-import time
 from collections.abc import Callable
 from typing import Any
 
-from src.agents.base import BaseAgent, FileAgentConfig
+from src.agents.base import FileAgentConfig, TailingAgent
+from src.agents.checkpoint import CheckpointStore
+from src.agents.tailer import FileTailer
+from src.agents.watcher import FileWatcher, create_watcher
+from src.models import LogBatch
 
 
-class FileAgent(BaseAgent):
+class FileAgent(TailingAgent):
     """
     An agent that monitors a file for new lines (tail -f style)
-    and processes them using a provided callback.
+    and processes them using the provided callbacks.
+
+    Callbacks and acknowledgement work as described in TailingAgent,
+    including local parsing with ``parse_locally``. With ``checkpoint_path`` set, the
+    offset after each acknowledged batch is persisted together with the
+    file's device, inode and a head fingerprint (written at most every
+    ``checkpoint_interval`` seconds, and on exit), and a restart resumes there.
+    Rotation and truncation are handled by FileTailer.
     """
 
-    def __init__(self, config: FileAgentConfig, on_line_received: Callable[[str], None] = None):
-        super().__init__(config)
+    def __init__(
+        self,
+        config: FileAgentConfig,
+        on_line_received: Callable[[str], None] = None,
+        on_lines_received: Callable[[list[str]], bool | None] = None,
+        on_entries_received: Callable[[LogBatch], bool | None] = None,
+    ):
+        super().__init__(config, on_line_received, on_lines_received, on_entries_received)
         self.config: FileAgentConfig = config
-        self.on_line_received = on_line_received
-        self._last_position = 0
+        self._checkpoints = (
+            CheckpointStore(config.checkpoint_path, config.checkpoint_interval)
+            if config.checkpoint_path
+            else None
+        )
+        self._tailer = FileTailer(config.file_path, config, self._emit, self._checkpoints)
+        self._watcher: FileWatcher | None = None
 
     def start(self):
         """Starts the tailing process."""
@@ -29,52 +50,41 @@ class FileAgent(BaseAgent):
         self._running = True
 
         # Initialize position
-        if self.config.read_from_end and os.path.exists(self.config.file_path):
-            self._last_position = os.path.getsize(self.config.file_path)
-        else:
-            self._last_position = 0
+        self._tailer.open()
 
+        self._watcher = create_watcher(
+            self.config.file_path, self.config.watch_mode, self.config.poll_interval
+        )
         print(f"Agent {self.config.name} started, watching {self.config.file_path}")
 
         try:
             while self._running:
                 self._poll()
-                time.sleep(self.config.poll_interval)
+                self._watcher.wait(self.config.idle_timeout)
         except KeyboardInterrupt:
             self.stop()
+        finally:
+            self._watcher.close()
+            self._watcher = None
+            self._tailer.close()
+            if self._checkpoints:
+                self._checkpoints.flush()
 
     def _poll(self):
         """Polls the file for new changes."""
-        if not os.path.exists(self.config.file_path):
-            return
-
-        current_size = os.path.getsize(self.config.file_path)
-
-        # If file was truncated or rotated
-        if current_size < self._last_position:
-            print(f"File {self.config.file_path} truncated or rotated. Resetting position.")
-            self._last_position = 0
-
-        if current_size > self._last_position:
-            with open(self.config.file_path) as f:
-                f.seek(self._last_position)
-                lines = f.readlines()
-                self._last_position = f.tell()
-
-                for line in lines:
-                    line = line.strip()
-                    if line and self.on_line_received:
-                        self.on_line_received(line)
+        self._tailer.poll()
 
     def stop(self):
         """Stops the agent."""
         print(f"Stopping agent {self.config.name}...")
         self._running = False
+        if self._watcher:
+            self._watcher.wake()
 
     def get_status(self) -> dict[str, Any]:
         return {
             "name": self.config.name,
             "running": self._running,
-            "file_path": self.config.file_path,
-            "last_position": self._last_position,
+            **self._tailer.status(),
+            "watcher": type(self._watcher).__name__ if self._watcher else None,
         }
@@ -0,0 +1,225 @@
+import asyncio
+import glob
+import os
+from collections.abc import Callable
+from typing import Any
+
+from src.agents.base import GlobAgentConfig, TailingAgent
+from src.agents.checkpoint import CheckpointStore
+from src.agents.tailer import FileTailer
+from src.agents.watcher import InotifyWatcher, create_watcher
+from src.models import LogBatch
+
+# Longest wait between retries of a file whose reads keep failing, in seconds
+RETRY_MAX_DELAY = 30.0
+
+
+class GlobAgent(TailingAgent):
+    """
+    Tails every file matching a set of glob patterns from one asyncio event loop.
+
+    Patterns are expanded again every ``rescan_interval`` seconds, and at once
+    when inotify reports a new matching name, so files created later are picked
+    up (and read from their start). Each file gets its own FileTailer, so
+    rotation, truncation and checkpoints behave as in FileAgent, plus a small
+    task that polls it whenever its directory reports a change or
+    ``idle_timeout`` passes. Patterns whose directory cannot be watched with
+    inotify fall back to polling every ``poll_interval``. A file whose path
+    disappears is read to its end and dropped. A failing read is retried with
+    backoff from the last acknowledged line, without losing the file's position.
+
+    Polls run in the loop's default thread pool, so a blocking callback (such
+    as a synchronous HTTP send) does not hold up the other files; callbacks may
+    therefore be invoked from several threads at once.
+    """
+
+    def __init__(
+        self,
+        config: GlobAgentConfig,
+        on_line_received: Callable[[str], None] = None,
+        on_lines_received: Callable[[list[str]], bool | None] = None,
+        on_entries_received: Callable[[LogBatch], bool | None] = None,
+    ):
+        super().__init__(config, on_line_received, on_lines_received, on_entries_received)
+        self.config: GlobAgentConfig = config
+        self._checkpoints = (
+            CheckpointStore(config.checkpoint_path, config.checkpoint_interval)
+            if config.checkpoint_path
+            else None
+        )
+
+        self._tailers: dict[str, FileTailer] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._removed: set[str] = set()
+        self._watchers: dict[str, InotifyWatcher] = {}  # pattern -> directory watcher
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._rescan: asyncio.Event | None = None
+
+    def start(self):
+        """Runs the agent on a new event loop until stop() is called."""
+        if self._running:
+            return
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            self.stop()
+
+    async def run(self):
+        """Tails matching files on the running event loop until stop() is called."""
+        self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._rescan = asyncio.Event()
+        self._watch_patterns()
+        print(f"Agent {self.config.name} started, watching {', '.join(self.config.paths)}")
+
+        try:
+            initial = True
+            while self._running:
+                self._discover(initial)
+                initial = False
+                await self._sleep(self._rescan, self.config.rescan_interval)
+        finally:
+            self._running = False
+            for wakeup in self._wakeups.values():
+                wakeup.set()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+            for watcher in self._watchers.values():
+                self._loop.remove_reader(watcher.fileno())
+                watcher.close()
+            for tailer in self._tailers.values():
+                tailer.close()
+            if self._checkpoints:
+                self._checkpoints.flush()
+            self._watchers.clear()
+            self._tailers.clear()
+            self._tasks.clear()
+            self._wakeups.clear()
+            self._removed.clear()
+            self._loop = None
+
+    def stop(self):
+        """Stops the agent; safe to call from any thread."""
+        print(f"Stopping agent {self.config.name}...")
+        self._running = False
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._rescan.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def get_status(self) -> dict[str, Any]:
+        files = {path: tailer.status() for path, tailer in list(self._tailers.items())}
+        return {
+            "name": self.config.name,
+            "running": self._running,
+            "patterns": self.config.paths,
+            "watched_patterns": sorted(self._watchers),
+            "file_count": len(files),
+            "files": files,
+        }
+
+    def _watch_patterns(self):
+        """Sets up an inotify reader on the loop for every pattern whose directory is literal."""
+        if self.config.watch_mode == "poll":
+            return
+        for pattern in self.config.paths:
+            if pattern in self._watchers or glob.has_magic(os.path.dirname(pattern)):
+                continue
+            watcher = create_watcher(pattern, self.config.watch_mode, self.config.poll_interval)
+            if not isinstance(watcher, InotifyWatcher):
+                watcher.close()
+                continue
+            self._watchers[pattern] = watcher
+            self._loop.add_reader(watcher.fileno(), self._on_events, watcher)
+
+    def _on_events(self, watcher: InotifyWatcher):
+        changes = watcher.read_changes()
+        if changes is None:
+            for path, wakeup in self._wakeups.items():
+                if os.path.dirname(path) == watcher.directory:
+                    wakeup.set()
+            self._rescan.set()
+            return
+
+        for name in changes:
+            wakeup = self._wakeups.get(os.path.join(watcher.directory, name))
+            if wakeup is not None:
+                wakeup.set()
+            else:
+                self._rescan.set()
+
+    def _discover(self, initial: bool):
+        """Starts tailing new matches and marks vanished paths for a final read."""
+        found: dict[str, str] = {}
+        for pattern in self.config.paths:
+            for path in glob.glob(pattern):
+                path = os.path.abspath(path)
+                if os.path.isfile(path):
+                    found.setdefault(path, pattern)
+
+        for path in self._tailers.keys() - found.keys():
+            if path not in self._removed:
+                self._removed.add(path)
+                self._wakeups[path].set()
+
+        for path, pattern in found.items():
+            if path in self._tailers:
+                continue
+            # Files that exist at startup honour read_from_end; later ones are new, read them whole
+            read_from_end = self.config.read_from_end if initial else False
+            timeout = self.config.idle_timeout if pattern in self._watchers else self.config.poll_interval
+            self._tailers[path] = FileTailer(path, self.config, self._emit, self._checkpoints)
+            self._wakeups[path] = asyncio.Event()
+            self._tasks[path] = asyncio.create_task(self._tail(path, read_from_end, timeout))
+
+    async def _tail(self, path: str, read_from_end: bool, timeout: float):
+        tailer, wakeup = self._tailers[path], self._wakeups[path]
+        opened = False
+        failures = 0
+        try:
+            while self._running:
+                try:
+                    if not opened:
+                        await asyncio.to_thread(tailer.open, read_from_end)
+                        opened = True
+                    if path in self._removed:
+                        if await asyncio.to_thread(tailer.finish):
+                            print(f"{path} no longer exists. Stopped tailing it.")
+                            break
+                    else:
+                        await asyncio.to_thread(tailer.poll)
+                    failures = 0
+                except Exception as e:
+                    # Keep the tailer: the next attempt resumes at the last acknowledged line
+                    tailer.rewind()
+                    failures += 1
+                    delay = min(self.config.poll_interval * 2 ** (failures - 1), RETRY_MAX_DELAY)
+                    print(f"Tailing {path} failed: {e}. Retrying in {delay:g}s.")
+                    await self._backoff(wakeup, delay)
+                    continue
+                await self._sleep(wakeup, timeout)
+        finally:
+            if self._running:
+                tailer.close()
+                self._tailers.pop(path, None)
+                self._wakeups.pop(path, None)
+                self._tasks.pop(path, None)
+                self._removed.discard(path)
+
+    async def _backoff(self, wakeup: asyncio.Event, delay: float):
+        """Waits delay seconds after a failure; file events do not cut it short, stop() does."""
+        deadline = self._loop.time() + delay
+        while self._running and (remaining := deadline - self._loop.time()) > 0:
+            await self._sleep(wakeup, remaining)
+
+    @staticmethod
+    async def _sleep(event: asyncio.Event, timeout: float):
+        """Waits until event is set or timeout passes, then clears it."""
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except TimeoutError:
+            pass
+        event.clear()
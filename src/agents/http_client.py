@@ -1,16 +1,26 @@
+import queue
+import threading
+import time
 from typing import Any
 
 import httpx
 
+from src.models import LogBatch
+from src.serialization import dumps
+
 
 class LogSentinelClient:
     """
     A simple HTTP client for interacting with the LogSentinel API.
+
+    A single ``httpx.Client`` is kept for the lifetime of the object so that
+    consecutive requests reuse pooled keep-alive connections.
     """
 
     def __init__(self, base_url: str, timeout: float = 10.0):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self._client = httpx.Client(timeout=timeout)
 
     def send_log(self, parser_type: str, raw_log: str) -> dict[str, Any] | None:
         """
@@ -20,10 +30,9 @@ class LogSentinelClient:
         payload = {"raw_log": raw_log}
 
         try:
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(url, json=payload)
-                response.raise_for_status()
-                return response.json()
+            response = self._client.post(url, json=payload)
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             print(f"Error sending log to {url}: {e}")
             return None
@@ -32,14 +41,210 @@ class LogSentinelClient:
         """
         Sends a batch of log lines to the API.
         """
-        url = f"{self.base_url}/parse/{parser_type}/batch"
-        payload = {"raw_logs": raw_logs}
+        try:
+            return self._post_batch(parser_type, raw_logs)
+        except httpx.HTTPError as e:
+            print(f"Error sending batch to {self.base_url}/parse/{parser_type}/batch: {e}")
+            return None
+
+    def _post_batch(self, parser_type: str, raw_logs: list[str]) -> list[dict[str, Any]]:
+        """Posts a batch to the batch endpoint; raises httpx.HTTPError on failure."""
+        response = self._client.post(
+            f"{self.base_url}/parse/{parser_type}/batch", json={"raw_logs": raw_logs}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def send_entries(self, batch: LogBatch) -> dict[str, Any] | None:
+        """
+        Sends entries parsed on the agent to the API, which stores them without re-parsing.
+        """
+        url = f"{self.base_url}/ingest/entries"
 
         try:
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(url, json=payload)
-                response.raise_for_status()
-                return response.json()
+            response = self._client.post(
+                url, content=dumps(batch.to_columns()), headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
-            print(f"Error sending batch to {url}: {e}")
+            print(f"Error sending entries to {url}: {e}")
             return None
+
+    def close(self):
+        """Closes the underlying connection pool."""
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_STOP = object()
+
+
+def _retryable(error: httpx.HTTPError) -> bool:
+    """Network errors, timeouts, throttling and server errors may pass on a later try; other 4xx will not."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status in (408, 429)
+    return True
+
+
+class BufferedLogSentinelClient(LogSentinelClient):
+    """
+    A LogSentinelClient that buffers submitted lines and ships them in batches.
+
+    Lines are grouped per parser type and flushed through the batch endpoint by a
+    background worker whenever ``batch_size`` lines are pending or the oldest
+    pending line has waited ``flush_interval`` seconds. The submit queue is
+    bounded: when it is full ``submit`` blocks (applying backpressure to the
+    producer), or drops the line after ``put_timeout`` seconds if one is set.
+
+    A batch that fails on a network error, timeout, 408, 429 or 5xx is kept
+    and sent again after ``retry_delay`` seconds, doubling up to
+    ``retry_max_delay``, until it goes through. The worker takes nothing from
+    the queue meanwhile, so an API outage fills it and blocks ``submit``
+    instead of losing lines. Batches the API rejects with another 4xx are
+    dropped and counted; so are batches still failing once ``stop`` was called,
+    after one more attempt each.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 10.0,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10_000,
+        put_timeout: float | None = None,
+        retry_delay: float = 0.5,
+        retry_max_delay: float = 30.0,
+    ):
+        super().__init__(base_url, timeout=timeout)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._worker: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._retrying: tuple[int, float] | None = None  # (lines, seconds until the next attempt)
+        self._stats = {
+            "submitted": 0,
+            "dropped": 0,
+            "sent_lines": 0,
+            "sent_batches": 0,
+            "failed_batches": 0,
+            "failed_lines": 0,
+            "retries": 0,
+        }
+
+    def start(self):
+        """Starts the background flush worker."""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name="logsentinel-flush", daemon=True)
+        self._worker.start()
+
+    def submit(self, parser_type: str, raw_log: str) -> bool:
+        """
+        Queues a log line for batched delivery.
+
+        Returns False if the line was dropped because the queue stayed full.
+        """
+        if self._worker is None:
+            self.start()
+        try:
+            self._queue.put((parser_type, raw_log), timeout=self.put_timeout)
+        except queue.Full:
+            self._stats["dropped"] += 1
+            return False
+        self._stats["submitted"] += 1
+        return True
+
+    def stop(self, timeout: float | None = None):
+        """
+        Flushes every pending line, stops the worker and closes the connection
+        pool. A batch being retried gets one last attempt and so does every
+        batch flushed from here on; those that fail are dropped.
+        """
+        if self._worker is not None:
+            self._stopping.set()
+            self._queue.put(_STOP)
+            self._worker.join(timeout)
+            self._worker = None
+        self.close()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        retry_lines, retry_delay = self._retrying or (0, 0.0)
+        return {
+            **self._stats,
+            "queued": self._queue.qsize(),
+            "retry_lines": retry_lines,
+            "retry_delay": retry_delay,
+        }
+
+    def _run(self):
+        pending: dict[str, list[str]] = {}
+        deadline: float | None = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush_all(pending)
+                deadline = None
+                continue
+
+            if item is _STOP:
+                self._flush_all(pending)
+                return
+
+            parser_type, raw_log = item
+            lines = pending.setdefault(parser_type, [])
+            lines.append(raw_log)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+
+            if len(lines) >= self.batch_size:
+                self._flush(parser_type, pending.pop(parser_type))
+                if not pending:
+                    deadline = None
+
+    def _flush_all(self, pending: dict[str, list[str]]):
+        for parser_type, lines in pending.items():
+            self._flush(parser_type, lines)
+        pending.clear()
+
+    def _flush(self, parser_type: str, lines: list[str]):
+        """Sends one batch, retrying with backoff while the failure may be temporary."""
+        if not lines:
+            return
+        delay = self.retry_delay
+        while True:
+            try:
+                self._post_batch(parser_type, lines)
+                break
+            except httpx.HTTPError as e:
+                if not _retryable(e) or self._stopping.is_set():
+                    print(f"Dropping {len(lines)} lines for {parser_type}: {e}")
+                    self._retrying = None
+                    self._stats["failed_batches"] += 1
+                    self._stats["failed_lines"] += len(lines)
+                    return
+                print(f"Sending {len(lines)} lines for {parser_type} failed: {e}. Retrying in {delay:g}s.")
+                self._retrying = (len(lines), delay)
+                self._stats["retries"] += 1
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.retry_max_delay)
+
+        self._retrying = None
+        self._stats["sent_batches"] += 1
+        self._stats["sent_lines"] += len(lines)
@@ -0,0 +1,284 @@
+import os
+from collections.abc import Callable
+from typing import Any, BinaryIO
+
+from src.agents.base import TailConfig
+from src.agents.checkpoint import Checkpoint, CheckpointStore, fingerprint
+
+
+class FileTailer:
+    """
+    Follows one file path across appends, truncation and rotation.
+
+    The file is held open and identified by (device, inode). When the path
+    starts pointing at a different inode (logrotate ``create``), the old handle
+    is kept and drained until a poll finds nothing new in it, then the tailer
+    switches to the new file from offset 0. When the same inode shrinks below
+    the read position (``copytruncate``), reading restarts at 0.
+
+    Reads use binary chunks of ``read_chunk_size`` bytes; an incomplete trailing
+    line is held back until its newline arrives. Complete lines go to ``emit`` in
+    lists of at most ``batch_size``; ``emit`` returns False to reject a batch, in
+    which case it is re-read on the next poll. The offset after each accepted
+    batch is committed to ``checkpoints`` when one is given.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        config: TailConfig,
+        emit: Callable[[list[str]], bool],
+        checkpoints: CheckpointStore | None = None,
+    ):
+        self.path = path
+        self.config = config
+        self.emit = emit
+        self.checkpoints = checkpoints
+
+        self._file: BinaryIO | None = None
+        self._file_id: tuple[int, int] | None = None
+        self._opened_once = False
+        self._position = 0  # bytes read from the open file
+        self._committed = 0  # offset just after the last acknowledged line
+        self._partial = b""  # bytes after the last newline read so far
+        self._skipped = 0  # bytes dropped from a line longer than max_line_bytes
+        self._fingerprint: tuple[str, int] | None = None
+        self._rotations = 0
+
+    def open(self, read_from_end: bool | None = None):
+        """
+        Opens the file at its initial position: a matching checkpoint if there is
+        one, else the end or the start depending on ``read_from_end`` (the
+        config's value unless given). If the
+        checkpointed file was rotated away while the agent was down, the rotated
+        copy is found next to the path and drained first.
+        """
+        self._opened_once = True
+        checkpoint = self.checkpoints.get(self.path) if self.checkpoints else None
+
+        if checkpoint is not None:
+            for candidate in self._checkpoint_candidates(checkpoint):
+                if self._resume(candidate, checkpoint):
+                    print(f"Resuming {candidate} from checkpoint at offset {checkpoint.offset}")
+                    return
+            print(f"{self.path} changed since its checkpoint. Reading it from the start.")
+            self._open_path(self.path, 0)
+            return
+
+        if read_from_end is None:
+            read_from_end = self.config.read_from_end
+        if self._open_path(self.path, 0) and read_from_end:
+            self._seek(os.fstat(self._file.fileno()).st_size)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def poll(self):
+        """Reads whatever was appended since the last poll, following truncation and rotation."""
+        if self._file is None:
+            if not self._opened_once:
+                self.open()
+            elif not self._open_path(self.path, 0):
+                return
+            if self._file is None:
+                return
+
+        try:
+            st = os.stat(self.path)
+            path_id = (st.st_dev, st.st_ino)
+        except FileNotFoundError:
+            path_id = None
+
+        if os.fstat(self._file.fileno()).st_size < self._position:
+            print(f"File {self.path} truncated. Resetting position.")
+            self._reset(0)
+
+        read = self._drain()
+        if read is None:
+            return  # batch rejected, retry next poll
+
+        if path_id is not None and path_id != self._file_id and read == 0:
+            # The old file has stopped growing: finish it and switch to the new one
+            if not self._finish_rotated():
+                return  # its last line was rejected, retry next poll
+            print(f"File {self.path} rotated. Switching to the new file.")
+            self._rotations += 1
+            if self._open_path(self.path, 0):
+                self._drain()
+
+    def rewind(self):
+        """Drops anything read past the last acknowledged line, so the next poll reads it again."""
+        if self._file is not None:
+            self._reset(self._committed)
+
+    def finish(self) -> bool:
+        """
+        Reads the rest of a file that will not grow any more (its path was
+        removed), including an unterminated last line, and closes it. Returns
+        False if the final batch was rejected and the file is still open.
+        """
+        if self._file is None:
+            return True
+        if self._drain() is None:
+            return False
+        return self._finish_rotated()
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "file_path": self.path,
+            "inode": self._file_id[1] if self._file_id else None,
+            "last_position": self._position,
+            "committed_position": self._committed,
+            "rotations": self._rotations,
+        }
+
+    def _open_path(self, path: str, position: int) -> bool:
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return False
+        self.close()
+        st = os.fstat(f.fileno())
+        self._file, self._file_id = f, (st.st_dev, st.st_ino)
+        self._fingerprint = None
+        self._seek(position)
+        return True
+
+    def _checkpoint_candidates(self, checkpoint: Checkpoint) -> list[str]:
+        """The path itself, then rotated siblings (``access.log.1`` ...) with the checkpoint's inode."""
+        candidates = [self.path]
+        directory, name = os.path.split(os.path.abspath(self.path))
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name != name and entry.name.startswith(name) and entry.is_file():
+                        st = entry.stat()
+                        if (st.st_dev, st.st_ino) == (checkpoint.device, checkpoint.inode):
+                            candidates.append(entry.path)
+        except FileNotFoundError:
+            pass
+        return candidates
+
+    def _resume(self, path: str, checkpoint: Checkpoint) -> bool:
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return False
+
+        st = os.fstat(f.fileno())
+        if (
+            (st.st_dev, st.st_ino) == (checkpoint.device, checkpoint.inode)
+            and st.st_size >= checkpoint.offset
+            and fingerprint(f, checkpoint.fingerprint_size)
+            == (checkpoint.fingerprint, checkpoint.fingerprint_size)
+        ):
+            self.close()
+            self._file, self._file_id = f, (st.st_dev, st.st_ino)
+            self._fingerprint = None
+            self._seek(checkpoint.offset)
+            return True
+
+        f.close()
+        return False
+
+    def _seek(self, position: int):
+        self._position = self._committed = position
+        self._partial = b""
+        self._skipped = 0
+
+    def _reset(self, position: int):
+        """Drops buffered bytes and continues reading the open file at position."""
+        if position == 0:
+            self._fingerprint = None
+        self._seek(position)
+
+    def _drain(self) -> int | None:
+        """
+        Reads the open file up to its current size and emits the complete lines.
+
+        Returns the number of bytes read, or None if a batch was rejected and the
+        position was rewound to the last committed offset.
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        if size <= self._position:
+            return 0
+
+        start = self._position
+        batch: list[str] = []
+        # Offset just after the last newline consumed
+        line_end = self._position - len(self._partial) - self._skipped
+        self._file.seek(self._position)
+
+        while self._position < size:
+            chunk = self._file.read(min(self.config.read_chunk_size, size - self._position))
+            if not chunk:
+                break
+            self._position += len(chunk)
+
+            *lines, self._partial = (self._partial + chunk).split(b"\n")
+            for raw in lines:
+                line_end += self._skipped + len(raw) + 1
+                if self._skipped:
+                    self._skipped = 0
+                    continue
+                line = raw.decode("utf-8", errors="replace").strip()
+                if line:
+                    batch.append(line)
+                    if len(batch) >= self.config.batch_size:
+                        if not self._deliver(batch, line_end):
+                            return None
+                        batch = []
+
+            if len(self._partial) > self.config.max_line_bytes:
+                print(f"Skipping line over {self.config.max_line_bytes} bytes in {self.path}")
+                self._skipped += len(self._partial)
+                self._partial = b""
+
+        if not self._deliver(batch, line_end):
+            return None
+        return self._position - start
+
+    def _finish_rotated(self) -> bool:
+        """
+        Emits a final unterminated line left in the rotated file (nothing more
+        will follow it) and closes the file. Returns False, leaving the file open
+        and rewound, if that line was rejected.
+        """
+        line = self._partial.decode("utf-8", errors="replace").strip()
+        if line and not self._skipped and not self._deliver([line], self._position):
+            return False
+        self.close()
+        return True
+
+    def _deliver(self, lines: list[str], line_end: int) -> bool:
+        """Hands lines to emit; commits line_end if acknowledged, else rewinds."""
+        if lines and not self.emit(lines):
+            print(f"Batch from {self.path} not acknowledged. Retrying from {self._committed}.")
+            self._reset(self._committed)
+            return False
+
+        if line_end != self._committed:
+            self._committed = line_end
+            self._save_checkpoint()
+        return True
+
+    def _save_checkpoint(self):
+        if not self.checkpoints:
+            return
+
+        # The head only needs hashing again while the file is shorter than fingerprint_bytes
+        if self._fingerprint is None or self._fingerprint[1] < self.config.fingerprint_bytes:
+            self._fingerprint = fingerprint(self._file, self.config.fingerprint_bytes)
+
+        self.checkpoints.commit(
+            self.path,
+            Checkpoint(
+                offset=self._committed,
+                device=self._file_id[0],
+                inode=self._file_id[1],
+                fingerprint=self._fingerprint[0],
+                fingerprint_size=self._fingerprint[1],
+            ),
+        )
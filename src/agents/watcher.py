@@ -0,0 +1,194 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from src.exceptions import ConfigurationError
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# Events about the watched directory itself (no name attached)
+DIRECTORY_MASK = IN_DELETE_SELF | IN_MOVE_SELF | IN_Q_OVERFLOW
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_libc()
+
+
+class FileWatcher(ABC):
+    """Blocks a tailing loop until its file may have changed."""
+
+    @abstractmethod
+    def wait(self, timeout: float | None = None) -> bool:
+        """Waits for a change; returns True if one was seen, False on timeout or wake()."""
+        pass
+
+    @abstractmethod
+    def wake(self):
+        """Interrupts a pending wait() from another thread."""
+        pass
+
+    def close(self):
+        """Releases any OS resources."""
+        pass
+
+
+class PollingWatcher(FileWatcher):
+    """Fallback watcher: reports a possible change every ``interval`` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._woken = threading.Event()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        delay = self.interval if timeout is None else min(self.interval, timeout)
+        if self._woken.wait(delay):
+            self._woken.clear()
+            return False
+        return True
+
+    def wake(self):
+        self._woken.set()
+
+
+class InotifyWatcher(FileWatcher):
+    """
+    Linux inotify watcher bound through ctypes.
+
+    Watches the file's directory rather than the file, so creation, rename and
+    deletion of the path are seen as well as writes. Events for other names in
+    the directory are read and ignored. The file name may be a glob pattern
+    (``*.access.log``) to follow every matching file in the directory.
+    """
+
+    def __init__(self, file_path: str):
+        if _libc is None:
+            raise OSError("inotify is not available on this platform")
+
+        path = os.path.abspath(file_path)
+        self.directory, self.name = os.path.split(path)
+        self._name = os.fsencode(self.name)
+
+        self._fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+
+        if _libc.inotify_add_watch(self._fd, os.fsencode(self.directory), WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, f"inotify_add_watch({self.directory}) failed: {os.strerror(err)}")
+
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [], remaining)
+            if self._wake_r in readable:
+                self._drain(self._wake_r)
+                return False
+            if not readable:
+                return False
+            changes = self.read_changes()
+            if changes is None or changes:
+                return True
+
+    def wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass  # already closed
+
+    def close(self):
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def fileno(self) -> int:
+        """The inotify descriptor, readable when events are queued; for event loop readers."""
+        return self._fd
+
+    def read_changes(self) -> set[str] | None:
+        """
+        Consumes queued events without blocking and returns the names of matching
+        files that changed. None means anything in the directory may have changed
+        (the directory itself moved, or the event queue overflowed).
+        """
+        changed: set[str] | None = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & DIRECTORY_MASK:
+                    changed = None
+                elif changed is not None and (name == self._name or fnmatch.fnmatchcase(name, self._name)):
+                    changed.add(os.fsdecode(name))
+
+    @staticmethod
+    def _drain(fd: int):
+        try:
+            while os.read(fd, 1024):
+                pass
+        except BlockingIOError:
+            pass
+
+
+def create_watcher(file_path: str, mode: str = "auto", poll_interval: float = 1.0) -> FileWatcher:
+    """
+    Builds the watcher for ``mode``: "inotify", "poll", or "auto" (inotify when
+    available, else polling every ``poll_interval`` seconds).
+    """
+    if mode == "poll":
+        return PollingWatcher(poll_interval)
+    if mode not in ("auto", "inotify"):
+        raise ConfigurationError(f"unsupported watch mode: {mode}")
+
+    try:
+        return InotifyWatcher(file_path)
+    except OSError as e:
+        if mode == "inotify":
+            raise ConfigurationError(f"inotify watch unavailable for {file_path}: {e}") from e
+        print(f"inotify unavailable for {file_path} ({e}), falling back to polling.")
+        return PollingWatcher(poll_interval)
@@ -3,18 +3,36 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from src.api import routes
 from src.api.routes import router
+from src.factory import ParserFactory
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- STARTUP ---
     print("API Starting up... Loading resources.")
+    print(f"Parsers ready: {', '.join(ParserFactory.warm_up())}")
+    routes.ingest_queue.start(routes.storage)
+    routes.detector.start()
+    routes.live_tail.start()
+    routes.parse_pool.start()
+    routes.storage_maintenance.start()
+    print(f"Sketch windows restored: {routes.sketches.load()}")
+    routes.sketch_snapshots.start()
 
     yield
 
     # --- SHUTDOWN ---
     print("API Shutting down... Closing resources.")
+    await routes.storage_maintenance.stop()
+    await routes.sketch_snapshots.stop()
+    await routes.ingest_queue.stop()
+    await routes.detector.stop()
+    await routes.live_tail.stop()
+    routes.parse_pool.stop()
+    routes.storage.close()
+    routes.sketches.save()
 
 
 app = FastAPI(title="LogSentinel", lifespan=lifespan)
@@ -0,0 +1,17 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from src.serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with src.serialization (orjson when installed).
+
+    Handlers that return one directly skip FastAPI's response_model validation
+    and jsonable_encoder pass, so content must already be JSON-ready dicts.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
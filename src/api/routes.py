@@ -1,13 +1,70 @@
-from fastapi import APIRouter, status
+import zlib
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
 
-from src.api.schemas import BatchParseRequest, LogEntryResponse, ParseRequest
-from src.exceptions import ConfigurationError, ParserError
+from src.api.responses import FastJSONResponse
+from src.api.schemas import (
+    BatchParseRequest,
+    EntryBatchRequest,
+    IngestResponse,
+    LogEntryResponse,
+    ParseRequest,
+    StreamIngestError,
+    StreamIngestResponse,
+)
+from src.config import ConfigLoader
+from src.detection import DetectionEngine
+from src.exceptions import ConfigurationError, ParserError, QueryTimeoutError
 from src.factory import ParserFactory
+from src.ingest import IngestQueue, iter_body_lines
+from src.interfaces import LogParser
+from src.live import LiveTail, TailFilter
+from src.models import LogBatch
+from src.parse_pool import ParsePool
+from src.scheduler import PeriodicTask
+from src.serialization import loads
+from src.sketches import StreamingSketches
 from src.storage import LogStorage
 
+try:
+    settings = ConfigLoader.load_config()
+except ConfigurationError as e:
+    print(f"API running with default settings: {e}")
+    settings = {}
+
 router = APIRouter()
-storage = LogStorage()
+storage = LogStorage(**settings.get("storage", {}))
+ingest_queue = IngestQueue(**settings.get("ingest", {}))
+parse_pool = ParsePool(**settings.get("parse_pool", {}))
+# Compaction and retention of the cold tier; looks storage up at run time so it can be swapped
+storage_maintenance = PeriodicTask(
+    "storage-maintenance", lambda: storage.maintain(), settings.get("maintenance", {}).get("interval", 3600)
+)
+sketch_settings = dict(settings.get("sketches", {}))
+sketch_snapshots = PeriodicTask(
+    "sketch-snapshot", lambda: sketches.save(), sketch_settings.pop("snapshot_interval", 300)
+)
+sketches = StreamingSketches(**sketch_settings)
+detector = DetectionEngine.from_config(settings.get("detection", {}))
+live_tail = LiveTail(**settings.get("live_tail", {}))
+aggregate_settings = {"max_buckets": 1440, "max_top": 100, "timeout": 5.0}
+aggregate_settings.update(settings.get("aggregate", {}))
+stream_settings = {"chunk_lines": 5000, "max_line_bytes": 65536, "max_errors": 20}
+stream_settings.update(settings.get("stream_ingest", {}))
+
+STREAM_CONTENT_TYPES = {"text/plain", "application/x-ndjson", "application/ndjson"}
+
+
+def _publish(batch: LogBatch):
+    """Hands newly accepted entries to the in-memory analytics."""
+    live_tail.publish(batch)
+    detector.submit(batch)
+    sketches.observe(batch)
 
 
 @router.get(
@@ -20,15 +77,221 @@ def health_check():
 
 
 @router.get("/logs", response_model=list[LogEntryResponse], tags=["Analytics"])
-def get_logs(limit: int = 50, offset: int = 0, service: str | None = None):
-    """Retrieves the latest parsed logs from storage."""
-    return storage.get_logs(limit=limit, offset=offset, service_name=service)
+def get_logs(
+    limit: int = 50,
+    offset: int = 0,
+    cursor: str | None = None,
+    service: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    status_min: int | None = None,
+    status_max: int | None = None,
+    source_ip: str | None = None,
+):
+    """
+    Retrieves the latest parsed logs from storage.
+
+    Optional filters narrow the result to a time range (``since`` inclusive,
+    ``until`` exclusive), a status code range and a single source IP.
+
+    When more rows may follow, the ``X-Next-Cursor`` response header carries an
+    opaque cursor; pass it back as ``cursor`` to fetch the next page in constant
+    time. ``offset`` is still accepted but cannot be combined with ``cursor``.
+    """
+    if cursor and offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor and offset cannot be combined",
+        )
+
+    try:
+        logs, next_cursor = storage.get_logs_page(
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            service_name=service,
+            since=since,
+            until=until,
+            status_min=status_min,
+            status_max=status_max,
+            source_ip=source_ip,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(logs, headers=headers)
+
+
+@router.get("/logs/search", response_model=list[LogEntryResponse], tags=["Analytics"])
+def search_logs(
+    q: str,
+    limit: int = 50,
+    offset: int = 0,
+    cursor: str | None = None,
+    order: Literal["time", "rank"] = "time",
+    service: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    status_min: int | None = None,
+    status_max: int | None = None,
+    source_ip: str | None = None,
+):
+    """
+    Full-text search over log messages.
+
+    ``q`` holds terms that must all appear; ``"double quoted"`` text matches as
+    a phrase and a trailing ``*`` as a prefix (``/api/v1/users`` or ``user*``).
+    Results are the newest matches first, or the best matches first with
+    ``order=rank``. The filters are those of ``/logs``, and time-ordered results
+    page with ``X-Next-Cursor`` like ``/logs``. Days already moved to the cold
+    tier are not searched.
+    """
+    if cursor and offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor and offset cannot be combined",
+        )
+
+    try:
+        logs, next_cursor = storage.search_logs(
+            q,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            order=order,
+            service_name=service,
+            since=since,
+            until=until,
+            status_min=status_min,
+            status_max=status_max,
+            source_ip=source_ip,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(logs, headers=headers)
+
+
+@router.get("/logs/stream", tags=["Analytics"])
+async def stream_logs(
+    service: str | None = None,
+    status_min: int | None = None,
+    status_max: int | None = None,
+    source_ip: str | None = None,
+):
+    """
+    Streams newly ingested logs as Server-Sent Events, one entry per ``data:``
+    message, filtered by service, status code range and source IP.
+
+    Entries are fanned out from memory as they are accepted, without querying
+    storage. A client that reads too slowly loses its oldest buffered entries;
+    a ``dropped`` event reports how many.
+    """
+    subscription = live_tail.subscribe(TailFilter(service, status_min, status_max, source_ip))
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live tail is not running or has no free subscriber slots",
+        )
+    return StreamingResponse(
+        live_tail.events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/aggregate", tags=["Analytics"])
+def aggregate(
+    metric: Literal["count", "bytes"] = "count",
+    group_by: Literal["status_class", "status_code", "service", "source_ip", "path"] | None = None,
+    interval: int | None = None,
+    top: int = 10,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    service: str | None = None,
+    status_min: int | None = None,
+    status_max: int | None = None,
+    source_ip: str | None = None,
+):
+    """
+    Log counts or bytes served per time bucket and/or per dimension value.
+
+    - **interval**: bucket width in seconds; omit it for totals over the range
+    - **group_by**: break results down by a dimension, keeping the ``top`` values
+    - **since** / **until**: the range, by default the last 24 hours
+
+    ``groups`` lists the top values with their totals, and each bucket carries
+    its overall ``total`` and ``values`` in the order of ``groups``. Responses
+    are capped at ``aggregate.max_buckets`` buckets and ``aggregate.max_top``
+    groups (400 beyond that); queries running longer than
+    ``aggregate.timeout`` seconds are cancelled with 503.
+    """
+    if top > aggregate_settings["max_top"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"top is limited to {aggregate_settings['max_top']}",
+        )
+
+    try:
+        result = storage.aggregate(
+            metric=metric,
+            group_by=group_by,
+            interval=interval,
+            top=top,
+            since=since,
+            until=until,
+            service_name=service,
+            status_min=status_min,
+            status_max=status_max,
+            source_ip=source_ip,
+            max_buckets=aggregate_settings["max_buckets"],
+            timeout=aggregate_settings["timeout"],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return FastJSONResponse(result)
+
+
+@router.get("/sketches", tags=["Analytics"])
+def get_sketches(windows: int | None = None):
+    """
+    Approximate analytics over recent traffic, kept in memory during ingestion.
+
+    Returns estimated unique source IPs (HyperLogLog), the top source IPs and
+    request paths (Count-Min), response-byte quantiles (t-digest) and a
+    per-window series, over the newest ``windows`` windows (all kept by
+    default). Answers come from fixed-size sketches, without touching storage.
+    """
+    return FastJSONResponse(sketches.summary(windows))
+
+
+@router.get("/alerts", tags=["Analytics"])
+def get_alerts(limit: int = 100):
+    """
+    Returns the newest alerts raised by the detection rules, newest first.
+
+    Rules run on every ingested batch: 5xx-rate spikes per service, request
+    floods per source IP and request-volume deviations per service.
+    """
+    return [alert.to_json() for alert in detector.recent_alerts(limit)]
 
 
 @router.get("/stats", tags=["Analytics"])
 def get_stats():
     """Returns log ingestion statistics."""
-    return storage.get_stats()
+    return {
+        **storage.get_stats(),
+        "ingest_queue": ingest_queue.get_stats(),
+        "maintenance": storage_maintenance.get_stats(),
+        "sketch_snapshots": sketch_snapshots.get_stats(),
+        "detection": detector.get_stats(),
+        "live_tail": live_tail.get_stats(),
+    }
 
 
 @router.post(
@@ -55,8 +318,9 @@ def parse_log(parser_type: str, request: ParseRequest):
 
         # Save to storage
         storage.save_log(result)
+        _publish(LogBatch.from_entries([result]))
 
-        return result
+        return FastJSONResponse(result.to_json())
 
     except ConfigurationError as e:
         raise HTTPException(
@@ -84,6 +348,7 @@ def parse_batch_logs(parser_type: str, request: BatchParseRequest):
     """
     Parses a list of raw log lines using the specified parser type.
     Failed lines are silently skipped to ensure bulk processing continuity.
+    Large batches are parsed in parallel by the parse pool.
     """
     try:
         # 1. Validate parser type once before the loop
@@ -94,20 +359,171 @@ def parse_batch_logs(parser_type: str, request: BatchParseRequest):
             detail=f"Invalid Parser Type: {e}",
         )
 
-    results = []
+    # 2. Process logs (malformed lines are skipped in batch mode)
+    batch = parse_pool.parse_batch(parser_type, parser, request.raw_logs)
 
-    # 2. Process logs
-    for line in request.raw_logs:
+    # 3. Save batch to storage
+    if batch:
+        storage.save_columns(batch)
+        _publish(batch)
+
+    return FastJSONResponse(batch.to_json())
+
+
+@router.post(
+    "/ingest/{parser_type}/batch",
+    response_model=IngestResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["Log Processing"],
+)
+async def ingest_batch_logs(parser_type: str, request: BatchParseRequest):
+    """
+    Parses a list of raw log lines and queues them for a write-behind save.
+
+    Returns as soon as the entries are queued; lines that fail to parse are
+    skipped. Responds 503 when the ingest queue has no room for the batch.
+    """
+    try:
+        parser = ParserFactory.get_parser(parser_type)
+    except ConfigurationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid Parser Type: {e}",
+        )
+
+    batch = await run_in_threadpool(parse_pool.parse_batch, parser_type, parser, request.raw_logs)
+
+    if not ingest_queue.put(batch):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Ingest queue full, {len(batch)} entries rejected",
+        )
+    await run_in_threadpool(_publish, batch)
+
+    return IngestResponse(accepted=len(batch), skipped=batch.rejected)
+
+
+@router.post(
+    "/ingest/entries",
+    response_model=IngestResponse,
+    tags=["Log Processing"],
+)
+def ingest_entries(request: EntryBatchRequest):
+    """
+    Saves entries that an agent has already parsed (``parse_locally``).
+
+    The body carries one list per field, as produced by ``LogBatch.to_columns``.
+    Validation is limited to column types and lengths; no parsing happens here,
+    the columns are inserted as they are.
+    """
+    batch = LogBatch(
+        timestamps=request.timestamps,
+        source_ips=request.source_ips,
+        messages=request.messages,
+        status_codes=request.status_codes,
+        service_names=request.service_names,
+        metadata=request.metadata,
+    )
+    if batch:
+        storage.save_columns(batch)
+        _publish(batch)
+
+    return IngestResponse(accepted=len(batch), skipped=0)
+
+
+def _decode_stream_line(raw: bytes, ndjson: bool) -> str:
+    """Turns one body line into a raw log line; NDJSON lines hold a string or {"raw_log": ...}."""
+    if not ndjson:
+        return raw.decode("utf-8", errors="replace").strip()
+
+    value = loads(raw)
+    if isinstance(value, dict):
+        value = value.get("raw_log")
+    if not isinstance(value, str):
+        raise ValueError('expected a JSON string or an object with a "raw_log" string')
+    return value
+
+
+def _parse_stream_chunk(
+    parser: LogParser, chunk: list[tuple[int, bytes | None]], ndjson: bool, summary: StreamIngestResponse
+) -> LogBatch:
+    """Parses numbered body lines, recording failures in the summary."""
+    batch = LogBatch()
+    for line_number, raw in chunk:
         try:
-            entry = parser.parse(line)
-            if entry:
-                results.append(entry)
-        except Exception:
-            # Skip malformed lines in batch mode
+            if raw is None:
+                raise ValueError(f"line exceeds {stream_settings['max_line_bytes']} bytes")
+            entry = parser.parse(_decode_stream_line(raw, ndjson))
+            if not entry:
+                raise ValueError("log line cannot be parsed")
+        except Exception as e:
+            summary.rejected += 1
+            if len(summary.errors) < stream_settings["max_errors"]:
+                summary.errors.append(StreamIngestError(line=line_number, error=str(e)))
             continue
+        batch.append(entry)
+    summary.accepted += len(batch)
+    return batch
 
-    # 3. Save batch to storage
-    if results:
-        storage.save_batch(results)
 
-    return results
+@router.post(
+    "/ingest/{parser_type}/stream",
+    response_model=StreamIngestResponse,
+    tags=["Log Processing"],
+)
+async def ingest_stream(parser_type: str, request: Request):
+    """
+    Streams a bulk upload of raw log lines into storage.
+
+    The body is ``text/plain`` (one raw line per line) or NDJSON (one JSON string
+    or ``{"raw_log": ...}`` object per line), optionally with
+    ``Content-Encoding: gzip``. Lines are parsed as the body arrives and saved in
+    chunks, so memory stays bounded regardless of upload size. Only a summary
+    (accepted, rejected and the first few errors) is returned.
+    """
+    try:
+        parser = ParserFactory.get_parser(parser_type)
+    except ConfigurationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid Parser Type: {e}",
+        )
+
+    content_type = request.headers.get("content-type", "text/plain").split(";")[0].strip().lower()
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+    if content_type not in STREAM_CONTENT_TYPES or encoding not in {"identity", "gzip"}:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported body: {content_type} ({encoding})",
+        )
+
+    ndjson = content_type != "text/plain"
+    summary = StreamIngestResponse()
+    chunk: list[tuple[int, bytes | None]] = []
+
+    async def flush():
+        batch = await run_in_threadpool(_parse_stream_chunk, parser, chunk, ndjson, summary)
+        chunk.clear()
+        if batch:
+            await run_in_threadpool(storage.save_columns, batch)
+            await run_in_threadpool(_publish, batch)
+
+    lines = iter_body_lines(request.stream(), encoding == "gzip", stream_settings["max_line_bytes"])
+    line_number = 0
+    try:
+        async for raw in lines:
+            line_number += 1
+            if raw is not None and not raw.strip():
+                continue
+            chunk.append((line_number, raw))
+            if len(chunk) >= stream_settings["chunk_lines"]:
+                await flush()
+    except zlib.error as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Corrupt gzip body after {summary.accepted} saved entries: {e}",
+        )
+
+    if chunk:
+        await flush()
+    return summary
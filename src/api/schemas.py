@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 
 
 class ParseRequest(BaseModel):
@@ -16,6 +16,34 @@ class BatchParseRequest(BaseModel):
     raw_logs: list[str]
 
 
+class EntryBatchRequest(BaseModel):
+    """Schema for entries parsed by an agent: one list per LogEntry field, all the same length."""
+
+    timestamps: list[datetime]
+    source_ips: list[str]
+    messages: list[str]
+    status_codes: list[int]
+    service_names: list[str]
+    metadata: list[dict[str, Any]]
+
+    @model_validator(mode="after")
+    def check_column_lengths(self) -> "EntryBatchRequest":
+        lengths = {
+            len(column)
+            for column in (
+                self.timestamps,
+                self.source_ips,
+                self.messages,
+                self.status_codes,
+                self.service_names,
+                self.metadata,
+            )
+        }
+        if len(lengths) > 1:
+            raise ValueError("all columns must have the same length")
+        return self
+
+
 class LogEntryResponse(BaseModel):
     """Schema for the standardized log response."""
 
@@ -27,6 +55,28 @@ class LogEntryResponse(BaseModel):
     metadata: dict[str, Any]
 
 
+class IngestResponse(BaseModel):
+    """Schema for a queued (write-behind) ingestion request."""
+
+    accepted: int
+    skipped: int
+
+
+class StreamIngestError(BaseModel):
+    """A rejected line in a streamed upload."""
+
+    line: int
+    error: str
+
+
+class StreamIngestResponse(BaseModel):
+    """Summary of a streamed bulk ingestion."""
+
+    accepted: int = 0
+    rejected: int = 0
+    errors: list[StreamIngestError] = []
+
+
 class ErrorResponse(BaseModel):
     """Schema for error messages."""
 
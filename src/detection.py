@@ -0,0 +1,589 @@
+import asyncio
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict, deque
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime
+from typing import Any
+
+import httpx
+
+from src.exceptions import ConfigurationError
+from src.interfaces import AlertSink
+from src.models import Alert, LogBatch
+from src.serialization import dumps
+
+
+def _epoch_seconds(ts: datetime) -> float:
+    return (ts if ts.tzinfo is not None else ts.replace(tzinfo=UTC)).timestamp()
+
+
+class SlidingWindow:
+    """
+    Counters over the newest ``size`` time slots of one key, in fixed memory.
+
+    Each slot holds ``fields`` counters in one flat ring; ``totals`` is their
+    sum over the window. Adding to a newer slot clears the slots it pushes out.
+    """
+
+    __slots__ = ("counts", "totals", "head", "size")
+
+    def __init__(self, size: int, fields: int, head: int):
+        self.counts = [0] * (size * fields)
+        self.totals = [0] * fields
+        self.head = head
+        self.size = size
+
+    def add(self, slot: int, values: tuple[int, ...]) -> bool:
+        """Adds values to a slot; False (and nothing added) if it is older than the window."""
+        counts, totals, fields = self.counts, self.totals, len(self.totals)
+        if slot > self.head:
+            for expired in range(max(self.head + 1, slot - self.size + 1), slot + 1):
+                cell = expired % self.size * fields
+                for i in range(fields):
+                    totals[i] -= counts[cell + i]
+                    counts[cell + i] = 0
+            self.head = slot
+        elif slot <= self.head - self.size:
+            return False
+
+        cell = slot % self.size * fields
+        for i, n in enumerate(values):
+            counts[cell + i] += n
+            totals[i] += n
+        return True
+
+
+class _KeyState:
+    __slots__ = ("last_seen", "last_alert")
+
+    def __init__(self):
+        self.last_seen = -math.inf
+        self.last_alert: float | None = None
+
+
+class _WindowState(_KeyState):
+    __slots__ = ("window",)
+
+    def __init__(self, window: SlidingWindow):
+        super().__init__()
+        self.window = window
+
+
+class _VolumeState(_KeyState):
+    __slots__ = ("bucket", "count", "mean", "var", "seen")
+
+    def __init__(self, bucket: int):
+        super().__init__()
+        self.bucket = bucket
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.seen = 0
+
+
+class DetectionRule(ABC):
+    """
+    A rule evaluated on every ingested batch, in log time.
+
+    Per-key state lives in an LRU table of at most ``max_keys`` keys, and keys
+    not seen for ``idle_seconds`` of log time are evicted, so memory is bounded
+    whatever the key cardinality. A rule fires at most once per key every
+    ``cooldown`` seconds.
+    """
+
+    name = "rule"
+
+    def __init__(self, max_keys: int = 10_000, idle_seconds: float = 600, cooldown: float = 300):
+        if max_keys < 1 or idle_seconds <= 0 or cooldown < 0:
+            raise ConfigurationError("detection rules need max_keys >= 1, idle_seconds > 0 and cooldown >= 0")
+        self.max_keys = max_keys
+        self.idle_seconds = idle_seconds
+        self.cooldown = cooldown
+        self.evicted = 0
+        self._states: OrderedDict[str, Any] = OrderedDict()
+        self._clock = -math.inf  # newest log time seen, epoch seconds
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def observe(self, batch: LogBatch, epoch: dict[datetime, float]) -> list[Alert]:
+        """
+        Updates the rule with a batch and returns the alerts it raises.
+        ``epoch`` maps each distinct timestamp of the batch to epoch seconds.
+        """
+        if not batch:
+            return []
+        self._clock = max(self._clock, max(epoch.values()))
+        alerts = self._observe(batch, epoch)
+        self._evict_idle()
+        return alerts
+
+    @abstractmethod
+    def _observe(self, batch: LogBatch, epoch: dict[datetime, float]) -> list[Alert]:
+        pass
+
+    def _state(self, key: str, seconds: float, factory: Callable[[], Any]) -> Any:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = factory()
+            if len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._states.move_to_end(key)
+        state.last_seen = max(state.last_seen, seconds)
+        return state
+
+    def _evict_idle(self):
+        horizon = self._clock - self.idle_seconds
+        while self._states:
+            key, state = next(iter(self._states.items()))
+            if state.last_seen >= horizon:
+                break
+            del self._states[key]
+            self.evicted += 1
+
+    def _fire(self, state: _KeyState, key: str, seconds: float, value: float, threshold: float, message: str):
+        if state.last_alert is not None and seconds - state.last_alert < self.cooldown:
+            return None
+        state.last_alert = seconds
+        at = datetime.fromtimestamp(min(seconds, self._clock), UTC)
+        return Alert(self.name, key, value, threshold, message, at)
+
+
+class _WindowRule(DetectionRule):
+    """A rule over a sliding window of ``window_seconds``, kept as ``slots`` slot counters per key."""
+
+    fields = 1
+
+    def __init__(self, window_seconds: float = 60, slots: int = 10, **kwargs: Any):
+        super().__init__(**kwargs)
+        if window_seconds <= 0 or slots < 1:
+            raise ConfigurationError(f"{self.name} needs window_seconds > 0 and slots >= 1")
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self.slot_seconds = window_seconds / slots
+
+    def _observe(self, batch: LogBatch, epoch: dict[datetime, float]) -> list[Alert]:
+        slot_of = {ts: int(seconds // self.slot_seconds) for ts, seconds in epoch.items()}
+        counts = self._count(batch, [slot_of[ts] for ts in batch.timestamps])
+        by_key: dict[str, list[tuple[int, tuple[int, ...]]]] = {}
+        for (key, slot), values in counts.items():
+            by_key.setdefault(key, []).append((slot, values))
+
+        alerts = []
+        for key, updates in by_key.items():
+            updates.sort()
+            first = updates[0][0]
+            state = self._state(key, (updates[-1][0] + 1) * self.slot_seconds, lambda: self._new_state(first))
+            for slot, values in updates:
+                if state.window.add(slot, values):
+                    alert = self._check(key, state, (slot + 1) * self.slot_seconds)
+                    if alert is not None:
+                        alerts.append(alert)
+        return alerts
+
+    def _new_state(self, slot: int) -> _WindowState:
+        return _WindowState(SlidingWindow(self.slots, self.fields, slot))
+
+    @abstractmethod
+    def _count(self, batch: LogBatch, slots: list[int]) -> dict[tuple[str, int], tuple[int, ...]]:
+        """Counts the batch per (key, slot)."""
+        pass
+
+    @abstractmethod
+    def _check(self, key: str, state: _WindowState, seconds: float) -> Alert | None:
+        pass
+
+
+class ErrorRateRule(_WindowRule):
+    """Fires when at least ``threshold`` of a service's requests in the window are 5xx."""
+
+    name = "error_rate"
+    fields = 2  # requests, 5xx responses
+
+    def __init__(
+        self, window_seconds: float = 60, threshold: float = 0.2, min_requests: int = 50, **kwargs: Any
+    ):
+        super().__init__(window_seconds, **kwargs)
+        if not 0 < threshold <= 1:
+            raise ConfigurationError("error_rate threshold must be a fraction in (0, 1]")
+        self.threshold = threshold
+        self.min_requests = min_requests
+
+    def _count(self, batch: LogBatch, slots: list[int]) -> dict[tuple[str, int], tuple[int, ...]]:
+        keys = list(zip(batch.service_names, slots))
+        errors = Counter(key for key, code in zip(keys, batch.status_codes) if 500 <= code < 600)
+        return {key: (n, errors[key]) for key, n in Counter(keys).items()}
+
+    def _check(self, key: str, state: _WindowState, seconds: float) -> Alert | None:
+        requests, errors = state.window.totals
+        if requests < self.min_requests or errors < self.threshold * requests:
+            return None
+        rate = errors / requests
+        message = (
+            f"{key}: {errors} of {requests} requests failed with 5xx "
+            f"in the last {self.window_seconds:g}s ({rate:.0%})"
+        )
+        return self._fire(state, key, seconds, round(rate, 4), self.threshold, message)
+
+
+class RequestFloodRule(_WindowRule):
+    """Fires when one source IP sends ``threshold`` requests or more within the window."""
+
+    name = "request_flood"
+
+    def __init__(self, window_seconds: float = 10, threshold: int = 2000, **kwargs: Any):
+        super().__init__(window_seconds, **kwargs)
+        if threshold < 1:
+            raise ConfigurationError("request_flood threshold must be >= 1")
+        self.threshold = threshold
+
+    def _count(self, batch: LogBatch, slots: list[int]) -> dict[tuple[str, int], tuple[int, ...]]:
+        return {key: (n,) for key, n in Counter(zip(batch.source_ips, slots)).items()}
+
+    def _check(self, key: str, state: _WindowState, seconds: float) -> Alert | None:
+        (requests,) = state.window.totals
+        if requests < self.threshold:
+            return None
+        message = f"{key}: {requests} requests in the last {self.window_seconds:g}s"
+        return self._fire(state, key, seconds, requests, self.threshold, message)
+
+
+class VolumeAnomalyRule(DetectionRule):
+    """
+    Fires when a service's request count per ``bucket_seconds`` deviates from
+    its exponentially weighted moving average by ``z_threshold`` standard
+    deviations or more.
+
+    The average and variance are updated with every closed bucket (weight
+    ``alpha``); buckets with no requests count as zero, up to ``max_gap`` of
+    them. Rises are reported while a bucket is still filling, drops once it
+    has closed. The deviation is at least the Poisson one, ``sqrt(mean)``, so
+    steady low-volume services do not alert on noise. No alerts are raised
+    before ``min_buckets`` buckets have been seen.
+    """
+
+    name = "volume"
+
+    def __init__(
+        self,
+        bucket_seconds: float = 60,
+        alpha: float = 0.1,
+        z_threshold: float = 4.0,
+        min_buckets: int = 15,
+        max_gap: int = 60,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        if bucket_seconds <= 0 or not 0 < alpha <= 1 or z_threshold <= 0:
+            raise ConfigurationError("volume needs bucket_seconds > 0, alpha in (0, 1] and z_threshold > 0")
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_buckets = min_buckets
+        self.max_gap = max_gap
+
+    def _observe(self, batch: LogBatch, epoch: dict[datetime, float]) -> list[Alert]:
+        bucket_of = {ts: int(seconds // self.bucket_seconds) for ts, seconds in epoch.items()}
+        counts = Counter(zip(batch.service_names, [bucket_of[ts] for ts in batch.timestamps]))
+
+        alerts = []
+        for (key, bucket), n in sorted(counts.items(), key=lambda item: item[0][1]):
+            state = self._state(key, (bucket + 1) * self.bucket_seconds, lambda: _VolumeState(bucket))
+            if bucket < state.bucket:
+                continue  # that bucket is already folded into the average
+            if bucket > state.bucket:
+                alerts.extend(self._close(key, state, bucket))
+            state.count += n
+            alert = self._check(key, state, closed=False)
+            if alert is not None:
+                alerts.append(alert)
+        return alerts
+
+    def _close(self, key: str, state: _VolumeState, bucket: int) -> list[Alert]:
+        """Folds the open bucket and any empty ones before ``bucket`` into the average."""
+        alerts = []
+        for _ in range(min(bucket - state.bucket, self.max_gap + 1)):
+            alert = self._check(key, state, closed=True)
+            if alert is not None:
+                alerts.append(alert)
+            if state.seen:
+                diff = state.count - state.mean
+                step = self.alpha * diff
+                state.mean += step
+                state.var = (1 - self.alpha) * (state.var + diff * step)
+            else:
+                state.mean = float(state.count)
+            state.seen += 1
+            state.bucket += 1
+            state.count = 0
+        state.bucket = bucket
+        return alerts
+
+    def _check(self, key: str, state: _VolumeState, closed: bool) -> Alert | None:
+        if state.seen < self.min_buckets:
+            return None
+        deviation = max(math.sqrt(state.var), math.sqrt(max(state.mean, 1.0)))
+        z = (state.count - state.mean) / deviation
+        if z < self.z_threshold and not (closed and z <= -self.z_threshold):
+            return None
+        message = (
+            f"{key}: {state.count} requests in {self.bucket_seconds:g}s, "
+            f"expected {state.mean:.0f} ± {deviation:.0f} (z = {z:+.1f})"
+        )
+        end = (state.bucket + 1) * self.bucket_seconds
+        if state.last_alert == end:
+            return None  # this bucket has already been reported while filling
+        return self._fire(state, key, end, round(z, 2), self.z_threshold, message)
+
+
+class ConsoleAlertSink(AlertSink):
+    """Prints alerts to stdout."""
+
+    def emit(self, alerts: list[Alert]):
+        for alert in alerts:
+            print(f"ALERT [{alert.rule}] {alert.timestamp.isoformat()} {alert.message}")
+
+
+class FileAlertSink(AlertSink):
+    """Appends alerts to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def emit(self, alerts: list[Alert]):
+        with open(self.path, "ab") as f:
+            f.write(b"".join(dumps(alert.to_json()) + b"\n" for alert in alerts))
+
+
+class WebhookAlertSink(AlertSink):
+    """POSTs each group of alerts to ``url`` as ``{"alerts": [...]}``."""
+
+    def __init__(self, url: str, timeout: float = 5.0, headers: dict[str, str] | None = None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+        self._client: httpx.Client | None = None
+
+    def emit(self, alerts: list[Alert]):
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.timeout, headers=self.headers)
+        response = self._client.post(self.url, json={"alerts": [alert.to_json() for alert in alerts]})
+        response.raise_for_status()
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class DetectionEngine:
+    """
+    Runs detection rules on ingested batches, off the request path.
+
+    ``submit`` only queues a reference to the batch and never blocks: when
+    ``max_batches`` batches are already waiting, the batch is dropped and
+    counted instead, so slow rules or sinks cost detection coverage, never
+    ingest throughput. A single worker task evaluates the rules on a thread and
+    hands the alerts to every sink; a failing sink is logged and counted. The
+    newest ``recent_alerts`` alerts are also kept in memory.
+    """
+
+    _rule_map: dict[str, type[DetectionRule]] = {
+        "error_rate": ErrorRateRule,
+        "request_flood": RequestFloodRule,
+        "volume": VolumeAnomalyRule,
+    }
+
+    _sink_map: dict[str, type[AlertSink]] = {
+        "console": ConsoleAlertSink,
+        "file": FileAlertSink,
+        "webhook": WebhookAlertSink,
+    }
+
+    def __init__(
+        self,
+        rules: Iterable[DetectionRule],
+        sinks: Iterable[AlertSink] = (),
+        max_batches: int = 1000,
+        recent_alerts: int = 200,
+    ):
+        self.rules = list(rules)
+        self.sinks = list(sinks)
+        self.max_batches = max_batches
+        self._recent: deque[Alert] = deque(maxlen=recent_alerts)
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._accepting = False
+        self._pending = 0
+        self._submitted = 0
+        self._processed = 0
+        self._dropped = 0
+        self._failures = 0
+        self._sink_failures = 0
+        self._alerts: Counter[str] = Counter()
+
+    @classmethod
+    def from_config(cls, settings: dict[str, Any]) -> "DetectionEngine":
+        """
+        Builds an engine from the ``detection`` config section. Rules take the
+        section's ``max_keys``, ``idle_seconds`` and ``cooldown`` unless they set
+        their own, and a rule with ``enabled: false`` is skipped. Without a
+        ``rules`` key every rule runs with its defaults.
+        """
+        settings = dict(settings)
+        if not settings.pop("enabled", True):
+            return cls([])
+        rule_settings = settings.pop("rules", None) or {name: {} for name in cls._rule_map}
+        sink_settings = settings.pop("sinks", None) or []
+        shared = {
+            name: settings.pop(name) for name in ("max_keys", "idle_seconds", "cooldown") if name in settings
+        }
+
+        rules = []
+        for name, options in rule_settings.items():
+            options = {**shared, **(options or {})}
+            if options.pop("enabled", True):
+                rules.append(cls._build(cls._rule_map, "detection rule", name, options))
+        sinks = []
+        for options in sink_settings:
+            options = dict(options)
+            sinks.append(cls._build(cls._sink_map, "alert sink", options.pop("type", None), options))
+
+        try:
+            return cls(rules, sinks, **settings)
+        except TypeError as e:
+            raise ConfigurationError(f"Invalid detection settings: {e}") from e
+
+    @staticmethod
+    def _build(kinds: dict[str, type], what: str, name: str | None, options: dict[str, Any]) -> Any:
+        kind = kinds.get(name)
+        if kind is None:
+            raise ConfigurationError(f"Unsupported {what}: {name}")
+        try:
+            return kind(**options)
+        except ConfigurationError:
+            raise
+        except Exception as e:
+            raise ConfigurationError(f"Failed to initialize {what} '{name}': {e}") from e
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """Starts the worker task on the running event loop; does nothing without rules."""
+        if self.running or not self.rules:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+        with self._lock:
+            self._accepting = True
+
+    async def stop(self):
+        """Evaluates everything already submitted, then stops the worker and closes the sinks."""
+        if not self.running:
+            return
+        with self._lock:
+            self._accepting = False
+            # Queued behind any put scheduled by submit() from other threads
+            self._loop.call_soon(self._queue.put_nowait, None)
+        await self._worker
+        self._worker = None
+        for sink in self.sinks:
+            sink.close()
+
+    def submit(self, batch: LogBatch) -> bool:
+        """
+        Queues a batch for the rules without blocking; safe to call from any
+        thread. Returns False (and counts the entries as dropped) when the
+        engine is not running or its queue is full.
+        """
+        if not batch or not self.rules:
+            return True
+        with self._lock:
+            if not self._accepting or self._pending >= self.max_batches:
+                self._dropped += len(batch)
+                return False
+            self._pending += 1
+            self._submitted += len(batch)
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, batch)
+        return True
+
+    def evaluate(self, batch: LogBatch) -> list[Alert]:
+        """Runs every rule on a batch and returns the alerts raised, without sending them."""
+        epoch = {ts: _epoch_seconds(ts) for ts in set(batch.timestamps)}
+        alerts = []
+        for rule in self.rules:
+            alerts.extend(rule.observe(batch, epoch))
+        return alerts
+
+    def recent_alerts(self, limit: int | None = None) -> list[Alert]:
+        """The newest alerts raised, newest first."""
+        with self._lock:
+            alerts = list(self._recent)
+        alerts.reverse()
+        return alerts if limit is None else alerts[: max(limit, 0)]
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": self._pending,
+            "capacity": self.max_batches,
+            "submitted": self._submitted,
+            "processed": self._processed,
+            "dropped": self._dropped,
+            "failures": self._failures,
+            "sink_failures": self._sink_failures,
+            "alerts": dict(self._alerts),
+            "keys": {rule.name: len(rule) for rule in self.rules},
+            "evicted": {rule.name: rule.evicted for rule in self.rules},
+        }
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batches = [item]
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batches.append(item)
+
+            try:
+                await asyncio.to_thread(self._process, batches)
+            except Exception as e:
+                print(f"Detection failed on {len(batches)} batches: {e}")
+                self._failures += 1
+            finally:
+                with self._lock:
+                    self._pending -= len(batches)
+
+    def _process(self, batches: list[LogBatch]):
+        alerts = []
+        for batch in batches:
+            alerts.extend(self.evaluate(batch))
+            self._processed += len(batch)
+        if not alerts:
+            return
+
+        with self._lock:
+            self._recent.extend(alerts)
+            self._alerts.update(alert.rule for alert in alerts)
+        for sink in self.sinks:
+            try:
+                sink.emit(alerts)
+            except Exception as e:
+                print(f"Alert sink {type(sink).__name__} failed: {e}")
+                self._sink_failures += 1
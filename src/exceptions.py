@@ -14,3 +14,9 @@ class ConfigurationError(LogSentinelError):
     """Errors when reading configuration"""
 
     pass
+
+
+class QueryTimeoutError(LogSentinelError):
+    """Errors when a storage query runs past its time limit"""
+
+    pass
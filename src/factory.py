@@ -1,19 +1,53 @@
+import threading
+
 from src.exceptions import ConfigurationError
 from src.interfaces import LogParser
 from src.parsers.nginx import NginxParser
 
 
 class ParserFactory:
-    """Get parser"""
+    """
+    Get parser
+
+    Each parser type is built once and the instance is shared by every caller,
+    across threads, so parsers must not keep per-call state.
+    """
 
     _parsers = {
         "nginx": NginxParser,
         # will add another parsers here ( ex: syslog )
     }
 
+    _instances: dict[str, LogParser] = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def get_parser(parser_type: str) -> LogParser:
+        parser = ParserFactory._instances.get(parser_type)
+        if parser is not None:
+            return parser
+
         parser_class = ParserFactory._parsers.get(parser_type)
         if not parser_class:
             raise ConfigurationError(f"unsupported parser type: {parser_type}")
-        return parser_class()
+
+        with ParserFactory._lock:
+            # Another thread may have built it while we waited for the lock
+            parser = ParserFactory._instances.get(parser_type)
+            if parser is None:
+                parser = ParserFactory._instances[parser_type] = parser_class()
+        return parser
+
+    @staticmethod
+    def warm_up(parser_types: list[str] | None = None) -> list[str]:
+        """Builds the given parser types (default: all registered) ahead of the first request."""
+        parser_types = list(ParserFactory._parsers) if parser_types is None else parser_types
+        for parser_type in parser_types:
+            ParserFactory.get_parser(parser_type)
+        return parser_types
+
+    @staticmethod
+    def clear_cache():
+        """Drops the shared instances; the next get_parser builds fresh ones."""
+        with ParserFactory._lock:
+            ParserFactory._instances.clear()
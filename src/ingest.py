@@ -0,0 +1,167 @@
+import asyncio
+import zlib
+from collections.abc import AsyncIterator
+from typing import Any
+
+from src.models import LogBatch
+from src.storage import LogStorage
+
+# Upper bound on inflated bytes produced per decompression step
+STREAM_INFLATE_STEP = 1 << 20
+
+
+class IngestQueue:
+    """
+    Bounded in-process write-behind queue between the API and LogStorage.
+
+    Handlers hand parsed entries to ``put`` and return immediately; a single
+    writer task drains the queue and persists entries in large transactions.
+    Capacity is counted in entries, not batches, so one huge request cannot
+    sneak past the bound.
+    """
+
+    def __init__(self, max_entries: int = 100_000, max_write_batch: int = 5_000):
+        self.max_entries = max_entries
+        self.max_write_batch = max_write_batch
+        self._queue: asyncio.Queue | None = None
+        self._writer: asyncio.Task | None = None
+        self._storage: LogStorage | None = None
+        self._depth = 0
+        self._accepted = 0
+        self._written = 0
+        self._rejected = 0
+        self._dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None and not self._writer.done()
+
+    def start(self, storage: LogStorage):
+        """Starts the writer task on the running event loop."""
+        if self.running:
+            return
+        self._storage = storage
+        self._queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Writes out everything still queued, then stops the writer task."""
+        if not self.running:
+            return
+        self._queue.put_nowait(None)
+        await self._writer
+        self._writer = None
+
+    def put(self, batch: LogBatch) -> bool:
+        """
+        Queues a batch for writing. Must be called from the event loop.
+
+        Returns False (and counts the entries as rejected) when the queue is not
+        running or has no room for the whole batch.
+        """
+        if not batch:
+            return True
+        if not self.running or self._depth + len(batch) > self.max_entries:
+            self._rejected += len(batch)
+            return False
+
+        self._depth += len(batch)
+        self._accepted += len(batch)
+        self._queue.put_nowait(batch)
+        return True
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "depth": self._depth,
+            "capacity": self.max_entries,
+            "accepted": self._accepted,
+            "written": self._written,
+            "rejected": self._rejected,
+            "dropped": self._dropped,
+        }
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            # Coalesce whatever is already waiting into one transaction
+            batch = LogBatch()
+            batch.extend(item)
+            while len(batch) < self.max_write_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.extend(item)
+
+            try:
+                await asyncio.to_thread(self._storage.save_columns, batch)
+                self._written += len(batch)
+            except Exception as e:
+                print(f"Ingest writer failed to save {len(batch)} entries: {e}")
+                self._dropped += len(batch)
+            finally:
+                self._depth -= len(batch)
+
+
+async def iter_body_lines(
+    chunks: AsyncIterator[bytes], gzipped: bool = False, max_line_bytes: int = 65536
+) -> AsyncIterator[bytes | None]:
+    """
+    Splits a streamed request body into lines without buffering the whole body.
+
+    Gzip bodies are inflated incrementally with a bounded output size per step;
+    a body of several concatenated gzip members is read through to the end.
+    A partial trailing line is carried over to the next chunk. Lines longer than
+    ``max_line_bytes`` are discarded as they arrive and reported as ``None`` so
+    one runaway line cannot grow the buffer. Raises zlib.error on corrupt gzip.
+    """
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    buffer = b""
+    oversized = False
+
+    def split(data: bytes) -> list[bytes | None]:
+        nonlocal buffer, oversized
+        lines: list[bytes | None] = []
+        *complete, buffer = (buffer + data).split(b"\n")
+        for line in complete:
+            if oversized or len(line) > max_line_bytes:
+                oversized = False
+                lines.append(None)
+            else:
+                lines.append(line)
+        if len(buffer) > max_line_bytes:
+            oversized, buffer = True, b""
+        return lines
+
+    async for chunk in chunks:
+        if inflater is None:
+            for line in split(chunk):
+                yield line
+            continue
+
+        data = inflater.decompress(chunk, STREAM_INFLATE_STEP)
+        while True:
+            for line in split(data):
+                yield line
+            if inflater.eof and inflater.unused_data:
+                # The next gzip member (cat a.gz b.gz, pigz, a client flushing per chunk)
+                rest = inflater.unused_data
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                data = inflater.decompress(rest, STREAM_INFLATE_STEP)
+            elif inflater.unconsumed_tail:
+                data = inflater.decompress(inflater.unconsumed_tail, STREAM_INFLATE_STEP)
+            else:
+                break
+
+    if inflater is not None:
+        for line in split(inflater.flush()):
+            yield line
+    if oversized:
+        yield None
+    elif buffer:
+        yield buffer
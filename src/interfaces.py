@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 
-from src.models import LogEntry
+from src.models import Alert, LogBatch, LogEntry
 
 
 class LogParser(ABC):
@@ -8,3 +8,33 @@ class LogParser(ABC):
     def parse(self, line: str) -> LogEntry | None:
         """Return Log Entry or None if fails"""
         pass
+
+    def parse_batch(self, lines: list[str]) -> LogBatch:
+        """
+        Parse many lines into a columnar LogBatch.
+
+        Lines that do not parse (or raise) are skipped and counted in
+        ``rejected``. Parsers override this with a bulk implementation.
+        """
+        batch = LogBatch()
+        for line in lines:
+            try:
+                entry = self.parse(line)
+            except Exception:
+                entry = None
+            if entry:
+                batch.append(entry)
+            else:
+                batch.rejected += 1
+        return batch
+
+
+class AlertSink(ABC):
+    @abstractmethod
+    def emit(self, alerts: list[Alert]):
+        """Delivers alerts; raises on failure. Called from the detection worker thread."""
+        pass
+
+    def close(self):
+        """Releases resources held by the sink."""
+        pass
@@ -0,0 +1,285 @@
+import asyncio
+import threading
+from collections import deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from src.models import LogBatch
+from src.serialization import dumps
+
+
+@dataclass(slots=True, frozen=True)
+class TailFilter:
+    """Server-side filter of a live tail subscription; unset fields match everything."""
+
+    service_name: str | None = None
+    status_min: int | None = None
+    status_max: int | None = None
+    source_ip: str | None = None
+
+    def select(self, batch: LogBatch) -> list[int]:
+        """Positions of the matching rows of batch."""
+        rows: range | list[int] = range(len(batch))
+        if self.service_name:
+            services = batch.service_names
+            rows = [i for i in rows if services[i] == self.service_name]
+        if self.source_ip:
+            ips = batch.source_ips
+            rows = [i for i in rows if ips[i] == self.source_ip]
+        if self.status_min is not None or self.status_max is not None:
+            low = self.status_min if self.status_min is not None else -1
+            high = self.status_max if self.status_max is not None else 1 << 31
+            codes = batch.status_codes
+            rows = [i for i in rows if low <= codes[i] <= high]
+        return list(rows)
+
+
+class Subscription:
+    """
+    One live tail client: a buffer of at most ``max_entries`` encoded entries
+    and the event that wakes its stream. When the buffer is full the oldest
+    entries are dropped and counted.
+    """
+
+    def __init__(self, tail_filter: TailFilter, max_entries: int):
+        self.filter = tail_filter
+        self.buffer: deque[bytes] = deque(maxlen=max_entries)
+        self.event = asyncio.Event()
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self._unreported = 0
+
+    def push(self, entries: list[bytes], skipped: int = 0) -> int:
+        """
+        Appends entries to the buffer, after ``skipped`` older matching entries
+        that were never encoded because they would not fit. Returns how many
+        entries were dropped in all.
+        """
+        dropped = skipped + max(0, len(self.buffer) + len(entries) - self.buffer.maxlen)
+        self.buffer.extend(entries)
+        self.dropped += dropped
+        self._unreported += dropped
+        self.event.set()
+        return dropped
+
+    def drain(self) -> tuple[list[bytes], int]:
+        """Takes the buffered entries and the number dropped since the last drain."""
+        entries = list(self.buffer)
+        self.buffer.clear()
+        dropped, self._unreported = self._unreported, 0
+        self.delivered += len(entries)
+        self.event.clear()
+        return entries, dropped
+
+    def close(self):
+        self.closed = True
+        self.event.set()
+
+
+def _entry(batch: LogBatch, i: int) -> dict[str, Any]:
+    return {
+        "timestamp": batch.timestamps[i].isoformat(),
+        "source_ip": batch.source_ips[i],
+        "message": batch.messages[i],
+        "status_code": batch.status_codes[i],
+        "service_name": batch.service_names[i],
+        "metadata": batch.metadata[i],
+    }
+
+
+class LiveTail:
+    """
+    In-memory fan-out of newly ingested entries to live tail subscribers.
+
+    ``publish`` is called on the ingest path from any thread. It returns at
+    once when nobody is subscribed and otherwise only queues a reference to
+    the batch. A worker task matches queued batches against the distinct
+    subscriber filters on a thread, encodes each matching entry once and
+    appends the encoded entries to every matching subscriber's buffer, so
+    watchers never touch storage and identical filters share the work.
+
+    A subscriber that reads too slowly loses the oldest entries of its
+    buffer (``buffer_entries`` long) and is told how many. If the worker
+    itself falls ``max_batches`` behind, batches are skipped for everyone
+    and counted.
+    """
+
+    def __init__(
+        self,
+        max_subscribers: int = 500,
+        buffer_entries: int = 1000,
+        max_batches: int = 100,
+        heartbeat: float = 15.0,
+    ):
+        self.max_subscribers = max_subscribers
+        self.buffer_entries = buffer_entries
+        self.max_batches = max_batches
+        self.heartbeat = heartbeat
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._accepting = False
+        self._pending = 0
+        self._published = 0
+        self._skipped = 0
+        self._buffered = 0
+        self._dropped = 0
+        self._failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """Starts the fan-out worker on the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+        with self._lock:
+            self._accepting = True
+
+    async def stop(self):
+        """Delivers what is already queued, then ends every subscriber's stream."""
+        if not self.running:
+            return
+        with self._lock:
+            self._accepting = False
+            self._loop.call_soon(self._queue.put_nowait, None)
+        await self._worker
+        self._worker = None
+        for subscription in list(self._subscribers):
+            subscription.close()
+
+    def publish(self, batch: LogBatch) -> bool:
+        """
+        Queues a batch for the subscribers without blocking; safe to call from
+        any thread. Returns False when it was skipped because the worker is
+        too far behind.
+        """
+        if not batch or not self._subscribers:
+            return True
+        with self._lock:
+            if not self._accepting:
+                return True
+            if self._pending >= self.max_batches:
+                self._skipped += len(batch)
+                return False
+            self._pending += 1
+            self._published += len(batch)
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, batch)
+        return True
+
+    def subscribe(self, tail_filter: TailFilter) -> Subscription | None:
+        """Registers a subscriber; None when the tail is not running or is full."""
+        if not self.running or len(self._subscribers) >= self.max_subscribers:
+            return None
+        subscription = Subscription(tail_filter, self.buffer_entries)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        subscription.close()
+
+    async def events(self, subscription: Subscription) -> AsyncIterator[bytes]:
+        """
+        Server-Sent Events for one subscriber: one ``data:`` message per entry,
+        a ``dropped`` event with the count whenever entries were lost, and a
+        comment line every ``heartbeat`` seconds while idle. Unsubscribes when
+        the stream ends or the client goes away.
+        """
+        try:
+            yield b": live tail\n\n"
+            while not subscription.closed:
+                try:
+                    await asyncio.wait_for(subscription.event.wait(), self.heartbeat)
+                except TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+
+                entries, dropped = subscription.drain()
+                parts = []
+                if dropped:
+                    parts.append(b"event: dropped\ndata: " + dumps({"dropped": dropped}) + b"\n\n")
+                parts.extend(b"data: " + entry + b"\n\n" for entry in entries)
+                if parts:
+                    yield b"".join(parts)
+        finally:
+            self.unsubscribe(subscription)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "subscribers": len(self._subscribers),
+            "pending": self._pending,
+            "published": self._published,
+            "skipped": self._skipped,
+            "buffered": self._buffered,
+            "dropped": self._dropped,
+            "failures": self._failures,
+        }
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batches = [item]
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batches.append(item)
+
+            try:
+                subscribers = list(self._subscribers)
+                if subscribers:
+                    filters = {subscription.filter for subscription in subscribers}
+                    matched = await asyncio.to_thread(self._match, batches, filters)
+                    for subscription in subscribers:
+                        total, entries = matched[subscription.filter]
+                        if entries and not subscription.closed:
+                            self._dropped += subscription.push(entries, total - len(entries))
+                            self._buffered += len(entries)
+            except Exception as e:
+                print(f"Live tail failed on {len(batches)} batches: {e}")
+                self._failures += 1
+            finally:
+                with self._lock:
+                    self._pending -= len(batches)
+
+    def _match(
+        self, batches: list[LogBatch], filters: set[TailFilter]
+    ) -> dict[TailFilter, tuple[int, list[bytes]]]:
+        """
+        Per filter, the number of matching entries and the newest of them that
+        fit in a buffer, encoded. An entry is encoded once however many filters
+        match it.
+        """
+        batch = batches[0]
+        if len(batches) > 1:
+            batch = LogBatch()
+            for item in batches:
+                batch.extend(item)
+
+        encoded: dict[int, bytes] = {}
+        matched = {}
+        for tail_filter in filters:
+            rows = tail_filter.select(batch)
+            entries = []
+            for i in rows[-self.buffer_entries :]:
+                data = encoded.get(i)
+                if data is None:
+                    data = encoded[i] = dumps(_entry(batch, i))
+                entries.append(data)
+            matched[tail_filter] = len(rows), entries
+        return matched
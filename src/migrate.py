@@ -0,0 +1,75 @@
+import argparse
+import os
+import sqlite3
+import sys
+
+from src.config import ConfigLoader
+from src.exceptions import ConfigurationError
+from src.storage import MIGRATIONS, LogStorage
+
+
+def _schema_version(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def migrate(db_path: str, vacuum: bool = False, rebuild_search: bool = False) -> tuple[int, int]:
+    """
+    Brings the database at db_path up to the current schema; returns the
+    (old, new) schema versions. With rebuild_search, the full-text index is
+    rebuilt from the logs table. With vacuum, the file is rebuilt afterwards so
+    the space freed by a layout change is given back to the filesystem.
+    """
+    before = _schema_version(db_path)
+    storage = LogStorage(db_path=db_path)
+    try:
+        if rebuild_search:
+            storage.rebuild_search_index()
+    finally:
+        storage.close()
+
+    if vacuum:
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+    return before, _schema_version(db_path)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.migrate", description="Upgrade a LogSentinel database to the current schema."
+    )
+    parser.add_argument("--db", help="database file (default: storage.db_path from config.yaml)")
+    parser.add_argument("--vacuum", action="store_true", help="rebuild the file afterwards to reclaim space")
+    parser.add_argument("--rebuild-search", action="store_true", help="rebuild the full-text search index")
+    args = parser.parse_args(argv)
+
+    db_path = args.db
+    if db_path is None:
+        try:
+            db_path = ConfigLoader.load_config().get("storage", {}).get("db_path", "logs.db")
+        except ConfigurationError:
+            db_path = "logs.db"
+
+    if not os.path.exists(db_path):
+        print(f"Database not found: {db_path}")
+        sys.exit(1)
+
+    size = os.path.getsize(db_path)
+    before, after = migrate(db_path, vacuum=args.vacuum, rebuild_search=args.rebuild_search)
+    if before == after:
+        print(f"{db_path} is already at schema version {after} of {len(MIGRATIONS)}.")
+    else:
+        print(f"Migrated {db_path} from schema version {before} to {after}.")
+    if args.rebuild_search:
+        print("Full-text search index rebuilt.")
+    print(f"Size: {size / 1e6:.1f} MB -> {os.path.getsize(db_path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
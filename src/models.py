@@ -1,9 +1,17 @@
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
 
-@dataclass
+def request_path(message: str | None) -> str | None:
+    """The path of an HTTP request line ("GET /a?b=1 HTTP/1.1" -> "/a"); None for other messages."""
+    parts = message.split(" ", 2) if message else ()
+    if len(parts) < 2 or not parts[1].startswith("/"):
+        return None
+    return parts[1].split("?", 1)[0]
+
+
+@dataclass(slots=True, frozen=True)
 class LogEntry:
     timestamp: datetime
     source_ip: str
@@ -13,7 +21,130 @@ class LogEntry:
     metadata: dict[str, Any] = field(default_factory=dict)
 
     def to_json(self) -> dict[str, Any]:
-        """json serializer"""
-        data = asdict(self)
-        data["timestamp"] = self.timestamp.isoformat()
-        return data
+        """json serializer (metadata is copied one level deep, not recursively)"""
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "source_ip": self.source_ip,
+            "message": self.message,
+            "status_code": self.status_code,
+            "service_name": self.service_name,
+            "metadata": dict(self.metadata),
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class Alert:
+    """A detection rule firing for one key (a service, an IP) at a point in log time."""
+
+    rule: str
+    key: str
+    value: float
+    threshold: float
+    message: str
+    timestamp: datetime
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "rule": self.rule,
+            "key": self.key,
+            "value": self.value,
+            "threshold": self.threshold,
+            "message": self.message,
+            "timestamp": self.timestamp.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class LogBatch:
+    """
+    Column-oriented batch of parsed log entries: one list per LogEntry field.
+
+    Batch parsers fill the columns directly and storage inserts from them, so
+    no per-row LogEntry objects are built on the bulk path. ``rejected`` counts
+    input lines that could not be parsed.
+    """
+
+    timestamps: list[datetime] = field(default_factory=list)
+    source_ips: list[str] = field(default_factory=list)
+    messages: list[str] = field(default_factory=list)
+    status_codes: list[int] = field(default_factory=list)
+    service_names: list[str] = field(default_factory=list)
+    metadata: list[dict[str, Any]] = field(default_factory=list)
+    rejected: int = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, entry: LogEntry):
+        self.timestamps.append(entry.timestamp)
+        self.source_ips.append(entry.source_ip)
+        self.messages.append(entry.message)
+        self.status_codes.append(entry.status_code)
+        self.service_names.append(entry.service_name)
+        self.metadata.append(entry.metadata)
+
+    def extend(self, other: "LogBatch"):
+        self.timestamps.extend(other.timestamps)
+        self.source_ips.extend(other.source_ips)
+        self.messages.extend(other.messages)
+        self.status_codes.extend(other.status_codes)
+        self.service_names.extend(other.service_names)
+        self.metadata.extend(other.metadata)
+        self.rejected += other.rejected
+
+    @classmethod
+    def from_entries(cls, entries: list[LogEntry]) -> "LogBatch":
+        batch = cls()
+        for entry in entries:
+            batch.append(entry)
+        return batch
+
+    def to_json(self) -> list[dict[str, Any]]:
+        """Serializes every row to the LogEntry.to_json shape without building LogEntry objects."""
+        iso = {ts: ts.isoformat() for ts in set(self.timestamps)}
+        return [
+            {
+                "timestamp": iso[ts],
+                "source_ip": source_ip,
+                "message": message,
+                "status_code": status_code,
+                "service_name": service_name,
+                "metadata": metadata,
+            }
+            for ts, source_ip, message, status_code, service_name, metadata in zip(
+                self.timestamps,
+                self.source_ips,
+                self.messages,
+                self.status_codes,
+                self.service_names,
+                self.metadata,
+            )
+        ]
+
+    def to_columns(self) -> dict[str, list[Any]]:
+        """
+        Returns the columns in the wire shape of /ingest/entries, timestamps as
+        ISO strings. The other column lists are shared with the batch, not copied.
+        """
+        iso = {ts: ts.isoformat() for ts in set(self.timestamps)}
+        return {
+            "timestamps": [iso[ts] for ts in self.timestamps],
+            "source_ips": self.source_ips,
+            "messages": self.messages,
+            "status_codes": self.status_codes,
+            "service_names": self.service_names,
+            "metadata": self.metadata,
+        }
+
+    def to_entries(self) -> list[LogEntry]:
+        return [
+            LogEntry(*row)
+            for row in zip(
+                self.timestamps,
+                self.source_ips,
+                self.messages,
+                self.status_codes,
+                self.service_names,
+                self.metadata,
+            )
+        ]
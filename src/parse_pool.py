@@ -0,0 +1,117 @@
+import multiprocessing
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from src.exceptions import ConfigurationError
+from src.factory import ParserFactory
+from src.interfaces import LogParser
+from src.models import LogBatch
+
+
+def _encode(values: list[Any]) -> tuple[list[Any], array]:
+    """Dictionary-encodes a column of hashable values: (distinct values, index per row)."""
+    codes: dict[Any, int] = {}
+    indexes = array("I", [codes.setdefault(value, len(codes)) for value in values])
+    return list(codes), indexes
+
+
+def _decode(encoded: tuple[list[Any], array]) -> list[Any]:
+    values, indexes = encoded
+    return [values[i] for i in indexes]
+
+
+def _parse_chunk(parser_type: str, lines: list[str]) -> tuple:
+    """
+    Runs in a worker process. Returns the parsed columns in a compact form:
+    timestamps and service names dictionary-encoded, status codes as a 64-bit
+    int array, so the result pickles to little more than the distinct values.
+    """
+    batch = ParserFactory.get_parser(parser_type).parse_batch(lines)
+    return (
+        _encode(batch.timestamps),
+        batch.source_ips,
+        batch.messages,
+        array("q", batch.status_codes),
+        _encode(batch.service_names),
+        batch.metadata,
+        batch.rejected,
+    )
+
+
+def _unpack(result: tuple) -> LogBatch:
+    timestamps, source_ips, messages, status_codes, service_names, metadata, rejected = result
+    return LogBatch(
+        timestamps=_decode(timestamps),
+        source_ips=source_ips,
+        messages=messages,
+        status_codes=status_codes.tolist(),
+        service_names=_decode(service_names),
+        metadata=metadata,
+        rejected=rejected,
+    )
+
+
+class ParsePool:
+    """
+    Spreads the parsing of large batches over worker processes.
+
+    Batches of at least ``min_batch_lines`` lines are split into chunks of
+    ``chunk_lines`` and parsed in parallel, each worker reusing the parsers
+    cached by ParserFactory in its process; smaller batches, and every batch
+    when ``workers`` is 0, are parsed inline by the caller, where process
+    hand-off would cost more than it saves.
+    Chunk results are merged back in input order; a chunk whose worker fails
+    is parsed inline instead, and a broken pool is restarted.
+    """
+
+    def __init__(self, workers: int = 0, min_batch_lines: int = 20_000, chunk_lines: int = 10_000):
+        if workers < 0 or min_batch_lines < 1 or chunk_lines < 1:
+            raise ConfigurationError("parse pool needs workers >= 0, min_batch_lines and chunk_lines >= 1")
+        self.workers = workers
+        self.min_batch_lines = min_batch_lines
+        self.chunk_lines = chunk_lines
+        self._executor: Executor | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        """Creates the process pool; worker processes are spawned on first use."""
+        if self._executor is None and self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def stop(self):
+        """Shuts the worker processes down."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def parse_batch(self, parser_type: str, parser: LogParser, lines: list[str]) -> LogBatch:
+        """Parses lines like ``parser.parse_batch``, in worker processes when the batch is large."""
+        executor = self._executor
+        if executor is None or len(lines) < self.min_batch_lines:
+            return parser.parse_batch(lines)
+
+        chunks = [lines[start : start + self.chunk_lines] for start in range(0, len(lines), self.chunk_lines)]
+        batch = LogBatch()
+        try:
+            futures = [executor.submit(_parse_chunk, parser_type, chunk) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                try:
+                    batch.extend(_unpack(future.result()))
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    print(f"Parse worker failed on {len(chunk)} lines ({e!r}), parsing them inline.")
+                    batch.extend(parser.parse_batch(chunk))
+        except BrokenProcessPool as e:
+            print(f"Parse pool broken ({e}), restarting it and parsing inline.")
+            self.stop()
+            self.start()
+            return parser.parse_batch(lines)
+        return batch
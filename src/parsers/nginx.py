@@ -1,35 +1,176 @@
 import re
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from src.exceptions import ParserError
 from src.interfaces import LogParser
-from src.models import LogEntry
+from src.models import LogBatch, LogEntry
+
+MONTHS = {
+    "Jan": 1,
+    "Feb": 2,
+    "Mar": 3,
+    "Apr": 4,
+    "May": 5,
+    "Jun": 6,
+    "Jul": 7,
+    "Aug": 8,
+    "Sep": 9,
+    "Oct": 10,
+    "Nov": 11,
+    "Dec": 12,
+}
 
 
 class NginxParser(LogParser):
     # Ex: 127.0.0.1 - - [07/Jan/2026:13:55:36 +0300] "GET / HTTP/1.1" 200 ...
-    LOG_PATTERN = re.compile(
-        r'(?P<ip>\S+) \S+ \S+ \[(?P<time>.*?)\] "(?P<request>.*?)" (?P<status>\d+) (?P<bytes>\d+)'
-    )
+    # Groups: ip, time, request, status, bytes
+    LOG_PATTERN = re.compile(r'(\S+) \S+ \S+ \[(.*?)\] "(.*?)" (\d+) (\d+)')
+    # Same pattern anchored at every line start, for scanning a joined buffer
+    BATCH_PATTERN = re.compile(r'^(\S+) \S+ \S+ \[(.*?)\] "(.*?)" (\d+) (\d+)', re.MULTILINE)
     DATE_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
     SERVICE_NAME = "nginx-access"
 
+    def __init__(self):
+        # (time string, datetime) of the last decoded timestamp; consecutive
+        # lines usually share the same second. Replaced as a whole tuple so
+        # concurrent readers never see a mismatched pair.
+        self._last_time: tuple[str, datetime] = ("", datetime.min)
+        self._timezones: dict[str, timezone] = {}
+
     def parse(self, line: str) -> LogEntry | None:
         try:
             match = self.LOG_PATTERN.match(line)
             if not match:
                 return None
 
-            data = match.groupdict()
-            dt_object = datetime.strptime(data["time"], self.DATE_FORMAT)
+            ip, time_str, request, status, size = match.groups()
 
             return LogEntry(
-                timestamp=dt_object,
-                source_ip=data.get("ip", ""),
-                message=data.get("request", ""),
-                status_code=int(data.get("status", -1)),
+                timestamp=self._parse_time(time_str),
+                source_ip=ip,
+                message=request,
+                status_code=int(status),
                 service_name=self.SERVICE_NAME,
-                metadata={"bytes": int(data.get("bytes", 0))},
+                metadata={"bytes": int(size)},
             )
         except Exception as e:
             raise ParserError(f"Nginx parse error: {str(e)}") from e
+
+    def parse_batch(self, lines: list[str]) -> LogBatch:
+        """
+        Parses many lines with one regex scan over the newline-joined buffer.
+
+        Columns are built in bulk: each distinct timestamp string is decoded
+        once, and status and byte counts are converted with ``map(int, ...)``.
+        Rows whose timestamp cannot be decoded are rejected like unmatched lines.
+        Items with an embedded line break would split apart in the joined buffer,
+        so they go through parse() one by one instead, keeping the input order.
+        """
+        buffer = "\n".join(lines)
+        if "\r" not in buffer and buffer.count("\n") == len(lines) - 1:
+            return self._scan(buffer, len(lines))
+
+        batch = LogBatch()
+        start = 0
+        for i, line in enumerate(lines):
+            if "\n" in line or "\r" in line:
+                if start < i:
+                    batch.extend(self._scan("\n".join(lines[start:i]), i - start))
+                batch.extend(LogParser.parse_batch(self, [line]))
+                start = i + 1
+        if start < len(lines):
+            batch.extend(self._scan("\n".join(lines[start:]), len(lines) - start))
+        return batch
+
+    def _scan(self, buffer: str, line_count: int) -> LogBatch:
+        """Bulk-parses ``line_count`` lines joined by newlines, none containing a line break."""
+        rows = self.BATCH_PATTERN.findall(buffer)
+        if not rows:
+            return LogBatch(rejected=line_count)
+
+        ips, times, requests, statuses, sizes = (list(column) for column in zip(*rows))
+
+        decoded: dict[str, datetime | None] = {}
+        for time_str in set(times):
+            try:
+                decoded[time_str] = self._parse_time(time_str)
+            except ValueError:
+                decoded[time_str] = None
+        timestamps = [decoded[time_str] for time_str in times]
+
+        if None in decoded.values():
+            keep = [i for i, ts in enumerate(timestamps) if ts is not None]
+            ips, requests, statuses, sizes = (
+                [column[i] for i in keep] for column in (ips, requests, statuses, sizes)
+            )
+            timestamps = [timestamps[i] for i in keep]
+
+        count = len(timestamps)
+        return LogBatch(
+            timestamps=timestamps,
+            source_ips=ips,
+            messages=requests,
+            status_codes=list(map(int, statuses)),
+            service_names=[self.SERVICE_NAME] * count,
+            metadata=[{"bytes": size} for size in map(int, sizes)],
+            rejected=max(0, line_count - count),
+        )
+
+    def _parse_time(self, time_str: str) -> datetime:
+        last_str, last_dt = self._last_time
+        if time_str == last_str:
+            return last_dt
+
+        dt_object = self._decode_time(time_str)
+        if dt_object is None:
+            # Anything off the canonical layout gets strptime's exact semantics
+            dt_object = datetime.strptime(time_str, self.DATE_FORMAT)
+
+        self._last_time = (time_str, dt_object)
+        return dt_object
+
+    def _decode_time(self, time_str: str) -> datetime | None:
+        """
+        Decodes the fixed nginx layout ``07/Jan/2026:13:55:36 +0300`` by slicing.
+
+        Returns None when the string deviates from that layout or is out of range.
+        """
+        if (
+            len(time_str) != 26
+            or time_str[2] != "/"
+            or time_str[6] != "/"
+            or time_str[11] != ":"
+            or time_str[14] != ":"
+            or time_str[17] != ":"
+            or time_str[20] != " "
+            or time_str[21] not in "+-"
+        ):
+            return None
+
+        month = MONTHS.get(time_str[3:6])
+        offset = time_str[21:]
+        digits = (
+            time_str[0:2] + time_str[7:11] + time_str[12:14] + time_str[15:17] + time_str[18:20] + offset[1:]
+        )
+        # strptime's %z only accepts offset minutes 00-59
+        if month is None or not (digits.isascii() and digits.isdigit()) or offset[3] > "5":
+            return None
+
+        try:
+            tz = self._timezones.get(offset)
+            if tz is None:
+                minutes = int(offset[1:3]) * 60 + int(offset[3:5])
+                tz = timezone(timedelta(minutes=-minutes if offset[0] == "-" else minutes))
+                self._timezones[offset] = tz
+
+            return datetime(
+                int(time_str[7:11]),
+                month,
+                int(time_str[0:2]),
+                int(time_str[12:14]),
+                int(time_str[15:17]),
+                int(time_str[18:20]),
+                tzinfo=tz,
+            )
+        except ValueError:
+            return None
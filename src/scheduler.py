@@ -0,0 +1,66 @@
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+
+class PeriodicTask:
+    """
+    Runs a blocking function every ``interval`` seconds on a worker thread.
+
+    Started and stopped from the API lifespan like IngestQueue. A failing run
+    is logged and retried at the next interval; ``interval`` of 0 disables the
+    task.
+    """
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        self._stopping: asyncio.Event | None = None
+        self._runs = 0
+        self._failures = 0
+        self._last_result: Any = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Starts the schedule on the running event loop; the first run is one interval away."""
+        if self.running or self.interval <= 0:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the schedule, waiting for a run in progress to finish."""
+        if not self.running:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "runs": self._runs,
+            "failures": self._failures,
+            "last_result": self._last_result,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+                return
+            except TimeoutError:
+                pass
+
+            try:
+                self._last_result = await asyncio.to_thread(self.func)
+                self._runs += 1
+            except Exception as e:
+                print(f"Periodic task {self.name} failed: {e}")
+                self._failures += 1
@@ -0,0 +1,324 @@
+import heapq
+import os
+import struct
+import threading
+import zlib
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import UTC, date, datetime, timedelta
+from itertools import batched
+from typing import Any
+
+from src.serialization import dumps, loads
+
+SEGMENT_MAGIC = b"LSSEG2"
+SEGMENT_SUFFIX = ".seg"
+_FOOTER_LENGTH = struct.Struct("<I")
+MICROS_PER_DAY = 86_400_000_000
+
+# Column order of the row tuples written to and read from segments
+COLUMNS = ("id", "ts", "tz_offset", "source_ip", "message", "status_code", "service_name", "metadata")
+
+# Row tuple = (id, epoch microseconds, UTC offset minutes or None, source_ip, message,
+#              status_code, service_name, metadata dict)
+Row = tuple[int, int, int | None, str, str, int, str, dict[str, Any]]
+
+
+def day_of(ts: int) -> str:
+    """The UTC day ("2026-01-07") of an epoch-microsecond timestamp; segments are named by it."""
+    return (date(1970, 1, 1) + timedelta(days=ts // MICROS_PER_DAY)).isoformat()
+
+
+def day_bounds(day: str) -> tuple[int, int]:
+    """Epoch microseconds of the start of a UTC day and of the next one."""
+    start = int(datetime.fromisoformat(day).replace(tzinfo=UTC).timestamp()) * 1_000_000
+    return start, start + MICROS_PER_DAY
+
+
+class SegmentStore:
+    """
+    Cold tier: one compressed, columnar segment file per day of logs.
+
+    A segment holds the day's rows sorted by ``(ts, id)`` in row groups
+    of ``row_group_size`` rows. Each column of a group is a zlib-compressed
+    JSON array, and a footer records every group's row count, key range and
+    column offsets, and the segment's row and byte counts per service and
+    status code. Scans skip groups by key range from the footer, read the
+    key and filter columns first and only decompress the remaining columns
+    for groups with matches. Segments are replaced atomically, and dropping
+    one is a single unlink.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 65536, compression_level: int = 6):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._footers: dict[str, tuple[tuple[int, int], dict[str, Any]]] = {}
+        self._days = self._list_days()
+
+    def _list_days(self) -> list[str]:
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        return sorted(name[: -len(SEGMENT_SUFFIX)] for name in names if name.endswith(SEGMENT_SUFFIX))
+
+    def _file(self, day: str) -> str:
+        return os.path.join(self.path, f"{day}{SEGMENT_SUFFIX}")
+
+    def days(self) -> list[str]:
+        """Days with a segment, oldest first."""
+        return list(self._days)
+
+    def row_count(self) -> int:
+        total = 0
+        for day in self.days():
+            try:
+                with open(self._file(day), "rb") as f:
+                    total += self._footer(day, f)["rows"]
+            except FileNotFoundError:
+                continue
+        return total
+
+    def totals(self, day: str) -> list[tuple[str | None, int | None, int, int]]:
+        """
+        (service_name, status_code, rows, bytes) of everything in day's segment,
+        from its footer, or counted from the rows for segments written without
+        them. Bytes are summed over int ``metadata.bytes`` values.
+        """
+        with open(self._file(day), "rb") as f:
+            totals = self._footer(day, f).get("totals")
+        if totals is None:
+            counters = _counters()
+            _count(self._read_rows(day), counters)
+            totals = _totals(counters)
+        return [tuple(item) for item in totals]
+
+    def write_day(self, day: str, rows: Iterable[Row]) -> int:
+        """
+        Writes rows (sorted by ts, id) as the segment for day, merged with
+        the rows already in it. Rows present in both are kept once. Returns the
+        number of rows in the segment.
+        """
+        if day in self._days:
+            rows = _unique(heapq.merge(self._read_rows(day), rows, key=_row_key))
+
+        os.makedirs(self.path, exist_ok=True)
+        target = self._file(day)
+        tmp_path = f"{target}.tmp"
+        total = 0
+        counters = _counters()
+        with open(tmp_path, "wb") as f:
+            f.write(SEGMENT_MAGIC)
+            groups = []
+            for chunk in batched(rows, self.row_group_size):
+                groups.append(self._write_group(f, chunk))
+                total += len(chunk)
+                _count(chunk, counters)
+
+            footer = dumps({"day": day, "rows": total, "groups": groups, "totals": _totals(counters)})
+            f.write(footer)
+            f.write(_FOOTER_LENGTH.pack(len(footer)))
+            f.write(SEGMENT_MAGIC)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if not total:
+            os.unlink(tmp_path)
+            return 0
+
+        os.replace(tmp_path, target)
+        _fsync_directory(self.path)
+        with self._lock:
+            self._footers.pop(day, None)
+            if day not in self._days:
+                self._days = sorted([*self._days, day])
+        return total
+
+    def _write_group(self, f, chunk: tuple[Row, ...]) -> dict[str, Any]:
+        group = {
+            "rows": len(chunk),
+            "min": [chunk[0][1], chunk[0][0]],
+            "max": [chunk[-1][1], chunk[-1][0]],
+            "columns": {},
+        }
+        for name, values in zip(COLUMNS, zip(*chunk)):
+            data = zlib.compress(dumps(values), self.compression_level)
+            group["columns"][name] = [f.tell(), len(data)]
+            f.write(data)
+        return group
+
+    def drop_day(self, day: str) -> bool:
+        """Deletes the segment for day; returns False if there was none."""
+        with self._lock:
+            if day not in self._days:
+                return False
+            self._days = [d for d in self._days if d != day]
+            self._footers.pop(day, None)
+        try:
+            os.unlink(self._file(day))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def scan(
+        self,
+        before: tuple[int, int] | None = None,
+        after: tuple[int, int] | None = None,
+        service_name: str | None = None,
+        since: int | None = None,
+        until: int | None = None,
+        status_min: int | None = None,
+        status_max: int | None = None,
+        source_ip: str | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yields matching rows as dicts keyed like COLUMNS, newest first by ``(ts, id)``.
+
+        Only rows with a key strictly between ``after`` and ``before`` are
+        considered; ``since`` (inclusive) and ``until`` (exclusive) are epoch
+        microseconds.
+        """
+        filters = {
+            "before": before,
+            "after": after,
+            "since": since,
+            "until": until,
+            "service_name": service_name,
+            "status_min": status_min,
+            "status_max": status_max,
+            "source_ip": source_ip,
+        }
+
+        for day in reversed(self.days()):
+            start, end = day_bounds(day)
+            if (since is not None and end <= since) or (until is not None and until <= start):
+                continue
+            if before is not None and before[0] < start:
+                continue
+            if after is not None and end <= after[0]:
+                break
+
+            try:
+                f = open(self._file(day), "rb")
+            except FileNotFoundError:
+                continue  # dropped since days() was read
+            with f:
+                for group in reversed(self._footer(day, f)["groups"]):
+                    low, high = tuple(group["min"]), tuple(group["max"])
+                    if (before is not None and low >= before) or (until is not None and low[0] >= until):
+                        continue
+                    if (after is not None and high <= after) or (since is not None and high[0] < since):
+                        break
+                    yield from self._scan_group(f, group, **filters)
+
+    def _scan_group(
+        self, f, group, before, after, since, until, service_name, status_min, status_max, source_ip
+    ) -> Iterator[dict[str, Any]]:
+        ids = self._column(f, group, "id")
+        timestamps = self._column(f, group, "ts")
+        services = self._column(f, group, "service_name")
+        statuses = self._column(f, group, "status_code")
+        ips = self._column(f, group, "source_ip")
+
+        matches = []
+        for i in range(len(ids) - 1, -1, -1):
+            ts = timestamps[i]
+            if (
+                (before is None or (ts, ids[i]) < before)
+                and (after is None or (ts, ids[i]) > after)
+                and (since is None or ts >= since)
+                and (until is None or ts < until)
+                and (not service_name or services[i] == service_name)
+                and (status_min is None or statuses[i] >= status_min)
+                and (status_max is None or statuses[i] <= status_max)
+                and (not source_ip or ips[i] == source_ip)
+            ):
+                matches.append(i)
+        if not matches:
+            return
+
+        offsets = self._column(f, group, "tz_offset")
+        messages = self._column(f, group, "message")
+        metadata = self._column(f, group, "metadata")
+        for i in matches:
+            yield {
+                "id": ids[i],
+                "ts": timestamps[i],
+                "tz_offset": offsets[i],
+                "source_ip": ips[i],
+                "message": messages[i],
+                "status_code": statuses[i],
+                "service_name": services[i],
+                "metadata": metadata[i],
+            }
+
+    def _read_rows(self, day: str) -> Iterator[Row]:
+        """Yields a segment's rows in stored order as row tuples."""
+        with open(self._file(day), "rb") as f:
+            for group in self._footer(day, f)["groups"]:
+                yield from zip(*(self._column(f, group, name) for name in COLUMNS))
+
+    def _column(self, f, group: dict[str, Any], name: str) -> list[Any]:
+        offset, length = group["columns"][name]
+        return loads(zlib.decompress(os.pread(f.fileno(), length, offset)))
+
+    def _footer(self, day: str, f) -> dict[str, Any]:
+        """Reads the footer of an open segment, cached per file identity."""
+        st = os.fstat(f.fileno())
+        identity = (st.st_ino, st.st_size)
+        cached = self._footers.get(day)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+
+        tail_size = _FOOTER_LENGTH.size + len(SEGMENT_MAGIC)
+        tail = os.pread(f.fileno(), tail_size, st.st_size - tail_size)
+        if st.st_size < 2 * len(SEGMENT_MAGIC) or tail[-len(SEGMENT_MAGIC) :] != SEGMENT_MAGIC:
+            raise ValueError(f"not a log segment: {self._file(day)}")
+        (length,) = _FOOTER_LENGTH.unpack(tail[: _FOOTER_LENGTH.size])
+        footer = loads(os.pread(f.fileno(), length, st.st_size - tail_size - length))
+
+        self._footers[day] = (identity, footer)
+        return footer
+
+
+def _row_key(row: Row) -> tuple[int, int]:
+    return row[1], row[0]
+
+
+def _unique(rows: Iterable[Row]) -> Iterator[Row]:
+    """Drops repeated rows from a sorted stream (a day compacted twice after a crash)."""
+    last = None
+    for row in rows:
+        key = _row_key(row)
+        if key != last:
+            last = key
+            yield row
+
+
+def _counters() -> dict[tuple[str | None, int | None], list[int]]:
+    return defaultdict(lambda: [0, 0])
+
+
+def _count(rows: Iterable[Row], counters: dict[tuple[str | None, int | None], list[int]]):
+    """Adds rows to (rows, bytes) counters per (service_name, status_code)."""
+    for row in rows:
+        counter = counters[(row[6], row[5])]
+        size = row[7].get("bytes")
+        counter[0] += 1
+        counter[1] += size if type(size) is int else 0
+
+
+def _totals(counters: dict[tuple[str | None, int | None], list[int]]) -> list[list[Any]]:
+    return [
+        [service_name, status_code, *counter] for (service_name, status_code), counter in counters.items()
+    ]
+
+
+def _fsync_directory(path: str):
+    dir_fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
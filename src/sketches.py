@@ -0,0 +1,487 @@
+import base64
+import heapq
+import math
+import os
+import threading
+from array import array
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from hashlib import blake2b
+from operator import itemgetter
+from typing import Any
+
+from src.exceptions import ConfigurationError
+from src.models import LogBatch, request_path
+from src.serialization import dumps, loads
+
+SNAPSHOT_VERSION = 1
+
+
+def _hash(key: str) -> int:
+    """A 64-bit hash of key, stable across processes (unlike hash())."""
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def _interpolate(x0: float, y0: float, x1: float, y1: float, x: float) -> float:
+    return y1 if x1 <= x0 else y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+def _pack(values: array) -> str:
+    return base64.b64encode(values.tobytes()).decode()
+
+
+def _unpack(typecode: str, data: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+    return values
+
+
+class HyperLogLog:
+    """
+    Distinct-value estimate in ``2 ** precision`` bytes, about
+    ``1.04 / sqrt(2 ** precision)`` relative error (0.8% at the default 14).
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ConfigurationError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, key: str):
+        value = _hash(key)
+        index = value >> (64 - self.precision)
+        rest = value & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, keys: Iterable[str]):
+        for key in keys:
+            self.add(key)
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        histogram = Counter(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(n * 2.0**-rank for rank, n in histogram.items())
+        if estimate <= 2.5 * m and histogram[0]:
+            estimate = m * math.log(m / histogram[0])  # linear counting for small sets
+        return round(estimate)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"precision": self.precision, "registers": base64.b64encode(self.registers).decode()}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(data["precision"])
+        sketch.registers = bytearray(base64.b64decode(data["registers"]))
+        return sketch
+
+
+class CountMinSketch:
+    """Per-key count estimates in ``width * depth`` counters; never under, rarely much over."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        if width < 1 or not 1 <= depth <= 16:
+            raise ConfigurationError("Count-Min width must be at least 1 and depth between 1 and 16")
+        self.width = width
+        self.depth = depth
+        self.table = array("Q", bytes(8 * width * depth))
+
+    def _cells(self, key: str) -> list[int]:
+        """One counter per row, from independent 32-bit slices of one digest."""
+        digest = blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return [
+            row * self.width + int.from_bytes(digest[4 * row : 4 * row + 4], "little") % self.width
+            for row in range(self.depth)
+        ]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Adds count to key and returns its new estimate."""
+        table = self.table
+        estimate = None
+        for cell in self._cells(key):
+            table[cell] += count
+            estimate = table[cell] if estimate is None else min(estimate, table[cell])
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(self.table[cell] for cell in self._cells(key))
+
+    def merge(self, other: "CountMinSketch"):
+        self.table = array("Q", map(sum, zip(self.table, other.table)))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"width": self.width, "depth": self.depth, "table": _pack(self.table)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CountMinSketch":
+        sketch = cls(data["width"], data["depth"])
+        sketch.table = _unpack("Q", data["table"])
+        return sketch
+
+
+class HeavyHitters:
+    """
+    The ``k`` most frequent keys: a Count-Min sketch counts every key, and
+    only the current top ``k`` candidates are kept by name.
+    """
+
+    def __init__(self, k: int = 20, width: int = 2048, depth: int = 4):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.top: dict[str, int] = {}
+
+    def update(self, counts: dict[str, int]):
+        estimates = {key: self.sketch.add(key, count) for key, count in counts.items()}
+        for key in self.top.keys() - estimates.keys():
+            estimates[key] = self.sketch.estimate(key)
+        self.top = dict(heapq.nlargest(self.k, estimates.items(), key=itemgetter(1)))
+
+    def merge(self, other: "HeavyHitters"):
+        self.sketch.merge(other.sketch)
+        candidates = self.top.keys() | other.top.keys()
+        self.top = dict(
+            heapq.nlargest(
+                self.k, ((key, self.sketch.estimate(key)) for key in candidates), key=itemgetter(1)
+            )
+        )
+
+    def most_common(self) -> list[tuple[str, int]]:
+        return sorted(self.top.items(), key=lambda item: (-item[1], item[0]))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"k": self.k, "sketch": self.sketch.to_dict(), "top": self.top}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "HeavyHitters":
+        hitters = cls(data["k"])
+        hitters.sketch = CountMinSketch.from_dict(data["sketch"])
+        hitters.top = dict(data["top"])
+        return hitters
+
+
+class TDigest:
+    """
+    Quantile estimates from a merging t-digest: about ``compression / 2``
+    centroids, smallest near the tails, so p99 stays accurate.
+    """
+
+    def __init__(self, compression: float = 200):
+        if compression < 10:
+            raise ConfigurationError("t-digest compression must be at least 10")
+        self.compression = compression
+        self.centroids: list[tuple[float, float]] = []  # (mean, weight), by mean
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: list[float] = []
+
+    def update(self, values: Iterable[float]):
+        self._buffer.extend(values)
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        other._compress()
+        self._compress(other.centroids)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _compress(self, extra: Iterable[tuple[float, float]] = ()):
+        if self._buffer:
+            self.min = min(self.min, min(self._buffer))
+            self.max = max(self.max, max(self._buffer))
+        points = sorted([*self.centroids, *extra, *((value, 1) for value in self._buffer)])
+        self._buffer.clear()
+        if not points:
+            return
+
+        total = sum(weight for _, weight in points)
+        merged = []
+        mean, weight = points[0]
+        done = 0.0
+        limit = total * self._next_quantile(0.0)
+        for point_mean, point_weight in points[1:]:
+            if done + weight + point_weight <= limit:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                merged.append((mean, weight))
+                done += weight
+                limit = total * self._next_quantile(done / total)
+                mean, weight = point_mean, point_weight
+        merged.append((mean, weight))
+        self.centroids = merged
+        self.count = total
+
+    def _next_quantile(self, q: float) -> float:
+        """The quantile one unit further along the k1 scale, k(q) = d / 2pi * asin(2q - 1)."""
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def quantile(self, q: float) -> float | None:
+        self._compress()
+        if not self.centroids:
+            return None
+        # Interpolate between centroid midpoints, with min and max at the ends
+        target = q * self.count
+        position, value, cumulative = 0.0, self.min, 0.0
+        for mean, weight in self.centroids:
+            center = cumulative + weight / 2
+            if target < center:
+                return _interpolate(position, value, center, mean, target)
+            position, value = center, mean
+            cumulative += weight
+        return _interpolate(position, value, self.count, self.max, target)
+
+    def to_dict(self) -> dict[str, Any]:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "centroids": self.centroids,
+            "min": self.min if self.centroids else None,
+            "max": self.max if self.centroids else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TDigest":
+        digest = cls(data["compression"])
+        digest.centroids = [tuple(centroid) for centroid in data["centroids"]]
+        digest.count = sum(weight for _, weight in digest.centroids)
+        if digest.centroids:
+            digest.min, digest.max = data["min"], data["max"]
+        return digest
+
+
+class WindowSketches:
+    """The sketches of one time window: unique IPs, top IPs and paths, and response bytes."""
+
+    def __init__(
+        self,
+        start: int,
+        precision: int = 14,
+        width: int = 2048,
+        depth: int = 4,
+        top_k: int = 20,
+        compression: float = 200,
+    ):
+        self.start = start
+        self.count = 0
+        self.unique_ips = HyperLogLog(precision)
+        self.top_ips = HeavyHitters(top_k, width, depth)
+        self.top_paths = HeavyHitters(top_k, width, depth)
+        self.bytes = TDigest(compression)
+        self._unique_count: int | None = 0
+
+    def observe(self, source_ips: list[str], messages: list[str], metadata: list[dict[str, Any]]):
+        """Adds one window's share of a batch; each distinct IP and path is hashed once."""
+        self.count += len(source_ips)
+        ips = Counter(source_ips)
+        self.unique_ips.update(ips)
+        self.top_ips.update(ips)
+        paths = Counter(map(request_path, messages))
+        paths.pop(None, None)
+        self.top_paths.update(paths)
+        self.bytes.update(size for size in (item.get("bytes") for item in metadata) if type(size) is int)
+        self._unique_count = None
+
+    def unique_count(self) -> int:
+        if self._unique_count is None:
+            self._unique_count = self.unique_ips.count()
+        return self._unique_count
+
+    def merge(self, other: "WindowSketches"):
+        self.count += other.count
+        self.unique_ips.merge(other.unique_ips)
+        self.top_ips.merge(other.top_ips)
+        self.top_paths.merge(other.top_paths)
+        self.bytes.merge(other.bytes)
+        self._unique_count = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "start": self.start,
+            "count": self.count,
+            "unique_ips": self.unique_ips.to_dict(),
+            "top_ips": self.top_ips.to_dict(),
+            "top_paths": self.top_paths.to_dict(),
+            "bytes": self.bytes.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "WindowSketches":
+        window = cls(data["start"])
+        window.count = data["count"]
+        window.unique_ips = HyperLogLog.from_dict(data["unique_ips"])
+        window.top_ips = HeavyHitters.from_dict(data["top_ips"])
+        window.top_paths = HeavyHitters.from_dict(data["top_paths"])
+        window.bytes = TDigest.from_dict(data["bytes"])
+        window._unique_count = None
+        return window
+
+
+def _epoch_seconds(ts: datetime) -> float:
+    return (ts if ts.tzinfo is not None else ts.replace(tzinfo=UTC)).timestamp()
+
+
+def _iso(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, UTC).isoformat()
+
+
+class StreamingSketches:
+    """
+    Approximate traffic analytics maintained in memory as logs are ingested.
+
+    Entries are grouped by their timestamp into tumbling windows of
+    ``window_seconds``; the newest ``windows`` windows are kept and entries
+    older than all of them are ignored. Each window holds fixed-size sketches
+    (see WindowSketches), so memory depends on the settings, not on traffic,
+    and a summary merges at most ``windows`` windows. Naive timestamps are
+    taken as UTC, as in storage.
+
+    With ``snapshot_path`` set, save() writes the windows to that file and
+    load() restores them; a snapshot taken with other sketch sizes is ignored.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 3600,
+        windows: int = 24,
+        precision: int = 14,
+        width: int = 2048,
+        depth: int = 4,
+        top_k: int = 20,
+        compression: float = 200,
+        snapshot_path: str | None = None,
+    ):
+        if window_seconds < 1 or windows < 1 or top_k < 1:
+            raise ConfigurationError("sketches need window_seconds, windows and top_k >= 1")
+        self.window_seconds = window_seconds
+        self.windows = windows
+        self.snapshot_path = snapshot_path
+        self._sizes = {
+            "precision": precision,
+            "width": width,
+            "depth": depth,
+            "top_k": top_k,
+            "compression": compression,
+        }
+        WindowSketches(0, **self._sizes)  # validates the sizes up front
+        self._windows: dict[int, WindowSketches] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, batch: LogBatch):
+        """Adds a batch of accepted entries to the sketches of their windows."""
+        if not batch:
+            return
+
+        size = self.window_seconds
+        starts = {ts: int(_epoch_seconds(ts)) // size * size for ts in set(batch.timestamps)}
+        if len(set(starts.values())) == 1:
+            parts = {next(iter(starts.values())): (batch.source_ips, batch.messages, batch.metadata)}
+        else:
+            indexes: dict[int, list[int]] = defaultdict(list)
+            for i, ts in enumerate(batch.timestamps):
+                indexes[starts[ts]].append(i)
+            parts = {
+                start: (
+                    [batch.source_ips[i] for i in rows],
+                    [batch.messages[i] for i in rows],
+                    [batch.metadata[i] for i in rows],
+                )
+                for start, rows in indexes.items()
+            }
+
+        with self._lock:
+            for start in sorted(parts):
+                window = self._windows.get(start)
+                if window is None:
+                    if len(self._windows) >= self.windows and start < min(self._windows):
+                        continue  # older than every window kept
+                    window = self._windows[start] = WindowSketches(start, **self._sizes)
+                    while len(self._windows) > self.windows:
+                        del self._windows[min(self._windows)]
+                window.observe(*parts[start])
+
+    def summary(self, windows: int | None = None, quantiles: tuple[float, ...] = (0.5, 0.9, 0.99)) -> dict:
+        """
+        Merges the newest ``windows`` windows (all kept by default) into
+        estimates of unique IPs, top IPs and paths and response-byte quantiles,
+        plus a per-window count series.
+        """
+        with self._lock:
+            selected = [self._windows[start] for start in sorted(self._windows)]
+            if windows is not None:
+                selected = selected[-windows:] if windows > 0 else []
+            merged = WindowSketches(0, **self._sizes)
+            for window in selected:
+                merged.merge(window)
+            series = [
+                {"start": _iso(window.start), "count": window.count, "unique_ips": window.unique_count()}
+                for window in selected
+            ]
+
+        digest = merged.bytes
+        return {
+            "window_seconds": self.window_seconds,
+            "since": _iso(selected[0].start) if selected else None,
+            "until": _iso(selected[-1].start + self.window_seconds) if selected else None,
+            "count": merged.count,
+            "unique_ips": merged.unique_count(),
+            "top_ips": [{"key": key, "estimate": n} for key, n in merged.top_ips.most_common()],
+            "top_paths": [{"key": key, "estimate": n} for key, n in merged.top_paths.most_common()],
+            "bytes": {
+                "count": int(digest.count),
+                "min": digest.min if digest.centroids else None,
+                "max": digest.max if digest.centroids else None,
+                **{f"p{round(q * 100, 1):g}": digest.quantile(q) for q in quantiles},
+            },
+            "windows": series,
+        }
+
+    def save(self) -> bool:
+        """Writes the windows to ``snapshot_path`` atomically; False without a path."""
+        if not self.snapshot_path:
+            return False
+        with self._lock:
+            windows = [self._windows[start].to_dict() for start in sorted(self._windows)]
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "window_seconds": self.window_seconds,
+            "sizes": self._sizes,
+            "windows": windows,
+        }
+
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(dumps(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        return True
+
+    def load(self) -> int:
+        """Restores the windows from ``snapshot_path``; returns how many were loaded."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return 0
+        with open(self.snapshot_path, "rb") as f:
+            data = loads(f.read())
+        if (
+            data.get("version") != SNAPSHOT_VERSION
+            or data.get("window_seconds") != self.window_seconds
+            or data.get("sizes") != self._sizes
+        ):
+            print(f"Ignoring sketch snapshot {self.snapshot_path}: taken with other settings")
+            return 0
+
+        windows = [WindowSketches.from_dict(window) for window in data["windows"]][-self.windows :]
+        with self._lock:
+            self._windows = {window.start: window for window in windows}
+        return len(windows)
@@ -1,115 +1,1171 @@
+import base64
+import heapq
+import ipaddress
 import json
+import queue
+import re
 import sqlite3
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any
 
-from src.models import LogEntry
+from src.exceptions import ConfigurationError, QueryTimeoutError
+from src.models import LogBatch, LogEntry, request_path
+from src.segments import SegmentStore, day_bounds, day_of
+from src.serialization import dumps_str, loads
+
+JOURNAL_MODES = {"delete", "truncate", "persist", "memory", "wal", "off"}
+SYNCHRONOUS_MODES = {"off", "normal", "full", "extra"}
+
+STATUS_CLASS_SQL = (
+    "CASE WHEN status_code BETWEEN 100 AND 599 THEN (status_code / 100) || 'xx' ELSE 'other' END"
+)
+
+# Byte total of legacy JSON metadata; like _split_metadata, only integer sizes count
+ROLLUP_BYTES_SQL = (
+    "COALESCE(SUM(CASE WHEN json_type(metadata, '$.bytes') = 'integer' "
+    "THEN json_extract(metadata, '$.bytes') ELSE 0 END), 0)"
+)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _status_class(status_code: int) -> str:
+    """Buckets a status code into "2xx"-style classes, matching STATUS_CLASS_SQL."""
+    return f"{status_code // 100}xx" if 100 <= status_code <= 599 else "other"
+
+
+def _to_micros(ts: datetime) -> int:
+    """Epoch microseconds of a datetime; naive datetimes are taken as UTC."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=UTC)
+    return (ts - _EPOCH) // _MICROSECOND
+
+
+def _offset_minutes(ts: datetime) -> int | None:
+    """UTC offset of a datetime in minutes, None for a naive one."""
+    offset = ts.utcoffset()
+    return None if offset is None else offset // timedelta(minutes=1)
+
+
+@lru_cache(maxsize=256)
+def _timezone(offset_minutes: int) -> timezone:
+    return UTC if offset_minutes == 0 else timezone(timedelta(minutes=offset_minutes))
+
+
+def _format_timestamp(micros: int, offset_minutes: int | None) -> str:
+    """Rebuilds the ISO-8601 text of a stored timestamp in its original UTC offset."""
+    moment = _EPOCH + timedelta(microseconds=micros)
+    if offset_minutes is None:
+        return moment.replace(tzinfo=None).isoformat()
+    return moment.astimezone(_timezone(offset_minutes)).isoformat()
+
+
+def _pack_ip(source_ip: str | None) -> bytes | str | None:
+    """Packs an IPv4/IPv6 address into 4/16 bytes; anything else is stored as given."""
+    try:
+        return ipaddress.ip_address(source_ip).packed
+    except ValueError:
+        return source_ip
+
+
+def _unpack_ip(value: bytes | str | None) -> str | None:
+    return str(ipaddress.ip_address(value)) if isinstance(value, bytes) else value
+
+
+def _split_metadata(metadata: dict[str, Any]) -> tuple[int | None, str | None]:
+    """Splits metadata into the promoted ``bytes`` column and JSON for the rest (None if empty)."""
+    size = metadata.get("bytes")
+    if type(size) is not int:
+        return None, dumps_str(metadata) if metadata else None
+    if len(metadata) == 1:
+        return size, None
+    return size, dumps_str({key: value for key, value in metadata.items() if key != "bytes"})
+
+
+def _join_metadata(size: int | None, rest: str | None) -> dict[str, Any]:
+    metadata = loads(rest) if rest else {}
+    return metadata if size is None else {"bytes": size, **metadata}
+
+
+@contextmanager
+def _time_limit(conn: sqlite3.Connection, deadline: float | None) -> Iterator[None]:
+    """Interrupts statements on conn still running at ``deadline`` (time.monotonic) with QueryTimeoutError."""
+    if deadline is None:
+        yield
+        return
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, 10_000)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if time.monotonic() > deadline:
+            raise QueryTimeoutError("query exceeded its time limit") from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def _compact_logs_table(conn: sqlite3.Connection):
+    """
+    Migration 4: rewrites ``logs`` into the compact layout.
+
+    Timestamps become epoch microseconds plus the original UTC offset, IPs
+    packed bytes, service names ids into ``services``, and ``bytes`` moves
+    out of the metadata JSON into its own column. Row ids are kept, and so is
+    the AUTOINCREMENT high-water mark, so ids are never reused.
+    """
+    conn.execute("CREATE TABLE services (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    conn.execute(
+        """
+        CREATE TABLE logs_compact (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts INTEGER NOT NULL,
+            tz_offset INTEGER,
+            source_ip BLOB,
+            message TEXT,
+            status_code INTEGER,
+            service_id INTEGER REFERENCES services (id),
+            bytes INTEGER,
+            metadata TEXT
+        )
+        """
+    )
+
+    service_ids: dict[str, int] = {}
+    rows = conn.execute(
+        "SELECT id, timestamp, source_ip, message, status_code, service_name, metadata FROM logs ORDER BY id"
+    )
+    while chunk := rows.fetchmany(10_000):
+        converted = []
+        for row_id, timestamp, source_ip, message, status_code, service_name, metadata in chunk:
+            try:
+                ts = datetime.fromisoformat(timestamp)
+                size, rest = _split_metadata(loads(metadata) if metadata else {})
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"cannot migrate log row {row_id}: {e}") from e
+            if service_name is not None and service_name not in service_ids:
+                cursor = conn.execute("INSERT INTO services (name) VALUES (?)", (service_name,))
+                service_ids[service_name] = cursor.lastrowid
+            converted.append(
+                (
+                    row_id,
+                    _to_micros(ts),
+                    _offset_minutes(ts),
+                    _pack_ip(source_ip),
+                    message,
+                    status_code,
+                    service_ids.get(service_name),
+                    size,
+                    rest,
+                )
+            )
+        conn.executemany(
+            """
+            INSERT INTO logs_compact
+                (id, ts, tz_offset, source_ip, message, status_code, service_id, bytes, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            converted,
+        )
+
+    sequence = conn.execute(
+        "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name IN ('logs', 'logs_compact')"
+    ).fetchone()[0]
+    conn.execute("DROP TABLE logs")
+    conn.execute("ALTER TABLE logs_compact RENAME TO logs")
+    conn.execute("DELETE FROM sqlite_sequence WHERE name IN ('logs', 'logs_compact')")
+    conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('logs', ?)", (sequence,))
+
+
+# Schema migrations, applied in order. PRAGMA user_version stores how many have
+# run, so databases created by older versions are upgraded on open. A step is
+# either an SQL statement or a callable taking the connection.
+MIGRATIONS = (
+    # 1: base table
+    (
+        """
+        CREATE TABLE IF NOT EXISTS logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            source_ip TEXT,
+            message TEXT,
+            status_code INTEGER,
+            service_name TEXT,
+            metadata TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ),
+    # 2: indexes for time-ordered reads and the /logs filters
+    (
+        "CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_logs_service_timestamp ON logs (service_name, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_logs_status_code ON logs (status_code)",
+    ),
+    # 3: stats rollups maintained by the write path, backfilled from existing rows
+    (
+        """
+        CREATE TABLE IF NOT EXISTS stats_totals (
+            service_name TEXT NOT NULL,
+            status_class TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            PRIMARY KEY (service_name, status_class)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS stats_minute (
+            minute INTEGER NOT NULL,
+            service_name TEXT NOT NULL,
+            status_class TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            PRIMARY KEY (minute, service_name, status_class)
+        ) WITHOUT ROWID
+        """,
+        f"""
+        INSERT INTO stats_totals (service_name, status_class, count, bytes)
+        SELECT COALESCE(service_name, 'unknown'), {STATUS_CLASS_SQL}, COUNT(*),
+               {ROLLUP_BYTES_SQL}
+        FROM logs GROUP BY 1, 2
+        """,
+        f"""
+        INSERT INTO stats_minute (minute, service_name, status_class, count, bytes)
+        SELECT CAST(strftime('%s', timestamp) AS INTEGER) / 60, COALESCE(service_name, 'unknown'),
+               {STATUS_CLASS_SQL}, COUNT(*), {ROLLUP_BYTES_SQL}
+        FROM logs WHERE strftime('%s', timestamp) IS NOT NULL GROUP BY 1, 2, 3
+        """,
+    ),
+    # 4: compact row encoding (see _compact_logs_table) with indexes on the new columns
+    (
+        _compact_logs_table,
+        "CREATE INDEX idx_logs_ts ON logs (ts)",
+        "CREATE INDEX idx_logs_service_ts ON logs (service_id, ts)",
+        "CREATE INDEX idx_logs_status_code ON logs (status_code)",
+    ),
+    # 5: full-text index over messages, built from existing rows; the write path keeps it in sync
+    (
+        "CREATE VIRTUAL TABLE logs_fts USING fts5 (message, content = 'logs', content_rowid = 'id')",
+        "INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')",
+    ),
+)
+
+
+# Row layout shared by the hot query, compaction and the cold segments (segments.COLUMNS)
+SELECT_LOGS = """
+    SELECT logs.id, ts, tz_offset, source_ip, message, status_code, services.name, bytes, metadata
+    FROM logs LEFT JOIN services ON services.id = logs.service_id
+"""
+
+
+# /aggregate metrics and dimensions as SQL over the logs table
+AGGREGATE_METRICS = {"count": "COUNT(*)", "bytes": "COALESCE(SUM(bytes), 0)"}
+AGGREGATE_DIMENSIONS = {
+    "status_class": STATUS_CLASS_SQL,
+    "status_code": "status_code",
+    "service": "service_id",
+    "source_ip": "source_ip",
+    "path": "request_path(message)",
+}
+# The same over stats_minute, for the dimensions the rollups keep
+_ROLLUP_METRICS = {"count": "SUM(count)", "bytes": "SUM(bytes)"}
+_ROLLUP_DIMENSIONS = {"status_class": "status_class", "service": "service_name"}
+# The same over cold segment rows
+_SEGMENT_DIMENSIONS = {
+    "status_class": lambda row: _status_class(row["status_code"]),
+    "status_code": lambda row: row["status_code"],
+    "service": lambda row: row["service_name"],
+    "source_ip": lambda row: row["source_ip"],
+    "path": lambda row: request_path(row["message"]),
+}
+
+# Rows of the timestamp index a time-ordered search of a common term looks at per step
+SEARCH_WINDOW_ROWS = 20_000
+
+# Same row layout for full-text matches; the MATCH parameter comes first
+SEARCH_LOGS = """
+    SELECT logs.id, ts, tz_offset, source_ip, logs.message, status_code, services.name, bytes, metadata
+    FROM logs_fts JOIN logs ON logs.id = logs_fts.rowid LEFT JOIN services ON services.id = logs.service_id
+    WHERE logs_fts MATCH ?
+"""
+
+_SEARCH_TERM = re.compile(r'"([^"]*)"(\*?)|(\S+)')
+
+
+def _fts_query(text: str) -> str:
+    """
+    Translates a search string into an FTS5 query.
+
+    Whitespace-separated terms must all match; "double quoted" text is a
+    phrase, and a trailing ``*`` matches a term (or phrase) as a prefix. Every
+    term is passed to FTS5 quoted, so text like ``/api/v1/users`` matches its
+    tokens as a phrase instead of being read as query syntax.
+    """
+    terms = []
+    for phrase, phrase_prefix, word in _SEARCH_TERM.findall(text):
+        prefix = phrase_prefix
+        if word:
+            phrase, prefix = (word[:-1], "*") if word.endswith("*") else (word, "")
+        if phrase.strip():
+            terms.append('"{}"{}'.format(phrase.replace('"', '""'), prefix))
+    if not terms:
+        raise ValueError(f"empty search query: {text!r}")
+    return " AND ".join(terms)
+
+
+def _decode_row(row: tuple) -> dict[str, Any]:
+    """Turns a SELECT_LOGS row into the tier-neutral row dict (keys as in segments.COLUMNS)."""
+    row_id, ts, tz_offset, source_ip, message, status_code, service_name, size, rest = row
+    return {
+        "id": row_id,
+        "ts": ts,
+        "tz_offset": tz_offset,
+        "source_ip": _unpack_ip(source_ip),
+        "message": message,
+        "status_code": status_code,
+        "service_name": service_name,
+        "metadata": _join_metadata(size, rest),
+    }
+
+
+def _to_log(row: dict[str, Any]) -> dict[str, Any]:
+    """Shapes a row dict like LogEntry.to_json for the API."""
+    return {
+        "timestamp": _format_timestamp(row["ts"], row["tz_offset"]),
+        "source_ip": row["source_ip"],
+        "message": row["message"],
+        "status_code": row["status_code"],
+        "service_name": row["service_name"],
+        "metadata": row["metadata"],
+    }
+
+
+def _encode_cursor(ts: int, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([ts, row_id]).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(ts, int) or not isinstance(row_id, int):
+            raise TypeError("unexpected cursor fields")
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+    return ts, row_id
 
 
 class LogStorage:
-    def __init__(self, db_path: str = "logs.db"):
+    """
+    SQLite-backed log store.
+
+    Writes go through one long-lived writer connection guarded by a lock;
+    reads borrow one of up to ``reader_pool_size`` read-only connections, so
+    in WAL mode readers never block the writer. Connections are opened lazily
+    and ``close()`` releases all of them.
+
+    With ``hot_days`` set, the ``logs`` table only keeps recent days: older
+    days are compacted into per-day segment files under ``cold_path`` (see
+    SegmentStore) that queries read transparently, and ``retention_days``
+    expires data by deleting whole day segments.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "logs.db",
+        journal_mode: str = "wal",
+        synchronous: str = "normal",
+        cache_size: int = -65536,
+        mmap_size: int = 268435456,
+        reader_pool_size: int = 4,
+        cold_path: str | None = None,
+        hot_days: int | None = None,
+        retention_days: int | None = None,
+        segment_row_group: int = 65536,
+    ):
+        journal_mode, synchronous = journal_mode.lower(), synchronous.lower()
+        if journal_mode not in JOURNAL_MODES:
+            raise ConfigurationError(f"unsupported journal_mode: {journal_mode}")
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ConfigurationError(f"unsupported synchronous mode: {synchronous}")
+        if hot_days is not None and hot_days < 1:
+            raise ConfigurationError("hot_days must be at least 1")
+        if retention_days is not None and (hot_days is None or retention_days < hot_days):
+            # Retention only ever drops cold segments, never deletes from the logs table
+            raise ConfigurationError("retention_days requires hot_days, and must not be below it")
+
         self.db_path = db_path
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_size = int(cache_size)
+        self.mmap_size = int(mmap_size)
+        self.reader_pool_size = max(1, int(reader_pool_size))
+        self.hot_days = hot_days
+        self.retention_days = retention_days
+
+        self._write_lock = threading.RLock()
+        self._writer: sqlite3.Connection | None = None
+        self._pool_lock = threading.Lock()
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._reader_count = 0
+        self._generation = 0
+        self._service_cache: dict[str, int] = {}  # writer-side services name -> id
+
+        if cold_path is None and hot_days is not None:
+            if self._in_memory:
+                raise ConfigurationError("hot_days needs a cold_path for an in-memory database")
+            cold_path = f"{Path(db_path).with_suffix('')}_segments"
+        self._segments = SegmentStore(cold_path, segment_row_group) if cold_path else None
+
         self._init_db()
 
-    def _get_connection(self):
-        return sqlite3.connect(self.db_path)
+    @property
+    def _in_memory(self) -> bool:
+        return self.db_path == ":memory:" or self.db_path.startswith("file::memory:")
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        if read_only:
+            uri = f"{Path(self.db_path).absolute().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA cache_size={self.cache_size}")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.create_function("request_path", 1, request_path, deterministic=True)
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Yields the writer connection inside a transaction."""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            with self._writer:
+                yield self._writer
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """Borrows a read-only connection from the pool."""
+        if self._in_memory:
+            # A private in-memory database is only visible to the writer connection
+            with self._write() as conn:
+                conn.row_factory = sqlite3.Row
+                yield conn
+            return
+
+        conn = self._acquire_reader()
+        generation = self._generation
+        try:
+            yield conn
+        finally:
+            if generation == self._generation:
+                self._readers.put(conn)
+            else:
+                conn.close()
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            if self._reader_count < self.reader_pool_size:
+                self._reader_count += 1
+                return self._connect(read_only=True)
+
+        return self._readers.get()
+
+    def close(self):
+        """Closes the writer and every pooled reader connection."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        with self._pool_lock:
+            self._generation += 1
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._reader_count = 0
 
     def _init_db(self):
-        with self._get_connection() as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
-                    source_ip TEXT,
-                    message TEXT,
-                    status_code INTEGER,
-                    service_name TEXT,
-                    metadata TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.commit()
+        """Brings the schema up to date, one migration per transaction."""
+        with self._write() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+        for number, steps in enumerate(MIGRATIONS[version:], start=version + 1):
+            with self._write() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {number}")
 
     def save_log(self, entry: LogEntry):
-        with self._get_connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO logs (timestamp, source_ip, message, status_code, service_name, metadata)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    entry.timestamp.isoformat(),
-                    entry.source_ip,
-                    entry.message,
-                    entry.status_code,
-                    entry.service_name,
-                    json.dumps(entry.metadata),
-                ),
-            )
-            conn.commit()
+        self.save_columns(LogBatch.from_entries([entry]))
 
     def save_batch(self, entries: list[LogEntry]):
-        with self._get_connection() as conn:
+        self.save_columns(LogBatch.from_entries(entries))
+
+    def save_columns(self, batch: LogBatch):
+        """Inserts a columnar batch and updates the rollups in one transaction."""
+        if not batch:
+            return
+
+        # Parsers hand out shared datetime objects per second, so convert each once
+        distinct = set(batch.timestamps)
+        micros = {ts: _to_micros(ts) for ts in distinct}
+        offsets = {ts: _offset_minutes(ts) for ts in distinct}
+        packed_ips = {ip: _pack_ip(ip) for ip in set(batch.source_ips)}
+        sizes, rests = zip(*map(_split_metadata, batch.metadata))
+
+        with self._write() as conn:
+            try:
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM logs").fetchone()[0]
+                service_ids = self._service_ids(conn, set(batch.service_names))
+                conn.executemany(
+                    """
+                    INSERT INTO logs
+                        (ts, tz_offset, source_ip, message, status_code, service_id, bytes, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    zip(
+                        [micros[ts] for ts in batch.timestamps],
+                        [offsets[ts] for ts in batch.timestamps],
+                        [packed_ips[ip] for ip in batch.source_ips],
+                        batch.messages,
+                        batch.status_codes,
+                        [service_ids[name] for name in batch.service_names],
+                        sizes,
+                        rests,
+                    ),
+                )
+                # One bulk statement indexes the whole batch; per-row triggers are several times slower
+                conn.execute(
+                    "INSERT INTO logs_fts (rowid, message) SELECT id, message FROM logs WHERE id > ?",
+                    (last_id,),
+                )
+                self._update_rollups(conn, batch, micros)
+            except Exception:
+                # Ids handed out inside a rolled back transaction may be reused
+                self._service_cache.clear()
+                raise
+
+    def _service_ids(self, conn: sqlite3.Connection, names: set[str]) -> dict[str, int]:
+        """Maps service names to their ``services`` ids, adding new names; call with the write lock."""
+        missing = [name for name in names if name not in self._service_cache]
+        if missing:
             conn.executemany(
-                """
-                INSERT INTO logs (timestamp, source_ip, message, status_code, service_name, metadata)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                [
-                    (
-                        e.timestamp.isoformat(),
-                        e.source_ip,
-                        e.message,
-                        e.status_code,
-                        e.service_name,
-                        json.dumps(e.metadata),
-                    )
-                    for e in entries
-                ],
+                "INSERT OR IGNORE INTO services (name) VALUES (?)", [(name,) for name in missing]
+            )
+            placeholders = ", ".join("?" * len(missing))
+            self._service_cache.update(
+                conn.execute(f"SELECT name, id FROM services WHERE name IN ({placeholders})", missing)
             )
-            conn.commit()
+        return self._service_cache
+
+    @staticmethod
+    def _update_rollups(conn: sqlite3.Connection, batch: LogBatch, micros: dict[datetime, int]):
+        """Folds a batch into the stats counter tables inside the caller's transaction."""
+        minute_of = {ts: value // 60_000_000 for ts, value in micros.items()}
+        minutes: dict[tuple[int, str, str], list[int]] = defaultdict(lambda: [0, 0])
+
+        for ts, service_name, status_code, metadata in zip(
+            batch.timestamps, batch.service_names, batch.status_codes, batch.metadata
+        ):
+            size = metadata.get("bytes", 0)
+            counters = minutes[(minute_of[ts], service_name, _status_class(status_code))]
+            counters[0] += 1
+            counters[1] += size if type(size) is int else 0  # as stored by _split_metadata
+
+        totals: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0, 0])
+        for (_, service_name, status_class), (count, size) in minutes.items():
+            counters = totals[(service_name, status_class)]
+            counters[0] += count
+            counters[1] += size
+
+        conn.executemany(
+            """
+            INSERT INTO stats_totals (service_name, status_class, count, bytes) VALUES (?, ?, ?, ?)
+            ON CONFLICT (service_name, status_class)
+            DO UPDATE SET count = count + excluded.count, bytes = bytes + excluded.bytes
+            """,
+            [(*key, count, size) for key, (count, size) in totals.items()],
+        )
+        conn.executemany(
+            """
+            INSERT INTO stats_minute (minute, service_name, status_class, count, bytes) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (minute, service_name, status_class)
+            DO UPDATE SET count = count + excluded.count, bytes = bytes + excluded.bytes
+            """,
+            [(*key, count, size) for key, (count, size) in minutes.items()],
+        )
 
-    def get_logs(self, limit: int = 100, offset: int = 0, service_name: str | None = None) -> list[dict]:
-        query = "SELECT timestamp, source_ip, message, status_code, service_name, metadata FROM logs"
-        params = []
+    @staticmethod
+    def _build_filters(
+        service_name: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        status_min: int | None = None,
+        status_max: int | None = None,
+        source_ip: str | None = None,
+    ) -> tuple[list[str], list]:
+        """Returns the WHERE conditions for the given filters and their parameters."""
+        clauses, params = [], []
         if service_name:
-            query += " WHERE service_name = ?"
+            clauses.append("service_id = (SELECT id FROM services WHERE name = ?)")
             params.append(service_name)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(_to_micros(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(_to_micros(until))
+        if status_min is not None:
+            clauses.append("status_code >= ?")
+            params.append(status_min)
+        if status_max is not None:
+            clauses.append("status_code <= ?")
+            params.append(status_max)
+        if source_ip:
+            clauses.append("source_ip = ?")
+            params.append(_pack_ip(source_ip))
 
-        query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        return clauses, params
 
-        with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(query, params)
-            rows = cursor.fetchall()
+    def get_logs(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        service_name: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        status_min: int | None = None,
+        status_max: int | None = None,
+        source_ip: str | None = None,
+    ) -> list[dict]:
+        """
+        Returns the newest logs matching the filters.
 
-            logs = []
-            for row in rows:
-                log = dict(row)
-                log["metadata"] = json.loads(log["metadata"])
-                logs.append(log)
-            return logs
+        ``since`` is inclusive and ``until`` exclusive; naive bounds are taken
+        as UTC, like naive log timestamps.
+        """
+        logs, _ = self.get_logs_page(
+            limit=limit,
+            offset=offset,
+            service_name=service_name,
+            since=since,
+            until=until,
+            status_min=status_min,
+            status_max=status_max,
+            source_ip=source_ip,
+        )
+        return logs
 
-    def get_stats(self) -> dict:
-        with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
+    def get_logs_page(
+        self,
+        limit: int = 100,
+        cursor: str | None = None,
+        offset: int = 0,
+        service_name: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        status_min: int | None = None,
+        status_max: int | None = None,
+        source_ip: str | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """
+        Returns one page of logs, newest first, and the cursor for the next page.
+
+        Pages are ordered by ``(timestamp, id)``. Passing the returned cursor back
+        resumes strictly after the last row via the timestamp index, so every page
+        costs the same however deep it is. ``next_cursor`` is None once fewer than
+        ``limit`` rows come back. Raises ValueError for a malformed cursor.
+        """
+        clauses, params = self._build_filters(service_name, since, until, status_min, status_max, source_ip)
+        before = _decode_cursor(cursor) if cursor else None
+        if before:
+            clauses.append("(ts, logs.id) < (?, ?)")
+            params.extend(before)
+
+        # With cold segments, take the first offset + limit rows of each tier and merge them
+        cold = bool(self._segments and self._segments.days())
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"{SELECT_LOGS}{where} ORDER BY ts DESC, logs.id DESC LIMIT ? OFFSET ?"
+        params.extend([offset + limit, 0] if cold else [limit, offset])
+
+        with self._read() as conn:
+            rows = [_decode_row(row) for row in conn.execute(query, params).fetchall()]
+
+        if cold:
+            # Cold rows only matter if they sort above the last hot row we already have
+            after = (rows[-1]["ts"], rows[-1]["id"]) if len(rows) == offset + limit else None
+            cold_rows = self._segments.scan(
+                before=before,
+                after=after,
+                service_name=service_name,
+                since=_to_micros(since) if since is not None else None,
+                until=_to_micros(until) if until is not None else None,
+                status_min=status_min,
+                status_max=status_max,
+                source_ip=source_ip,
+            )
+            merged = heapq.merge(rows, cold_rows, key=lambda row: (row["ts"], row["id"]), reverse=True)
+            rows = list(islice(merged, offset, offset + limit))
+
+        next_cursor = None
+        if rows and len(rows) == limit:
+            next_cursor = _encode_cursor(rows[-1]["ts"], rows[-1]["id"])
+        return [_to_log(row) for row in rows], next_cursor
 
-            # Total logs
-            total = conn.execute("SELECT COUNT(*) as count FROM logs").fetchone()["count"]
+    def search_logs(
+        self,
+        query: str,
+        limit: int = 100,
+        cursor: str | None = None,
+        offset: int = 0,
+        order: str = "time",
+        service_name: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        status_min: int | None = None,
+        status_max: int | None = None,
+        source_ip: str | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """
+        Returns one page of logs whose message matches ``query`` (see _fts_query)
+        and the cursor for the next page.
 
-            # Logs per service
-            service_counts = conn.execute(
-                "SELECT service_name, COUNT(*) as count FROM logs GROUP BY service_name"
+        ``order="time"`` returns the newest matches first and pages by cursor
+        like get_logs_page; ``order="rank"`` returns the best matches first
+        (BM25) and pages by offset only; ranking scores every match, so it suits
+        selective queries. The other filters are as in get_logs.
+        Only the hot tier is indexed: days already compacted into segments are
+        not searched. Raises ValueError for an empty query, an unknown order or
+        a malformed cursor.
+        """
+        if order not in ("time", "rank"):
+            raise ValueError(f"unknown search order: {order!r}")
+        if cursor and order != "time":
+            raise ValueError("cursors are only supported for time-ordered search")
+
+        match = _fts_query(query)
+        clauses, params = self._build_filters(service_name, since, until, status_min, status_max, source_ip)
+        before = _decode_cursor(cursor) if cursor else None
+        if before:
+            clauses.append("(ts, logs.id) < (?, ?)")
+            params.extend(before)
+        where = "".join(f" AND {clause}" for clause in clauses)
+
+        with self._read() as conn:
+            if order == "rank":
+                sql = f"{SEARCH_LOGS}{where} ORDER BY logs_fts.rank, logs.id DESC LIMIT ? OFFSET ?"
+                rows = conn.execute(sql, [match, *params, limit, offset]).fetchall()
+            else:
+                upper = before[0] + 1 if before else None
+                if until is not None:
+                    upper = min(upper or _to_micros(until), _to_micros(until))
+                floor = _to_micros(since) if since is not None else None
+                rows = self._search_by_time(conn, match, where, params, offset + limit, upper, floor)[offset:]
+        rows = [_decode_row(row) for row in rows]
+
+        next_cursor = None
+        if order == "time" and rows and len(rows) == limit:
+            next_cursor = _encode_cursor(rows[-1]["ts"], rows[-1]["id"])
+        return [_to_log(row) for row in rows], next_cursor
+
+    def _search_by_time(
+        self,
+        conn: sqlite3.Connection,
+        match: str,
+        where: str,
+        params: list,
+        count: int,
+        upper: int | None,
+        floor: int | None,
+    ) -> list[tuple]:
+        """
+        Returns the newest ``count`` rows matching a full-text query and filters.
+
+        A query with few matches is answered from the index alone, sorting the
+        matches. For a common one that would mean sorting most of the table,
+        so the timestamp index is walked back instead, ``SEARCH_WINDOW_ROWS``
+        rows at a time, and each window only reads the matches within its range
+        of row ids. ``upper`` (exclusive) and ``floor`` bound the walk in epoch
+        microseconds.
+        """
+        ids = conn.execute(
+            "SELECT json_group_array(rowid), COUNT(*) FROM "
+            "(SELECT rowid FROM logs_fts WHERE logs_fts MATCH ? LIMIT ?)",
+            (match, SEARCH_WINDOW_ROWS),
+        ).fetchone()
+        if ids[1] < SEARCH_WINDOW_ROWS:
+            sql = f"{SELECT_LOGS} WHERE logs.id IN (SELECT value FROM json_each(?)){where}"
+            return conn.execute(
+                f"{sql} ORDER BY ts DESC, logs.id DESC LIMIT ?", [ids[0], *params, count]
             ).fetchall()
 
-            # Recent volume (last 24h)
-            since = (datetime.now() - timedelta(days=1)).isoformat()
+        floor = -(2**63) if floor is None else floor
+        upper = 2**63 - 1 if upper is None else upper
+        window_sql = f"{SEARCH_LOGS}{where} AND logs_fts.rowid BETWEEN ? AND ? AND ts >= ? AND ts < ?"
+        rows = []
+        while len(rows) < count and upper > floor:
+            lower = conn.execute(
+                "SELECT ts FROM logs WHERE ts >= ? AND ts < ? ORDER BY ts DESC LIMIT 1 OFFSET ?",
+                (floor, upper, SEARCH_WINDOW_ROWS - 1),
+            ).fetchone()
+            lower = floor if lower is None else lower[0]
+            low_id, high_id = conn.execute(
+                "SELECT MIN(id), MAX(id) FROM logs WHERE ts >= ? AND ts < ?", (lower, upper)
+            ).fetchone()
+            if low_id is not None:
+                rows += conn.execute(
+                    f"{window_sql} ORDER BY ts DESC, logs.id DESC LIMIT ?",
+                    [match, *params, low_id, high_id, lower, upper, count - len(rows)],
+                ).fetchall()
+            upper = lower
+        return rows
+
+    def rebuild_search_index(self):
+        """Rebuilds the full-text index from the logs table and merges it into one segment."""
+        with self._write() as conn:
+            conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('optimize')")
+
+    def aggregate(
+        self,
+        metric: str = "count",
+        group_by: str | None = None,
+        interval: int | None = None,
+        top: int = 10,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        service_name: str | None = None,
+        status_min: int | None = None,
+        status_max: int | None = None,
+        source_ip: str | None = None,
+        max_buckets: int = 1440,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """
+        Sums ``metric`` ("count" or "bytes") per time bucket and per value of
+        ``group_by`` (a key of AGGREGATE_DIMENSIONS).
+
+        ``interval`` is the bucket width in seconds; without it there is one
+        total for the whole range. With ``group_by``, the ``top`` values with
+        the largest totals over the range are broken out, in every bucket too;
+        bucket totals still include all values. The range defaults to the 24
+        hours up to the end of the current bucket, and buckets are aligned to
+        multiples of ``interval`` since the epoch and zero-filled.
+
+        Status class and service breakdowns over whole minutes without status
+        or IP filters are answered from the per-minute rollups; everything else
+        is grouped over the logs table and the cold segments. Raises ValueError
+        for unknown names or more than ``max_buckets`` buckets, and
+        QueryTimeoutError once the query has run for ``timeout`` seconds.
+        """
+        if metric not in AGGREGATE_METRICS:
+            raise ValueError(f"unknown metric: {metric!r}")
+        if group_by is not None and group_by not in AGGREGATE_DIMENSIONS:
+            raise ValueError(f"unknown dimension: {group_by!r}")
+        if (interval is not None and interval < 1) or top < 1:
+            raise ValueError("interval and top must be at least 1")
+
+        step = (interval or 60) * 1_000_000
+        until_us = (
+            _to_micros(until) if until is not None else -(-_to_micros(datetime.now(UTC)) // step) * step
+        )
+        since_us = _to_micros(since) if since is not None else until_us - 24 * 3600 * 1_000_000
+        if since_us >= until_us:
+            raise ValueError("since must be before until")
+        starts = range(since_us // step * step, until_us, step) if interval else range(1)
+        if len(starts) > max_buckets:
+            raise ValueError(
+                f"{len(starts)} buckets exceed the limit of {max_buckets}; "
+                "use a wider interval or a shorter range"
+            )
+
+        use_rollups = (
+            group_by in (None, *_ROLLUP_DIMENSIONS)
+            and status_min is None
+            and status_max is None
+            and not source_ip
+            and since_us % 60_000_000 == 0
+            and until_us % 60_000_000 == 0
+            and (interval is None or interval % 60 == 0)
+        )
+        deadline = time.monotonic() + timeout if timeout else None
+        buckets: dict[int, int] = defaultdict(int)
+        groups: dict[Any, int] = defaultdict(int)
+        group_buckets: dict[tuple[int, Any], int] = defaultdict(int)
+
+        with self._read() as conn, _time_limit(conn, deadline):
+            if use_rollups:
+                table = "stats_minute"
+                clauses = ["minute >= ?", "minute < ?"]
+                params = [since_us // 60_000_000, until_us // 60_000_000]
+                if service_name:
+                    clauses.append("service_name = ?")
+                    params.append(service_name)
+                metric_sql = _ROLLUP_METRICS[metric]
+                bucket_sql = f"minute / {interval // 60} * {interval}" if interval else "0"
+                dimension_sql = _ROLLUP_DIMENSIONS.get(group_by)
+                decode = None
+            else:
+                table = "logs"
+                clauses, params = self._build_filters(
+                    service_name, None, None, status_min, status_max, source_ip
+                )
+                clauses[:0] = ["ts >= ?", "ts < ?"]
+                params[:0] = [since_us, until_us]
+                metric_sql = AGGREGATE_METRICS[metric]
+                bucket_sql = f"ts / {step} * {interval}" if interval else "0"
+                dimension_sql = AGGREGATE_DIMENSIONS.get(group_by)
+                decode = self._dimension_decoder(conn, group_by)
+
+            where = " AND ".join(clauses)
+            raw_keys: dict[Any, Any] = {}
+            if group_by:
+                sql = f"SELECT {dimension_sql}, {metric_sql} FROM {table} WHERE {where} GROUP BY 1"
+                for raw, value in conn.execute(sql, params):
+                    key = decode(raw) if decode else raw
+                    raw_keys[key] = raw
+                    groups[key] += value
+                    if not interval:
+                        buckets[0] += value
+            if interval or not group_by:
+                sql = f"SELECT {bucket_sql}, {metric_sql} FROM {table} WHERE {where} GROUP BY 1"
+                for bucket, value in conn.execute(sql, params):
+                    buckets[bucket] += value
+
+            if not use_rollups and self._segments and self._segments.days():
+                self._aggregate_segments(
+                    metric,
+                    group_by,
+                    interval,
+                    deadline,
+                    buckets,
+                    groups,
+                    group_buckets,
+                    since=since_us,
+                    until=until_us,
+                    service_name=service_name,
+                    status_min=status_min,
+                    status_max=status_max,
+                    source_ip=source_ip,
+                )
+
+            ranked = sorted(groups.items(), key=lambda item: (-item[1], str(item[0])))[:top]
+            top_keys = [key for key, _ in ranked]
+            wanted = [raw_keys[key] for key in top_keys if key in raw_keys]
+            if group_by and interval and wanted:
+                present = [raw for raw in wanted if raw is not None]
+                condition = f"{dimension_sql} IN ({', '.join('?' * len(present))})" if present else "0"
+                if None in wanted:
+                    condition = f"({condition} OR {dimension_sql} IS NULL)"
+                sql = (
+                    f"SELECT {bucket_sql}, {dimension_sql}, {metric_sql} FROM {table} "
+                    f"WHERE {where} AND {condition} GROUP BY 1, 2"
+                )
+                for bucket, raw, value in conn.execute(sql, [*params, *present]):
+                    group_buckets[(bucket, decode(raw) if decode else raw)] += value
+
+        result: dict[str, Any] = {
+            "metric": metric,
+            "group_by": group_by,
+            "interval": interval,
+            "since": _format_timestamp(since_us, 0),
+            "until": _format_timestamp(until_us, 0),
+            "source": "rollups" if use_rollups else "logs",
+            "total": sum(buckets.values()),
+        }
+        if group_by:
+            result["groups"] = [{"key": key, "total": value} for key, value in ranked]
+        if interval:
+            result["buckets"] = []
+            for start in starts:
+                bucket = start // 1_000_000
+                entry = {"start": _format_timestamp(start, 0), "total": buckets.get(bucket, 0)}
+                if group_by:
+                    entry["values"] = [group_buckets.get((bucket, key), 0) for key in top_keys]
+                result["buckets"].append(entry)
+        return result
+
+    def _dimension_decoder(self, conn: sqlite3.Connection, group_by: str | None):
+        """Turns stored dimension values (service ids, packed IPs) back into API values."""
+        if group_by == "service":
+            names = dict(conn.execute("SELECT id, name FROM services"))
+            return names.get
+        if group_by == "source_ip":
+            return _unpack_ip
+        return None
+
+    def _aggregate_segments(
+        self, metric, group_by, interval, deadline, buckets, groups, group_buckets, **filters
+    ):
+        """Folds the matching cold segment rows into the aggregate() counters."""
+        step = (interval or 60) * 1_000_000
+        dimension = _SEGMENT_DIMENSIONS.get(group_by)
+        for count, row in enumerate(self._segments.scan(**filters)):
+            if deadline is not None and count % 10_000 == 0 and time.monotonic() > deadline:
+                raise QueryTimeoutError("query exceeded its time limit")
+            if metric == "count":
+                value = 1
+            else:
+                value = row["metadata"].get("bytes")
+                value = value if type(value) is int else 0
+            bucket = row["ts"] // step * interval if interval else 0
+            buckets[bucket] += value
+            if dimension:
+                key = dimension(row)
+                groups[key] += value
+                if interval:
+                    group_buckets[(bucket, key)] += value
+
+    def compact(self, today: date | None = None) -> list[str]:
+        """
+        Moves every UTC day older than ``hot_days`` from the logs table into
+        its cold segment, one day at a time. Returns the compacted days.
+
+        A day's rows are written to the segment first and only then deleted, up
+        to the highest id written, so rows arriving meanwhile stay in the table
+        for the next run and a crash in between leaves duplicates that the next
+        compaction of that day folds away.
+        """
+        if self.hot_days is None:
+            return []
+        cutoff, _ = day_bounds(
+            ((today or datetime.now(UTC).date()) - timedelta(days=self.hot_days)).isoformat()
+        )
+
+        compacted = []
+        while True:
+            with self._read() as conn:
+                oldest = conn.execute("SELECT MIN(ts) FROM logs").fetchone()[0]
+            if oldest is None or oldest >= cutoff:
+                return compacted
+
+            day = day_of(oldest)
+            bounds = day_bounds(day)
+            max_id = None
+
+            def day_rows(conn):
+                nonlocal max_id
+                query = f"{SELECT_LOGS} WHERE ts >= ? AND ts < ? ORDER BY ts, logs.id"
+                for row in conn.execute(query, bounds):
+                    row = _decode_row(row)
+                    max_id = row["id"] if max_id is None else max(max_id, row["id"])
+                    yield tuple(row.values())
+
+            with self._read() as conn:
+                self._segments.write_day(day, day_rows(conn))
+            with self._write() as conn:
+                # Compacted days leave the full-text index along with the table
+                conn.execute(
+                    """
+                    INSERT INTO logs_fts (logs_fts, rowid, message)
+                    SELECT 'delete', id, message FROM logs WHERE ts >= ? AND ts < ? AND id <= ?
+                    """,
+                    (*bounds, max_id),
+                )
+                conn.execute("DELETE FROM logs WHERE ts >= ? AND ts < ? AND id <= ?", (*bounds, max_id))
+            compacted.append(day)
+
+    def apply_retention(self, today: date | None = None) -> list[str]:
+        """
+        Deletes the cold segments of days older than ``retention_days`` and
+        takes the rows they held off the stats totals; returns the days.
+        """
+        if self.retention_days is None or self._segments is None:
+            return []
+        cutoff = ((today or datetime.now(UTC).date()) - timedelta(days=self.retention_days)).isoformat()
+        expired = []
+        for day in self._segments.days():
+            if day >= cutoff:
+                break
+            # Exactly what the segment holds; late rows for the day still in the hot table stay counted
+            totals = self._segments.totals(day)
+            if not self._segments.drop_day(day):
+                continue
+            expired.append(day)
+
+            removed: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0, 0])
+            for service_name, status_code, count, size in totals:
+                status_class = "other" if status_code is None else _status_class(status_code)
+                counters = removed[(service_name or "unknown", status_class)]
+                counters[0] += count
+                counters[1] += size
+
+            first, last = (bound // 60_000_000 for bound in day_bounds(day))
+            with self._write() as conn:
+                conn.executemany(
+                    """
+                    UPDATE stats_totals SET count = count - ?, bytes = bytes - ?
+                    WHERE service_name = ? AND status_class = ?
+                    """,
+                    [(count, size, *key) for key, (count, size) in removed.items()],
+                )
+                conn.execute("DELETE FROM stats_totals WHERE count <= 0")
+                # The per-minute rollups of the day go with it
+                conn.execute("DELETE FROM stats_minute WHERE minute >= ? AND minute < ?", (first, last))
+        return expired
+
+    def maintain(self, today: date | None = None) -> dict[str, list[str]]:
+        """Runs compaction and retention; meant to be called periodically."""
+        return {"compacted": self.compact(today), "expired": self.apply_retention(today)}
+
+    def get_stats(self) -> dict:
+        """
+        Returns ingestion statistics from the rollup tables.
+
+        Totals come from one row per (service, status class) and the 24h window
+        from per-minute buckets, so the cost does not grow with the logs table.
+        """
+        since_minute = (int(time.time()) - 24 * 3600) // 60
+
+        with self._read() as conn:
+            totals = conn.execute(
+                "SELECT service_name, status_class, count, bytes FROM stats_totals"
+            ).fetchall()
             recent = conn.execute(
-                "SELECT COUNT(*) as count FROM logs WHERE timestamp > ?", (since,)
-            ).fetchone()["count"]
-
-            return {
-                "total_logs": total,
-                "services": {row["service_name"]: row["count"] for row in service_counts},
-                "recent_24h": recent,
-            }
+                """
+                SELECT COALESCE(SUM(count), 0) AS count, COALESCE(SUM(bytes), 0) AS bytes
+                FROM stats_minute WHERE minute >= ?
+                """,
+                (since_minute,),
+            ).fetchone()
+
+        services: dict[str, int] = defaultdict(int)
+        status_classes: dict[str, int] = defaultdict(int)
+        for row in totals:
+            services[row["service_name"]] += row["count"]
+            status_classes[row["status_class"]] += row["count"]
+
+        return {
+            "cold_days": len(self._segments.days()) if self._segments else 0,
+            "cold_logs": self._segments.row_count() if self._segments else 0,
+            "total_logs": sum(row["count"] for row in totals),
+            "total_bytes": sum(row["bytes"] for row in totals),
+            "services": dict(services),
+            "status_classes": dict(status_classes),
+            "recent_24h": recent["count"],
+            "recent_24h_bytes": recent["bytes"],
+        }
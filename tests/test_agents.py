@@ -1,10 +1,22 @@
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import httpx
 import pytest
 from fastapi.testclient import TestClient
 
-from src.agents import AgentFactory, FileAgent, FileAgentConfig, LogSentinelClient
+from src.agents import (
+    AgentFactory,
+    BufferedLogSentinelClient,
+    FileAgent,
+    FileAgentConfig,
+    GlobAgent,
+    LogSentinelClient,
+)
+from src.agents import watcher as watcher_module
+from src.agents.checkpoint import CheckpointStore
+from src.agents.watcher import InotifyWatcher, PollingWatcher, create_watcher
 from src.api.main import app
 from src.exceptions import ConfigurationError
 
@@ -24,6 +36,13 @@ def test_agent_factory_create_file_agent():
     assert agent.config.file_path == "test.log"
 
 
+def test_agent_factory_create_glob_agent():
+    config_dict = {"name": "vhosts", "parser_type": "nginx", "paths": ["/var/log/nginx/*.access.log"]}
+    agent = AgentFactory.create_agent("glob", config_dict)
+    assert isinstance(agent, GlobAgent)
+    assert agent.config.paths == ["/var/log/nginx/*.access.log"]
+
+
 def test_agent_factory_invalid_type():
     with pytest.raises(ConfigurationError):
         AgentFactory.create_agent("invalid", {"name": "test"})
@@ -56,6 +75,106 @@ def test_client_send_batch(mock_post):
     mock_post.assert_called_once()
 
 
+def test_buffered_client_flushes_full_batches():
+    client = BufferedLogSentinelClient(BASE_URL, batch_size=2, flush_interval=60)
+    with patch.object(client, "_post_batch", return_value=[]) as mock_send_batch:
+        for _ in range(4):
+            client.submit(PARSER_TYPE, VALID_LOG)
+        client.stop()
+
+    assert mock_send_batch.call_count == 2
+    mock_send_batch.assert_called_with(PARSER_TYPE, [VALID_LOG, VALID_LOG])
+    assert client.stats["sent_lines"] == 4
+
+
+def test_buffered_client_flushes_after_interval():
+    client = BufferedLogSentinelClient(BASE_URL, batch_size=100, flush_interval=0.05)
+    with patch.object(client, "_post_batch", return_value=[]) as mock_send_batch:
+        client.submit(PARSER_TYPE, VALID_LOG)
+        for _ in range(50):
+            if mock_send_batch.called:
+                break
+            time.sleep(0.01)
+        assert mock_send_batch.call_count == 1
+        client.stop()
+
+
+def test_buffered_client_flushes_on_stop():
+    client = BufferedLogSentinelClient(BASE_URL, batch_size=100, flush_interval=60)
+    error = httpx.ConnectError("connection refused")
+    with patch.object(client, "_post_batch", side_effect=error) as mock_send_batch:
+        client.submit(PARSER_TYPE, VALID_LOG)
+        client.stop()
+
+    # Stopping: one last attempt, then the batch is given up
+    mock_send_batch.assert_called_once_with(PARSER_TYPE, [VALID_LOG])
+    assert client.stats["failed_batches"] == 1
+
+
+def test_buffered_client_retries_failed_batches_with_backpressure():
+    client = BufferedLogSentinelClient(
+        BASE_URL, batch_size=2, flush_interval=60, max_queue_size=2, put_timeout=0.5, retry_delay=0.02
+    )
+    outage = threading.Event()
+    calls = []
+
+    def post(parser_type, lines):
+        calls.append(list(lines))
+        if not outage.is_set():
+            raise httpx.ConnectError("connection refused")
+        return []
+
+    with patch.object(client, "_post_batch", side_effect=post):
+        for i in range(4):
+            assert client.submit(PARSER_TYPE, f"line {i}") is True
+        for _ in range(100):
+            if client.stats["retries"] >= 3 and client.stats["queued"] == 2:
+                break
+            time.sleep(0.01)
+        # The first batch is held for retry, the queue is full and submit pushes back
+        stats = client.stats
+        assert (stats["retry_lines"], stats["queued"], stats["failed_batches"]) == (2, 2, 0)
+        assert stats["retry_delay"] > 0.02
+        assert client.submit(PARSER_TYPE, "line 4") is False
+
+        outage.set()
+        client.stop()
+
+    assert [line for batch in calls[-2:] for line in batch] == [f"line {i}" for i in range(4)]
+    assert all(batch == ["line 0", "line 1"] for batch in calls[:-2])
+    stats = client.stats
+    assert (stats["sent_lines"], stats["failed_lines"], stats["retry_lines"]) == (4, 0, 0)
+
+
+def test_buffered_client_drops_batches_the_api_rejects():
+    client = BufferedLogSentinelClient(BASE_URL, batch_size=1, retry_delay=0.01)
+    request = httpx.Request("POST", f"{BASE_URL}/parse/unknown/batch")
+    rejected = httpx.HTTPStatusError("404", request=request, response=httpx.Response(404, request=request))
+    with patch.object(client, "_post_batch", side_effect=[rejected, []]) as mock_send_batch:
+        client.submit("unknown", VALID_LOG)
+        client.submit(PARSER_TYPE, VALID_LOG)
+        client.stop()
+
+    assert mock_send_batch.call_count == 2
+    stats = client.stats
+    assert (stats["failed_batches"], stats["failed_lines"], stats["sent_lines"], stats["retries"]) == (
+        1,
+        1,
+        1,
+        0,
+    )
+
+
+def test_buffered_client_drops_when_queue_full():
+    client = BufferedLogSentinelClient(BASE_URL, max_queue_size=1, put_timeout=0.01)
+    # Pretend the worker is already running but stalled, so nothing drains the queue
+    client._worker = MagicMock()
+
+    assert client.submit(PARSER_TYPE, VALID_LOG) is True
+    assert client.submit(PARSER_TYPE, VALID_LOG) is False
+    assert client.stats["dropped"] == 1
+
+
 # --- Unit Tests for FileAgent ---
 
 
@@ -85,6 +204,253 @@ def test_file_agent_tailing(tmp_path):
     assert received_lines[0] == VALID_LOG
 
 
+def test_file_agent_holds_back_partial_lines(tmp_path):
+    log_file = tmp_path / "access.log"
+    log_file.write_text("")
+    received_lines = []
+
+    config = FileAgentConfig(
+        name="partial", parser_type="nginx", file_path=str(log_file), read_from_end=False
+    )
+    agent = FileAgent(config, on_line_received=received_lines.append)
+
+    with open(log_file, "a") as f:
+        f.write(VALID_LOG[:20])
+    agent._poll()
+    assert received_lines == []
+
+    with open(log_file, "a") as f:
+        f.write(VALID_LOG[20:] + "\n")
+    agent._poll()
+    assert received_lines == [VALID_LOG]
+
+
+def test_file_agent_reads_backlog_in_chunks_and_batches(tmp_path):
+    log_file = tmp_path / "access.log"
+    lines = [f"line {i} " + "x" * (i % 50) for i in range(1000)]
+    log_file.write_text("\n".join(lines) + "\n" + "y" * 300 + "\ntail\n")
+    batches = []
+
+    config = FileAgentConfig(
+        name="backlog",
+        parser_type="nginx",
+        file_path=str(log_file),
+        read_from_end=False,
+        read_chunk_size=64,
+        batch_size=100,
+        max_line_bytes=200,
+    )
+    agent = FileAgent(config, on_lines_received=batches.append)
+    agent._poll()
+
+    assert [len(batch) for batch in batches] == [100] * 10 + [1]
+    # The oversized line is skipped, everything else arrives intact and in order
+    assert [line for batch in batches for line in batch] == [line.strip() for line in lines] + ["tail"]
+    assert agent.get_status()["last_position"] == log_file.stat().st_size
+
+
+def _checkpointed_agent(log_file, state_file, on_lines_received, **overrides):
+    config = FileAgentConfig(
+        name="checkpointed",
+        parser_type="nginx",
+        file_path=str(log_file),
+        read_from_end=True,
+        checkpoint_path=str(state_file),
+        **overrides,
+    )
+    agent = FileAgent(config, on_lines_received=on_lines_received)
+    agent._tailer.open()
+    return agent
+
+
+def test_file_agent_resumes_from_checkpoint_after_restart(tmp_path):
+    log_file, state_file = tmp_path / "access.log", tmp_path / "state" / "checkpoints.json"
+    log_file.write_text("a\nb\n")
+    received = []
+
+    # First run: no checkpoint yet, so read_from_end skips the existing lines
+    agent = _checkpointed_agent(log_file, state_file, received.extend)
+    with open(log_file, "a") as f:
+        f.write("c\nd\npartial")
+    agent._poll()
+    assert received == ["c", "d"]
+
+    # Written while the agent is down
+    with open(log_file, "a") as f:
+        f.write(" line\ne\n")
+
+    restarted = _checkpointed_agent(log_file, state_file, received.extend)
+    restarted._poll()
+    assert received == ["c", "d", "partial line", "e"]
+
+
+def test_file_agent_only_commits_acknowledged_batches(tmp_path):
+    log_file, state_file = tmp_path / "access.log", tmp_path / "checkpoints.json"
+    log_file.write_text("")
+    received, acks = [], [True, False, True, True]
+
+    def send(lines):
+        received.append(list(lines))
+        return acks.pop(0)
+
+    # Every acknowledged offset is written out at once
+    agent = _checkpointed_agent(log_file, state_file, send, batch_size=2, checkpoint_interval=0)
+    log_file.write_text("a\nb\nc\nd\n")
+
+    agent._poll()  # [a, b] acked, [c, d] rejected
+    assert agent.get_status()["committed_position"] == 4
+    assert CheckpointStore(str(state_file)).get(str(log_file)).offset == 4
+
+    agent._poll()  # [c, d] retried
+    assert received == [["a", "b"], ["c", "d"], ["c", "d"]]
+    assert CheckpointStore(str(state_file)).get(str(log_file)).offset == 8
+
+
+def test_checkpoint_writes_are_coalesced(tmp_path):
+    log_file, state_file = tmp_path / "access.log", tmp_path / "checkpoints.json"
+    log_file.write_text("")
+    agent = _checkpointed_agent(
+        log_file, state_file, lambda lines: True, batch_size=1, checkpoint_interval=60
+    )
+    log_file.write_text("a\nb\nc\n")
+
+    with patch.object(CheckpointStore, "_write", autospec=True, side_effect=CheckpointStore._write) as write:
+        agent._poll()  # three acknowledged batches: the first is written, the rest wait for the interval
+        assert write.call_count == 1
+        assert CheckpointStore(str(state_file)).get(str(log_file)).offset == 2
+
+        agent._checkpoints.flush()  # as on exit
+        assert write.call_count == 2
+        assert CheckpointStore(str(state_file)).get(str(log_file)).offset == 6
+        agent._checkpoints.flush()
+        assert write.call_count == 2
+
+    # A deferred commit is written once the interval is up, even if nothing else arrives
+    agent._checkpoints.commit_interval = 0.3
+    with open(log_file, "a") as f:
+        f.write("d\n")
+    agent._poll()
+    assert CheckpointStore(str(state_file)).get(str(log_file)).offset == 6
+    time.sleep(0.6)
+    assert CheckpointStore(str(state_file)).get(str(log_file)).offset == 8
+
+
+def test_file_agent_ignores_checkpoint_of_replaced_file(tmp_path):
+    log_file, state_file = tmp_path / "access.log", tmp_path / "checkpoints.json"
+    log_file.write_text("")
+    received = []
+
+    agent = _checkpointed_agent(log_file, state_file, received.extend)
+    log_file.write_text("old 1\nold 2\n")
+    agent._poll()
+
+    # Same size, different content and inode: the checkpoint must not apply
+    log_file.unlink()
+    log_file.write_text("new 1\nnew 2\n")
+    restarted = _checkpointed_agent(log_file, state_file, received.extend)
+    restarted._poll()
+    assert received == ["old 1", "old 2", "new 1", "new 2"]
+
+
+def _rotation_agent(log_file, received, **overrides):
+    config = FileAgentConfig(
+        name="rotation", parser_type="nginx", file_path=str(log_file), read_from_end=False, **overrides
+    )
+    return FileAgent(config, on_line_received=received.append)
+
+
+def test_file_agent_drains_old_file_on_create_rotation(tmp_path):
+    log_file = tmp_path / "access.log"
+    log_file.write_text("old 1\n")
+    received = []
+    agent = _rotation_agent(log_file, received)
+    agent._poll()
+
+    # Written after the last poll, then logrotate renames and creates a new, larger file
+    with open(log_file, "a") as f:
+        f.write("old 2\nold 3")
+    log_file.rename(tmp_path / "access.log.1")
+    log_file.write_text("new 1\nnew 2\nnew 3\nnew 4\n")
+
+    agent._poll()  # drains the rotated file through the still-open handle
+    assert received == ["old 1", "old 2"]
+
+    agent._poll()  # the old file stopped growing: finish it and switch
+    assert received == ["old 1", "old 2", "old 3", "new 1", "new 2", "new 3", "new 4"]
+    assert agent.get_status()["rotations"] == 1
+    assert agent.get_status()["inode"] == log_file.stat().st_ino
+
+
+def test_file_agent_retries_rejected_last_line_of_rotated_file(tmp_path):
+    log_file = tmp_path / "access.log"
+    log_file.write_text("old 1\nold 2")
+    received = []
+    accept = [True, False]  # the rotated file's unterminated last line is rejected once
+
+    def send(lines):
+        ok = accept.pop(0) if accept else True
+        if ok:
+            received.extend(lines)
+        return ok
+
+    config = FileAgentConfig(
+        name="rotation", parser_type="nginx", file_path=str(log_file), read_from_end=False
+    )
+    agent = FileAgent(config, on_lines_received=send)
+    agent._poll()
+    log_file.rename(tmp_path / "access.log.1")
+    log_file.write_text("new 1\n")
+
+    agent._poll()  # "old 2" rejected: stay on the rotated file
+    assert received == ["old 1"]
+    assert agent.get_status()["rotations"] == 0
+
+    agent._poll()  # re-read from the committed offset
+    agent._poll()  # stopped growing again: "old 2" accepted, then switch
+    assert received == ["old 1", "old 2", "new 1"]
+    assert agent.get_status()["rotations"] == 1
+
+
+def test_file_agent_restarts_after_copytruncate(tmp_path):
+    log_file = tmp_path / "access.log"
+    log_file.write_text("line 1\nline 2\n")
+    received = []
+    agent = _rotation_agent(log_file, received)
+    agent._poll()
+
+    # logrotate copytruncate: copy the content away, truncate in place, writer continues
+    (tmp_path / "access.log.1").write_bytes(log_file.read_bytes())
+    with open(log_file, "r+") as f:
+        f.truncate(0)
+    with open(log_file, "a") as f:
+        f.write("after 1\n")
+
+    agent._poll()
+    assert received == ["line 1", "line 2", "after 1"]
+    assert agent.get_status()["rotations"] == 0
+
+
+def test_file_agent_resumes_rotated_file_after_restart(tmp_path):
+    log_file, state_file = tmp_path / "access.log", tmp_path / "checkpoints.json"
+    log_file.write_text("")
+    received = []
+    agent = _checkpointed_agent(log_file, state_file, received.extend)
+    log_file.write_text("a\n")
+    agent._poll()
+    agent._tailer.close()
+
+    # While the agent is down the file gets more lines and is rotated
+    with open(log_file, "a") as f:
+        f.write("b\n")
+    log_file.rename(tmp_path / "access.log.1")
+    log_file.write_text("c\n")
+
+    restarted = _checkpointed_agent(log_file, state_file, received.extend)
+    restarted._poll()
+    restarted._poll()
+    assert received == ["a", "b", "c"]
+
+
 # --- Integration Test ---
 
 
@@ -136,3 +502,243 @@ def test_agent_to_api_integration(tmp_path):
         response = responses[0]
         assert response.status_code == 200
         assert response.json()["source_ip"] == "192.168.1.10"
+
+
+def test_agent_parses_locally_and_ships_entries(tmp_path, monkeypatch):
+    from src.api import routes
+    from src.storage import LogStorage
+
+    monkeypatch.setattr(routes, "storage", LogStorage(db_path=str(tmp_path / "logs.db")))
+    log_file = tmp_path / "edge.log"
+    log_file.write_text(VALID_LOG + "\nnot a log line\n")
+
+    ls_client = LogSentinelClient(BASE_URL)
+    ls_client._client = TestClient(app)
+    shipped = []
+
+    def ship(batch):
+        shipped.append((len(batch), batch.rejected))
+        return ls_client.send_entries(batch) is not None
+
+    config = FileAgentConfig(
+        name="edge", parser_type="nginx", file_path=str(log_file), read_from_end=False, parse_locally=True
+    )
+    FileAgent(config, on_entries_received=ship)._poll()
+
+    assert shipped == [(1, 1)]
+    logs = ls_client._client.get("/logs").json()
+    assert [log["source_ip"] for log in logs] == ["192.168.1.10"]
+    assert logs[0]["metadata"] == {"bytes": 1024}
+    routes.storage.close()
+
+
+def test_parse_locally_requires_entries_callback():
+    with pytest.raises(ConfigurationError):
+        AgentFactory.create_agent(
+            "file", {"name": "edge", "parser_type": "nginx", "file_path": "a.log", "parse_locally": True}
+        )
+
+
+# --- Unit Tests for file watchers ---
+
+requires_inotify = pytest.mark.skipif(watcher_module._libc is None, reason="inotify is Linux-only")
+
+
+@requires_inotify
+def test_inotify_watcher_wakes_only_for_its_file(tmp_path):
+    log_file = tmp_path / "access.log"
+    log_file.write_text("")
+    watcher = InotifyWatcher(str(log_file))
+    try:
+        (tmp_path / "other.log").write_text("noise\n")
+        assert watcher.wait(timeout=0.1) is False
+
+        with open(log_file, "a") as f:
+            f.write(VALID_LOG + "\n")
+        assert watcher.wait(timeout=1) is True
+
+        # Rotation: the path is moved away and recreated
+        log_file.rename(tmp_path / "access.log.1")
+        assert watcher.wait(timeout=1) is True
+        log_file.write_text("")
+        assert watcher.wait(timeout=1) is True
+    finally:
+        watcher.close()
+
+
+@requires_inotify
+def test_inotify_watcher_wake_interrupts_wait(tmp_path):
+    watcher = InotifyWatcher(str(tmp_path / "access.log"))
+    try:
+        threading.Timer(0.05, watcher.wake).start()
+        started = time.monotonic()
+        assert watcher.wait(timeout=5) is False
+        assert time.monotonic() - started < 1
+    finally:
+        watcher.close()
+
+
+def test_create_watcher_modes(tmp_path):
+    assert isinstance(create_watcher(str(tmp_path / "a.log"), "poll"), PollingWatcher)
+    with pytest.raises(ConfigurationError):
+        create_watcher(str(tmp_path / "a.log"), "fanotify")
+    # A missing directory cannot be watched; "auto" degrades to polling
+    assert isinstance(create_watcher(str(tmp_path / "missing" / "a.log"), "auto"), PollingWatcher)
+    with pytest.raises(ConfigurationError):
+        create_watcher(str(tmp_path / "missing" / "a.log"), "inotify")
+
+
+@requires_inotify
+def test_file_agent_reacts_to_writes_without_waiting_for_poll(tmp_path):
+    log_file = tmp_path / "access.log"
+    log_file.write_text("")
+    received = threading.Event()
+
+    config = FileAgentConfig(
+        name="inotify-tail",
+        parser_type="nginx",
+        file_path=str(log_file),
+        poll_interval=30,
+        idle_timeout=30,
+        watch_mode="inotify",
+    )
+    agent = FileAgent(config, on_line_received=lambda line: received.set())
+    thread = threading.Thread(target=agent.start)
+    thread.start()
+    try:
+        for _ in range(100):
+            if agent.get_status()["watcher"]:
+                break
+            time.sleep(0.01)
+        with open(log_file, "a") as f:
+            f.write(VALID_LOG + "\n")
+        assert received.wait(timeout=2)
+    finally:
+        agent.stop()
+        thread.join(timeout=2)
+    assert not thread.is_alive()
+
+
+# --- GlobAgent ---
+
+
+def _wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _run_glob_agent(tmp_path, received, **overrides):
+    agent = AgentFactory.create_agent(
+        "glob",
+        {
+            "name": "vhosts",
+            "parser_type": "nginx",
+            "paths": [str(tmp_path / "*.access.log")],
+            "read_from_end": False,
+            **overrides,
+        },
+        on_lines_received=received.extend,
+    )
+    thread = threading.Thread(target=agent.start)
+    thread.start()
+    return agent, thread
+
+
+def test_glob_agent_tails_existing_and_new_files(tmp_path):
+    first = tmp_path / "a.access.log"
+    first.write_text("a 1\n")
+    (tmp_path / "ignored.log").write_text("noise\n")
+    received = []
+    agent, thread = _run_glob_agent(
+        tmp_path, received, watch_mode="poll", poll_interval=0.02, rescan_interval=0.05
+    )
+    try:
+        assert _wait_for(lambda: received == ["a 1"])
+
+        second = tmp_path / "b.access.log"
+        second.write_text("b 1\n")
+        with open(first, "a") as f:
+            f.write("a 2\n")
+        assert _wait_for(lambda: sorted(received) == ["a 1", "a 2", "b 1"])
+
+        files = agent.get_status()["files"]
+        assert set(files) == {str(first), str(second)}
+        assert files[str(second)]["committed_position"] == len("b 1\n")
+
+        # A removed file is read to its end, including an unterminated last line, then dropped
+        with open(second, "a") as f:
+            f.write("b 2")
+        second.unlink()
+        assert _wait_for(lambda: set(agent.get_status()["files"]) == {str(first)})
+        assert "b 2" in received
+    finally:
+        agent.stop()
+        thread.join(timeout=2)
+    assert not thread.is_alive()
+    assert agent.get_status()["files"] == {}
+
+
+def test_glob_agent_retries_a_failing_file_from_its_position(tmp_path):
+    log = tmp_path / "a.access.log"
+    log.write_text("a 1\n")
+    received = []
+    failures = []
+
+    def flaky(lines):
+        if "a 2" in lines and not failures:
+            failures.append(lines)
+            raise OSError("connection reset")
+        received.extend(lines)
+
+    agent = AgentFactory.create_agent(
+        "glob",
+        {
+            "name": "vhosts",
+            "parser_type": "nginx",
+            "paths": [str(tmp_path / "*.access.log")],
+            "read_from_end": False,
+            "watch_mode": "poll",
+            "poll_interval": 0.02,
+            "rescan_interval": 0.05,
+        },
+        on_lines_received=flaky,
+    )
+    thread = threading.Thread(target=agent.start)
+    thread.start()
+    try:
+        assert _wait_for(lambda: received == ["a 1"])
+        with open(log, "a") as f:
+            f.write("a 2\na 3\n")
+        # The failed batch is sent again once; nothing before it is re-read
+        assert _wait_for(lambda: received == ["a 1", "a 2", "a 3"])
+        time.sleep(0.2)
+        assert received == ["a 1", "a 2", "a 3"] and len(failures) == 1
+        assert agent.get_status()["files"][str(log)]["committed_position"] == len("a 1\na 2\na 3\n")
+    finally:
+        agent.stop()
+        thread.join(timeout=2)
+    assert not thread.is_alive()
+
+
+@requires_inotify
+def test_glob_agent_picks_up_new_files_on_inotify_events(tmp_path):
+    received = []
+    agent, thread = _run_glob_agent(
+        tmp_path, received, watch_mode="inotify", idle_timeout=30, rescan_interval=30
+    )
+    try:
+        assert _wait_for(lambda: agent.get_status()["watched_patterns"])
+        (tmp_path / "new.access.log").write_text(VALID_LOG + "\n")
+        assert _wait_for(lambda: received == [VALID_LOG], timeout=2)
+
+        with open(tmp_path / "new.access.log", "a") as f:
+            f.write("second\n")
+        assert _wait_for(lambda: received == [VALID_LOG, "second"], timeout=2)
+    finally:
+        agent.stop()
+        thread.join(timeout=2)
+    assert not thread.is_alive()
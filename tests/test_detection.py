@@ -0,0 +1,166 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import routes
+from src.api.main import app
+from src.detection import (
+    DetectionEngine,
+    ErrorRateRule,
+    FileAlertSink,
+    RequestFloodRule,
+    VolumeAnomalyRule,
+)
+from src.exceptions import ConfigurationError
+from src.models import LogBatch
+from src.serialization import loads
+from src.sketches import StreamingSketches
+
+START = datetime(2026, 1, 7, 10, 0, tzinfo=UTC)
+
+
+def _batch(
+    second: float,
+    count: int,
+    status: int = 200,
+    ip: str = "10.0.0.1",
+    service: str = "web",
+    spread: float = 1.0,
+) -> LogBatch:
+    """``count`` requests spread evenly over ``spread`` seconds from ``second`` after START."""
+    return LogBatch(
+        timestamps=[START + timedelta(seconds=second + spread * i / count) for i in range(count)],
+        source_ips=[ip] * count,
+        messages=["GET / HTTP/1.1"] * count,
+        status_codes=[status] * count,
+        service_names=[service] * count,
+        metadata=[{}] * count,
+    )
+
+
+def _run(engine: DetectionEngine, *batches: LogBatch) -> list:
+    alerts = []
+    for batch in batches:
+        alerts.extend(engine.evaluate(batch))
+    return alerts
+
+
+def test_error_rate_and_flood_rules_use_sliding_windows():
+    engine = DetectionEngine(
+        [
+            ErrorRateRule(window_seconds=60, threshold=0.5, min_requests=20, cooldown=120),
+            RequestFloodRule(window_seconds=10, threshold=100),
+        ]
+    )
+
+    # 15 errors out of 40 requests, then 10 more errors: 25/50 crosses 50%
+    assert _run(engine, _batch(0, 25, ip="10.0.0.1"), _batch(5, 15, status=503, ip="10.0.0.2")) == []
+    [alert] = _run(engine, _batch(30, 10, status=500, ip="10.0.0.3"))
+    assert (alert.rule, alert.key, alert.value, alert.threshold) == ("error_rate", "web", 0.5, 0.5)
+    assert alert.timestamp == START + timedelta(seconds=30.9)
+    assert "25 of 50 requests" in alert.message
+
+    # Still failing, but within the cooldown
+    assert _run(engine, _batch(40, 20, status=500, ip="10.0.0.4")) == []
+    # The first minute has slid out: 30 errors in the window, and the cooldown has passed
+    [alert] = _run(engine, _batch(155, 30, status=500, ip="10.0.0.5"))
+    assert (alert.key, alert.value) == ("web", 1.0)
+
+    # 60 + 60 requests from one IP 8 seconds apart flood; 12 seconds apart they do not
+    assert _run(engine, _batch(300, 60, ip="10.9.9.9"), _batch(312, 60, ip="10.9.9.9")) == []
+    [alert] = _run(engine, _batch(320, 60, ip="10.9.9.9"))
+    assert (alert.rule, alert.key, alert.value) == ("request_flood", "10.9.9.9", 120)
+
+    # Batches arriving late for a slot that already left the window are ignored
+    assert _run(engine, _batch(301, 500, ip="10.9.9.9")) == []
+
+
+def test_volume_rule_flags_spikes_and_drops_against_the_moving_average():
+    rule = VolumeAnomalyRule(bucket_seconds=60, alpha=0.2, z_threshold=4, min_buckets=10, cooldown=0)
+    engine = DetectionEngine([rule])
+
+    # Ten steady minutes of ~100 requests, no alerts while learning
+    steady = [_batch(minute * 60, 100 + minute % 3 * 5, spread=60) for minute in range(12)]
+    assert _run(engine, *steady) == []
+
+    # A spike is reported while its minute is still filling
+    [alert] = _run(engine, _batch(12 * 60, 250, spread=10))
+    assert (alert.rule, alert.key) == ("volume", "web")
+    assert alert.value >= 4 and "expected 10" in alert.message
+
+    # Closing the spiked minute does not report it again
+    assert _run(engine, _batch(13 * 60, 100, spread=60)) == []
+
+    # A service that goes quiet is reported as a drop once the empty minutes close
+    quiet = DetectionEngine([VolumeAnomalyRule(bucket_seconds=60, alpha=0.2, min_buckets=10)])
+    assert _run(quiet, *steady) == []
+    [alert] = _run(quiet, _batch(15 * 60, 5))
+    assert alert.value <= -4 and alert.timestamp == START + timedelta(minutes=13)
+
+    # Constant traffic does not alert: the deviation never falls below sqrt(mean)
+    constant = DetectionEngine([VolumeAnomalyRule(min_buckets=3)])
+    minutes = [_batch(minute * 60, 1000, spread=60) for minute in range(5)]
+    assert _run(constant, *minutes, _batch(300, 1100)) == []
+
+
+def test_rule_state_is_bounded_and_idle_keys_expire():
+    rule = RequestFloodRule(threshold=1000, max_keys=100, idle_seconds=300)
+    engine = DetectionEngine([rule])
+
+    batch = LogBatch()
+    for i in range(500):
+        batch.extend(_batch(0, 2, ip=f"10.0.{i >> 8}.{i & 255}"))
+    engine.evaluate(batch)
+    assert len(rule) == 100
+    assert rule.evicted == 400
+
+    engine.evaluate(_batch(200, 1, ip="10.1.0.1"))
+    assert (len(rule), rule.evicted) == (100, 401)  # one new key, the least recently seen evicted
+    engine.evaluate(_batch(400, 1, ip="10.1.0.2"))
+    assert len(rule) == 2  # keys last seen at 0-1s are idle past 300s
+    assert engine.get_stats()["keys"] == {"request_flood": 2}
+
+
+def test_engine_runs_off_the_request_path_and_delivers_alerts(tmp_path, monkeypatch):
+    from src.storage import LogStorage
+
+    alert_file = tmp_path / "alerts.jsonl"
+    engine = DetectionEngine.from_config(
+        {
+            "rules": {"request_flood": {"threshold": 50}, "error_rate": {"enabled": False}},
+            "sinks": [{"type": "file", "path": str(alert_file)}],
+        }
+    )
+    assert [rule.name for rule in engine.rules] == ["request_flood"]
+    assert isinstance(engine.sinks[0], FileAlertSink)
+
+    monkeypatch.setattr(routes, "storage", LogStorage(str(tmp_path / "logs.db")))
+    monkeypatch.setattr(routes, "detector", engine)
+    monkeypatch.setattr(routes, "sketches", StreamingSketches())
+
+    # Not running: nothing is queued, and the entries are counted as dropped
+    batch = _batch(0, 60, ip="10.6.6.6")
+    assert engine.submit(batch) is False
+
+    with TestClient(app) as lifespan_client:
+        assert engine.running
+        response = lifespan_client.post("/ingest/entries", json=batch.to_columns())
+        assert response.status_code == 200
+    routes.storage.close()
+
+    assert engine.running is False
+    stats = engine.get_stats()
+    assert (stats["submitted"], stats["processed"], stats["dropped"]) == (60, 60, 60)
+    assert stats["alerts"] == {"request_flood": 1} and stats["pending"] == 0
+
+    [line] = alert_file.read_text().splitlines()
+    assert loads(line)["key"] == "10.6.6.6"
+    assert TestClient(app).get("/alerts").json() == [loads(line)]
+
+    with pytest.raises(ConfigurationError, match="Unsupported detection rule"):
+        DetectionEngine.from_config({"rules": {"cpu": {}}})
+    with pytest.raises(ConfigurationError, match="alert sink 'webhook'"):
+        DetectionEngine.from_config({"sinks": [{"type": "webhook"}]})
+    with pytest.raises(ConfigurationError):
+        DetectionEngine.from_config({"rules": {"error_rate": {"threshold": 2}}})
@@ -21,3 +21,28 @@ def test_factory_raises_error_on_unknown_type():
     """
     with pytest.raises(ConfigurationError):
         ParserFactory.get_parser("unknown_parser_type")
+
+
+def test_factory_shares_one_instance_across_threads():
+    """
+    Scenario: Many threads request the same parser type on a cold cache.
+    Expectation: The parser is built once and every caller gets that instance.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    ParserFactory.clear_cache()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        parsers = list(pool.map(ParserFactory.get_parser, ["nginx"] * 32))
+
+    assert len({id(parser) for parser in parsers}) == 1
+    assert ParserFactory.get_parser("nginx") is parsers[0]
+
+
+def test_factory_warm_up_builds_registered_parsers():
+    """
+    Scenario: warm_up() runs at API startup.
+    Expectation: Every registered parser is cached before the first request.
+    """
+    ParserFactory.clear_cache()
+    assert ParserFactory.warm_up() == ["nginx"]
+    assert "nginx" in ParserFactory._instances
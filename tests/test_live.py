@@ -0,0 +1,138 @@
+import asyncio
+from datetime import UTC, datetime
+
+from fastapi.testclient import TestClient
+
+from src.api import routes
+from src.api.main import app
+from src.live import LiveTail, TailFilter
+from src.models import LogBatch
+from src.serialization import loads
+
+client = TestClient(app)
+
+
+def _batch(rows: list[tuple[str, str, int]]) -> LogBatch:
+    """Rows of (service, source_ip, status)."""
+    return LogBatch(
+        timestamps=[datetime(2026, 1, 7, 10, 0, i, tzinfo=UTC) for i in range(len(rows))],
+        source_ips=[ip for _, ip, _ in rows],
+        messages=[f"GET /{i} HTTP/1.1" for i in range(len(rows))],
+        status_codes=[status for _, _, status in rows],
+        service_names=[service for service, _, _ in rows],
+        metadata=[{"bytes": i} for i in range(len(rows))],
+    )
+
+
+async def _settle(tail: LiveTail):
+    while tail.get_stats()["pending"]:
+        await asyncio.sleep(0.01)
+
+
+def test_live_tail_filters_fans_out_and_counts_drops():
+    async def scenario():
+        tail = LiveTail(buffer_entries=3, heartbeat=0.05)
+        assert tail.publish(_batch([("web", "10.0.0.1", 200)])) is True  # nobody listening: nothing queued
+        tail.start()
+
+        errors = tail.subscribe(TailFilter(status_min=500))
+        api = tail.subscribe(TailFilter(service_name="api", source_ip="10.0.0.2"))
+        everything = tail.subscribe(TailFilter())
+
+        batch = _batch(
+            [
+                ("web", "10.0.0.1", 200),
+                ("api", "10.0.0.2", 503),
+                ("api", "10.0.0.3", 200),
+                ("web", "10.0.0.1", 500),
+                ("api", "10.0.0.2", 201),
+            ]
+        )
+        # Published from a worker thread, as the sync ingest routes do
+        assert await asyncio.to_thread(tail.publish, batch) is True
+        await _settle(tail)
+
+        entries, dropped = errors.drain()
+        assert [loads(entry)["status_code"] for entry in entries] == [503, 500]
+        assert dropped == 0
+        entries, _ = api.drain()
+        assert [loads(entry)["message"] for entry in entries] == ["GET /1 HTTP/1.1", "GET /4 HTTP/1.1"]
+        assert loads(entries[0]) == {
+            "timestamp": "2026-01-07T10:00:01+00:00",
+            "source_ip": "10.0.0.2",
+            "message": "GET /1 HTTP/1.1",
+            "status_code": 503,
+            "service_name": "api",
+            "metadata": {"bytes": 1},
+        }
+
+        # The unfiltered subscriber never read: its buffer keeps the newest 3 entries
+        tail.publish(batch)
+        await _settle(tail)
+        stream = tail.events(everything)
+        assert await anext(stream) == b": live tail\n\n"
+        chunk = (await anext(stream)).decode()
+        assert chunk.startswith('event: dropped\ndata: {"dropped":7}\n\n')
+        assert chunk.count('data: {"timestamp"') == 3
+        assert await anext(stream) == b": keepalive\n\n"
+
+        stats = tail.get_stats()
+        assert (stats["subscribers"], stats["published"], stats["dropped"]) == (3, 10, 7)
+
+        await tail.stop()
+        assert errors.closed and everything.closed
+        assert [chunk async for chunk in stream] == []  # the stream ends, and unsubscribes
+        assert tail.get_stats()["subscribers"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_stream_endpoint_sends_server_sent_events(monkeypatch):
+    monkeypatch.setattr(routes, "live_tail", LiveTail(max_subscribers=1))
+    assert client.get("/logs/stream").status_code == 503  # not running
+
+    async def scenario():
+        routes.live_tail.start()
+        disconnect = asyncio.Event()
+        messages = []
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+            if b"data: " in message.get("body", b""):
+                disconnect.set()
+
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/logs/stream",
+            "raw_path": b"/logs/stream",
+            "query_string": b"service=api&status_min=500",
+            "headers": [],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        request = asyncio.create_task(app(scope, receive, send))
+        while routes.live_tail.get_stats()["subscribers"] == 0:
+            await asyncio.sleep(0.01)
+        await asyncio.to_thread(
+            routes._publish,
+            _batch([("api", "10.0.0.2", 200), ("api", "10.0.0.2", 502), ("web", "10.0.0.1", 500)]),
+        )
+        await asyncio.wait_for(request, 5)
+        await routes.live_tail.stop()
+        return messages
+
+    messages = asyncio.run(scenario())
+    start = messages[0]
+    assert start["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+    body = b"".join(message.get("body", b"") for message in messages[1:]).decode()
+    events = [line[len("data: ") :] for line in body.splitlines() if line.startswith("data: ")]
+    assert [loads(event)["status_code"] for event in events] == [502]
+    assert routes.live_tail.get_stats()["subscribers"] == 0
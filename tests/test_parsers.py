@@ -1,3 +1,10 @@
+from datetime import datetime
+
+import pytest
+
+from src.exceptions import ParserError
+from src.interfaces import LogParser
+from src.models import LogEntry
 from src.parsers.nginx import NginxParser
 
 # Sample log lines for testing
@@ -44,3 +51,125 @@ def test_nginx_parser_metadata():
     # In Phase 1, we decided to store 'bytes' in metadata
     assert "bytes" in result.metadata
     assert result.metadata["bytes"] == 1024
+
+
+def test_nginx_fast_path_matches_strptime():
+    """
+    Scenario: Timestamps on and off the canonical nginx layout.
+    Expectation: The fast path yields exactly what strptime would, falling back where needed.
+    """
+    parser = NginxParser()
+    stamps = [
+        "07/Jan/2026:14:30:00 +0000",
+        "07/Jan/2026:14:30:00 +0000",  # served from the per-second cache
+        "29/Feb/2024:23:59:59 -0730",
+        "31/Dec/1999:00:00:00 +1400",
+        "07/jan/2026:14:30:00 +0300",  # lowercase month, strptime fallback
+        "7/Jan/2026:1:02:03 +0300",  # unpadded fields, strptime fallback
+    ]
+    for stamp in stamps:
+        entry = parser.parse(f'10.0.0.1 - - [{stamp}] "GET / HTTP/1.1" 200 10')
+        expected = datetime.strptime(stamp, NginxParser.DATE_FORMAT)
+        assert entry.timestamp == expected
+        assert entry.timestamp.utcoffset() == expected.utcoffset()
+
+
+def test_nginx_invalid_timestamp_raises_parser_error():
+    """
+    Scenario: The line matches the layout but the date does not exist.
+    Expectation: ParserError, as with the strptime-only parser.
+    """
+    parser = NginxParser()
+    for stamp in ("30/Feb/2026:14:30:00 +0000", "07/Jan/2026:14:30:00 +0075"):
+        with pytest.raises(ParserError):
+            parser.parse(f'10.0.0.1 - - [{stamp}] "GET / HTTP/1.1" 200 10')
+
+
+def test_nginx_parse_batch_matches_parse():
+    """
+    Scenario: A batch mixing valid, malformed and bad-timestamp lines.
+    Expectation: Columns hold exactly what per-line parse() returns; the rest count as rejected.
+    """
+    parser = NginxParser()
+    lines = [
+        VALID_LOG,
+        BROKEN_LOG,
+        '10.0.0.2 - - [07/Jan/2026:14:30:01 -0500] "POST /login HTTP/1.1" 302 0 "-" "curl/8.0"',
+        '10.0.0.3 - - [30/Feb/2026:14:30:01 +0000] "GET / HTTP/1.1" 200 10',
+        VALID_LOG,
+    ]
+
+    batch = parser.parse_batch(lines)
+
+    assert batch.rejected == 2
+    assert batch.to_entries() == [parser.parse(lines[0]), parser.parse(lines[2]), parser.parse(lines[4])]
+
+
+def test_nginx_parse_batch_treats_embedded_newlines_like_parse():
+    """
+    Scenario: Batch items that contain line breaks, e.g. two log lines in one item.
+    Expectation: Same entries, order and rejected count as parsing each item with parse().
+    """
+    parser = NginxParser()
+    lines = [
+        VALID_LOG,
+        f"junk\n{VALID_LOG}",
+        f"{VALID_LOG}\n{VALID_LOG}",
+        '10.0.0.2 - - [07/Jan/2026:14:30:01 -0500] "POST /login HTTP/1.1" 302 0',
+        f"\r{VALID_LOG}",
+        BROKEN_LOG,
+    ]
+
+    batch = parser.parse_batch(lines)
+
+    expected = [entry for entry in map(parser.parse, lines) if entry]
+    assert batch.to_entries() == expected
+    assert batch.rejected == len(lines) - len(expected) == 3
+
+
+def test_default_parse_batch_falls_back_to_parse():
+    """
+    Scenario: A parser that only implements parse().
+    Expectation: The interface's parse_batch loops over parse() and counts failures.
+    """
+
+    class UpperParser(LogParser):
+        def parse(self, line):
+            if not line:
+                return None
+            if line == "boom":
+                raise ParserError("boom")
+            return LogEntry(timestamp=datetime(2026, 1, 7), source_ip="-", message=line.upper())
+
+    batch = UpperParser().parse_batch(["a", "", "boom", "b"])
+
+    assert batch.messages == ["A", "B"]
+    assert batch.rejected == 2
+
+
+def test_parse_pool_matches_inline_parsing():
+    from src.parse_pool import ParsePool
+
+    lines = [
+        f'10.0.0.{i % 7} - - [07/Jan/2026:14:30:{i % 60:02d} +0300] "GET /{i} HTTP/1.1" {200 + i % 3} {i}'
+        for i in range(25)
+    ]
+    lines[5] = BROKEN_LOG
+    # Parsed inline; neither may fail the pooled batch (the second overflows a 64-bit array)
+    lines[9] = '10.0.0.9 - - [07/Jan/2026:14:30:09 +0300] "GET /9 HTTP/1.1" 99999999999 9'
+    lines[14] = '10.0.0.1 - - [07/Jan/2026:14:30:14 +0300] "GET /14 HTTP/1.1" 99999999999999999999 14'
+    expected = NginxParser().parse_batch(lines)
+
+    pool = ParsePool(workers=2, min_batch_lines=10, chunk_lines=4)
+    pool.start()
+    try:
+        parsed = pool.parse_batch("nginx", NginxParser(), lines)
+        # Below the threshold the batch stays in-process
+        small = pool.parse_batch("nginx", NginxParser(), lines[:3])
+    finally:
+        pool.stop()
+
+    assert parsed == expected
+    assert parsed.rejected == 1
+    assert small == NginxParser().parse_batch(lines[:3])
+    assert not pool.running
@@ -0,0 +1,63 @@
+import dataclasses
+import sys
+from datetime import UTC, datetime
+
+import pytest
+
+from src import serialization
+from src.models import LogBatch, LogEntry
+
+ENTRY = LogEntry(
+    timestamp=datetime(2026, 1, 7, 12, 0, tzinfo=UTC),
+    source_ip="192.168.1.10",
+    message="GET /home HTTP/1.1",
+    status_code=200,
+    service_name="nginx-access",
+    metadata={"bytes": 1024, "tags": ["a"]},
+)
+
+
+def test_log_entry_is_slotted_and_frozen():
+    assert not hasattr(ENTRY, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        ENTRY.status_code = 500
+
+
+def test_log_entry_to_json_matches_asdict_shape():
+    expected = dataclasses.asdict(ENTRY)
+    expected["timestamp"] = ENTRY.timestamp.isoformat()
+
+    data = ENTRY.to_json()
+
+    assert data == expected
+    assert data["metadata"] is not ENTRY.metadata
+    assert LogBatch.from_entries([ENTRY]).to_json() == [expected]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_round_trips_with_and_without_orjson(monkeypatch, use_orjson):
+    if use_orjson and serialization.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+
+    payload = {"when": ENTRY.timestamp, "text": "ünïcode", "values": [1, 2.5, None]}
+    encoded = serialization.dumps(payload)
+
+    assert isinstance(encoded, bytes)
+    assert serialization.loads(encoded) == {**payload, "when": "2026-01-07T12:00:00+00:00"}
+    assert serialization.dumps_str({"bytes": 1}) == '{"bytes":1}'
+
+
+def test_slotted_entry_is_smaller_than_dict_backed():
+    @dataclasses.dataclass
+    class PlainEntry:
+        timestamp: datetime
+        source_ip: str
+        message: str
+        status_code: int = 0
+        service_name: str = "unknown"
+        metadata: dict = dataclasses.field(default_factory=dict)
+
+    plain = PlainEntry(ENTRY.timestamp, ENTRY.source_ip, ENTRY.message)
+    assert sys.getsizeof(ENTRY) < sys.getsizeof(plain) + sys.getsizeof(plain.__dict__)
@@ -0,0 +1,120 @@
+import bisect
+import random
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import routes
+from src.api.main import app
+from src.exceptions import ConfigurationError
+from src.models import LogBatch
+from src.sketches import HeavyHitters, HyperLogLog, StreamingSketches, TDigest
+
+client = TestClient(app)
+
+
+def _batch(start: datetime, ips: list[str], paths: list[str], sizes: list[int]) -> LogBatch:
+    return LogBatch(
+        timestamps=[start + timedelta(seconds=i % 60) for i in range(len(ips))],
+        source_ips=ips,
+        messages=[f"GET {path}?page=2 HTTP/1.1" for path in paths],
+        status_codes=[200] * len(ips),
+        service_names=["nginx-access"] * len(ips),
+        metadata=[{"bytes": size} for size in sizes],
+    )
+
+
+def test_hyperloglog_estimates_distinct_values_within_error():
+    for n in (1, 1000, 50_000):
+        sketch = HyperLogLog(precision=12)
+        sketch.update(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(n))
+        sketch.update(["10.0.0.0"] * 100)  # repeats do not count
+        assert abs(sketch.count() - n) <= max(1, n * 0.05)
+
+    left, right = HyperLogLog(12), HyperLogLog(12)
+    left.update(str(i) for i in range(6000))
+    right.update(str(i) for i in range(4000, 10_000))
+    left.merge(right)
+    assert abs(left.count() - 10_000) <= 500
+
+
+def test_heavy_hitters_and_tdigest_quantiles():
+    rng = random.Random(7)
+    hitters = HeavyHitters(k=3, width=256, depth=4)
+    for _ in range(20):
+        hitters.update({"hot": 50, "warm": 20, **{f"cold-{rng.randrange(10_000)}": 1 for _ in range(200)}})
+    assert [key for key, _ in hitters.most_common()][:2] == ["hot", "warm"]
+    assert hitters.most_common()[0][1] >= 1000  # Count-Min never underestimates
+
+    values = [rng.lognormvariate(8, 1.5) for _ in range(50_000)]
+    digest = TDigest()
+    for start in range(0, len(values), 5000):
+        digest.update(values[start : start + 5000])
+    values.sort()
+    for q in (0.5, 0.9, 0.99):
+        rank = bisect.bisect(values, digest.quantile(q)) / len(values)
+        assert abs(rank - q) < 0.005
+    assert (digest.quantile(0), digest.quantile(1)) == (values[0], values[-1])
+    assert len(digest.centroids) <= digest.compression
+
+
+def test_streaming_sketches_windows_and_snapshots(tmp_path):
+    sketches = StreamingSketches(
+        window_seconds=60, windows=2, top_k=2, snapshot_path=str(tmp_path / "s.json")
+    )
+    start = datetime(2026, 1, 7, 10, 0, tzinfo=UTC)
+    for minute in range(3):
+        ips = [f"10.0.{minute}.{i % 50}" for i in range(200)] + ["10.9.9.9"] * 100
+        paths = ["/a"] * 150 + ["/b"] * 100 + ["/c"] * 50
+        sketches.observe(_batch(start + timedelta(minutes=minute), ips, paths, list(range(300))))
+    # Too old for the two windows kept
+    sketches.observe(_batch(start, ["10.1.1.1"], ["/old"], [1]))
+
+    summary = sketches.summary()
+    assert [window["start"] for window in summary["windows"]] == [
+        "2026-01-07T10:01:00+00:00",
+        "2026-01-07T10:02:00+00:00",
+    ]
+    assert summary["count"] == 600
+    assert summary["unique_ips"] == 101
+    assert summary["top_ips"][0] == {"key": "10.9.9.9", "estimate": 200}
+    assert [item["key"] for item in summary["top_paths"]] == ["/a", "/b"]
+    assert summary["bytes"]["max"] == 299 and 140 <= summary["bytes"]["p50"] <= 160
+    assert sketches.summary(windows=1)["count"] == 300
+
+    assert sketches.save()
+    restored = StreamingSketches(window_seconds=60, windows=2, top_k=2, snapshot_path=sketches.snapshot_path)
+    assert restored.load() == 2
+    assert restored.summary() == summary
+    # Sketches of another size cannot be merged with the snapshot
+    assert StreamingSketches(window_seconds=60, top_k=5, snapshot_path=sketches.snapshot_path).load() == 0
+
+    with pytest.raises(ConfigurationError):
+        StreamingSketches(precision=30)
+
+
+def test_sketches_endpoint_follows_ingestion(tmp_path, monkeypatch):
+    from src.storage import LogStorage
+
+    monkeypatch.setattr(routes, "storage", LogStorage(str(tmp_path / "logs.db")))
+    monkeypatch.setattr(routes, "sketches", StreamingSketches())
+    client.post(
+        "/parse/nginx/batch",
+        json={
+            "raw_logs": [
+                '10.0.0.1 - - [07/Jan/2026:10:00:00 +0000] "GET /a HTTP/1.1" 200 100',
+                '10.0.0.2 - - [07/Jan/2026:10:00:01 +0000] "GET /a HTTP/1.1" 200 300',
+            ]
+        },
+    )
+    client.post(
+        "/parse/nginx", json={"raw_log": '10.0.0.1 - - [07/Jan/2026:11:00:00 +0000] "GET /b HTTP/1.1" 404 0'}
+    )
+
+    summary = client.get("/sketches").json()
+    assert (summary["count"], summary["unique_ips"]) == (3, 2)
+    assert summary["top_paths"] == [{"key": "/a", "estimate": 2}, {"key": "/b", "estimate": 1}]
+    assert (summary["bytes"]["min"], summary["bytes"]["max"]) == (0, 300)
+    assert client.get("/sketches", params={"windows": 1}).json()["count"] == 1
+    routes.storage.close()
@@ -1,30 +1,41 @@
-import os
+import asyncio
+import gzip
+import json
+import sqlite3
+from datetime import UTC, date, datetime
 
 import pytest
 from fastapi.testclient import TestClient
 
+from src import storage as storage_module
 from src.api.main import app
-from src.storage import LogStorage
+from src.detection import DetectionEngine
+from src.exceptions import ConfigurationError, QueryTimeoutError
+from src.ingest import IngestQueue, iter_body_lines
+from src.migrate import main, migrate
+from src.models import LogBatch, LogEntry
+from src.parsers.nginx import NginxParser
+from src.sketches import StreamingSketches
+from src.storage import MIGRATIONS, LogStorage
 
 client = TestClient(app)
 
 
 @pytest.fixture(autouse=True)
-def setup_storage():
+def setup_storage(tmp_path):
     # Use a test database
-    db_path = "test_logs.db"
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    db_path = str(tmp_path / "test_logs.db")
 
     # Override storage in routes (hacky for this structure but works)
     from src.api import routes
 
     routes.storage = LogStorage(db_path=db_path)
+    routes.sketches = StreamingSketches(snapshot_path=str(tmp_path / "sketches.json"))
+    routes.detector = DetectionEngine.from_config({"sinks": []})
 
-    yield
+    yield routes.storage
 
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    routes.storage.close()
 
 
 def test_parse_and_persist():
@@ -76,3 +87,642 @@ def test_get_logs_filtering():
 
     response = client.get("/logs?service=apache")
     assert len(response.json()) == 0
+
+
+def test_ingest_batch_is_written_behind():
+    from src.api import routes
+
+    with TestClient(app) as lifespan_client:
+        response = lifespan_client.post(
+            "/ingest/nginx/batch",
+            json={
+                "raw_logs": [
+                    '192.168.1.1 - - [07/Jan/2026:14:30:00 +0300] "GET /1 HTTP/1.1" 200 1024',
+                    "not a log line",
+                    '192.168.1.2 - - [07/Jan/2026:14:30:01 +0300] "GET /2 HTTP/1.1" 500 512',
+                ]
+            },
+        )
+        assert response.status_code == 202
+        assert response.json() == {"accepted": 2, "skipped": 1}
+
+    # Shutdown drains the queue into storage
+    stats = client.get("/stats").json()
+    assert stats["total_logs"] == 2
+    assert stats["ingest_queue"]["written"] == 2
+    assert stats["ingest_queue"]["depth"] == 0
+    assert routes.ingest_queue.running is False
+
+
+def test_ingest_entries_stores_preparsed_columns():
+    batch = NginxParser().parse_batch(
+        [
+            '192.168.1.1 - - [07/Jan/2026:14:30:00 +0300] "GET /1 HTTP/1.1" 200 1024',
+            '192.168.1.2 - - [07/Jan/2026:14:30:01 +0300] "GET /2 HTTP/1.1" 404 512',
+        ]
+    )
+    response = client.post("/ingest/entries", json=batch.to_columns())
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 2, "skipped": 0}
+
+    logs = client.get("/logs").json()
+    assert [log["status_code"] for log in logs] == [404, 200]
+    assert logs[0]["timestamp"] == "2026-01-07T14:30:01+03:00"
+
+    columns = {name: list(values) for name, values in batch.to_columns().items()}
+    columns["messages"].pop()
+    assert client.post("/ingest/entries", json=columns).status_code == 422
+    columns = {name: list(values) for name, values in batch.to_columns().items()}
+    columns["status_codes"][0] = "ok"
+    assert client.post("/ingest/entries", json=columns).status_code == 422
+
+
+def test_ingest_queue_rejects_when_full(setup_storage):
+    entry = NginxParser().parse('1.1.1.1 - - [07/Jan/2026:14:30:00 +0300] "GET / HTTP/1.1" 200 0')
+    storage = setup_storage
+
+    async def scenario():
+        queue = IngestQueue(max_entries=2)
+        assert queue.put(LogBatch.from_entries([entry])) is False  # not started yet
+
+        queue.start(storage)
+        assert queue.put(LogBatch.from_entries([entry, entry])) is True
+        assert queue.put(LogBatch.from_entries([entry])) is False
+        await queue.stop()
+        return queue.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["written"] == 2
+    assert stats["rejected"] == 2
+
+
+def test_storage_applies_pragmas_and_reuses_connections(tmp_path):
+    storage = LogStorage(db_path=str(tmp_path / "pragma.db"), synchronous="full", reader_pool_size=1)
+    entry = NginxParser().parse('1.1.1.1 - - [07/Jan/2026:14:30:00 +0300] "GET / HTTP/1.1" 200 0')
+
+    storage.save_log(entry)
+    with storage._write() as conn:
+        writer = conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    with storage._read() as conn:
+        reader = conn
+
+    storage.get_logs()
+    with storage._write() as conn:
+        assert conn is writer
+    with storage._read() as conn:
+        assert conn is reader
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM logs")
+
+    storage.close()
+    # Connections are reopened lazily after close()
+    assert len(storage.get_logs()) == 1
+    storage.close()
+
+
+def test_storage_rejects_unknown_pragma_values(tmp_path):
+    with pytest.raises(ConfigurationError):
+        LogStorage(db_path=str(tmp_path / "bad.db"), journal_mode="nonsense")
+
+
+def test_logs_time_status_and_ip_filters():
+    client.post(
+        "/parse/nginx/batch",
+        json={
+            "raw_logs": [
+                '10.0.0.1 - - [07/Jan/2026:10:00:00 +0000] "GET /a HTTP/1.1" 200 10',
+                '10.0.0.2 - - [07/Jan/2026:11:00:00 +0000] "GET /b HTTP/1.1" 404 10',
+                '10.0.0.1 - - [07/Jan/2026:12:00:00 +0000] "GET /c HTTP/1.1" 503 10',
+            ]
+        },
+    )
+
+    params = {"since": "2026-01-07T10:30:00+00:00", "until": "2026-01-07T12:30:00+00:00"}
+    assert [log["message"] for log in client.get("/logs", params=params).json()] == [
+        "GET /c HTTP/1.1",
+        "GET /b HTTP/1.1",
+    ]
+
+    logs = client.get("/logs", params={"status_min": 400, "status_max": 499}).json()
+    assert [log["status_code"] for log in logs] == [404]
+
+    logs = client.get("/logs", params={"source_ip": "10.0.0.1", "status_min": 500}).json()
+    assert [log["message"] for log in logs] == ["GET /c HTTP/1.1"]
+
+
+def test_time_range_queries_use_indexes(setup_storage):
+    with setup_storage._read() as conn:
+        plan = " ".join(
+            row["detail"]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM logs WHERE ts >= ? ORDER BY ts DESC",
+                (1767744000000000,),
+            )
+        )
+    assert "idx_logs_ts" in plan
+
+
+def _legacy_database(db_path):
+    """Creates a database in the original, unversioned layout."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                source_ip TEXT,
+                message TEXT,
+                status_code INTEGER,
+                service_name TEXT,
+                metadata TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO logs (timestamp, source_ip, message, status_code, service_name, metadata) "
+            "VALUES (?, ?, 'GET / HTTP/1.1', 200, 'nginx-access', ?)",
+            [
+                ("2026-01-07T14:30:00+03:00", "1.1.1.1", '{"bytes": 512, "referer": "-"}'),
+                ("2026-01-07T11:30:01", "::1", "{}"),
+                ("2026-01-07T11:30:02+00:00", "not-an-ip", '{"bytes": "12"}'),
+                ("2026-01-07T11:30:03+00:00", "1.1.1.1", "{}"),
+            ],
+        )
+        conn.execute("DELETE FROM logs WHERE id = 4")
+    conn.close()
+
+
+def test_existing_database_is_migrated(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    _legacy_database(db_path)
+
+    storage = LogStorage(db_path=str(db_path))
+    with storage._read() as conn:
+        indexes = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        columns = [row["name"] for row in conn.execute("PRAGMA table_info(logs)")]
+    assert {"idx_logs_ts", "idx_logs_service_ts", "idx_logs_status_code"} <= indexes
+    assert columns == [
+        "id",
+        "ts",
+        "tz_offset",
+        "source_ip",
+        "message",
+        "status_code",
+        "service_id",
+        "bytes",
+        "metadata",
+    ]
+
+    # Every value reads back as it was written, in time order
+    logs = storage.get_logs()
+    assert [(log["timestamp"], log["source_ip"], log["metadata"]) for log in logs] == [
+        ("2026-01-07T11:30:02+00:00", "not-an-ip", {"bytes": "12"}),
+        ("2026-01-07T11:30:01", "::1", {}),
+        ("2026-01-07T14:30:00+03:00", "1.1.1.1", {"bytes": 512, "referer": "-"}),
+    ]
+    # Rollups are backfilled from the rows that were already there, counting int sizes only
+    stats = storage.get_stats()
+    assert (stats["services"], stats["total_bytes"]) == ({"nginx-access": 3}, 512)
+    assert storage.aggregate(metric="bytes", since=datetime(2026, 1, 7, tzinfo=UTC))["total"] == 512
+
+    # Existing messages are indexed for search
+    assert len(storage.search_logs("GET")[0]) == 3
+
+    # Ids of deleted rows are not handed out again
+    storage.save_log(NginxParser().parse('1.1.1.1 - - [07/Jan/2026:14:30:00 +0300] "GET / HTTP/1.1" 200 0'))
+    with storage._read() as conn:
+        assert conn.execute("SELECT MAX(id) FROM logs").fetchone()[0] == 5
+    storage.close()
+
+
+def test_migrate_tool_upgrades_database(tmp_path, capsys):
+    db_path = tmp_path / "legacy.db"
+    _legacy_database(db_path)
+
+    main(["--db", str(db_path), "--vacuum"])
+    assert f"from schema version 0 to {len(MIGRATIONS)}" in capsys.readouterr().out
+    assert migrate(str(db_path)) == (len(MIGRATIONS), len(MIGRATIONS))
+
+    with pytest.raises(SystemExit):
+        main(["--db", str(tmp_path / "missing.db")])
+
+
+def test_logs_cursor_pagination():
+    client.post(
+        "/parse/nginx/batch",
+        json={
+            "raw_logs": [
+                f'10.0.0.{i} - - [07/Jan/2026:10:00:0{i // 2} +0000] "GET /{i} HTTP/1.1" 200 10'
+                for i in range(5)
+            ]
+        },
+    )
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/logs", params=params)
+        assert response.status_code == 200
+        seen.extend(log["message"] for log in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    # Rows sharing a timestamp are tie-broken by insertion order, newest first
+    assert seen == [f"GET /{i} HTTP/1.1" for i in (4, 3, 2, 1, 0)]
+
+
+def test_logs_rejects_bad_cursor():
+    assert client.get("/logs", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/logs", params={"cursor": "abc", "offset": 5}).status_code == 400
+
+
+def test_search_logs_phrases_prefixes_and_filters():
+    client.post(
+        "/parse/nginx/batch",
+        json={
+            "raw_logs": [
+                '10.0.0.1 - - [07/Jan/2026:10:00:00 +0000] "GET /api/v1/users/7 HTTP/1.1" 200 10',
+                '10.0.0.2 - - [07/Jan/2026:10:00:01 +0000] "GET /api/v1/orders/7 HTTP/1.1" 200 10',
+                '10.0.0.1 - - [07/Jan/2026:10:00:02 +0000] "POST /api/v1/users HTTP/1.1" 500 10',
+                '10.0.0.3 - - [07/Jan/2026:10:00:03 +0000] "GET /api/v2/users/administrator HTTP/1.1" 403 10',
+            ]
+        },
+    )
+
+    def search(**params):
+        response = client.get("/logs/search", params=params)
+        assert response.status_code == 200, response.text
+        return [log["message"] for log in response.json()]
+
+    assert search(q="/api/v1/users") == ["POST /api/v1/users HTTP/1.1", "GET /api/v1/users/7 HTTP/1.1"]
+    assert search(q="admin*") == ["GET /api/v2/users/administrator HTTP/1.1"]
+    assert search(q='"POST /api" users') == ["POST /api/v1/users HTTP/1.1"]
+    assert search(q="users", status_min=400, source_ip="10.0.0.1") == ["POST /api/v1/users HTTP/1.1"]
+    assert search(q="7", until="2026-01-07T10:00:01+00:00") == ["GET /api/v1/users/7 HTTP/1.1"]
+    assert search(q="/api/v1/users/7 orders") == []
+    # Ranked: the shortest message containing the term scores best
+    assert search(q="users", order="rank")[0] == "POST /api/v1/users HTTP/1.1"
+
+    assert client.get("/logs/search", params={"q": ' "" '}).status_code == 400
+    assert client.get("/logs/search", params={"q": "users", "order": "size"}).status_code == 422
+    response = client.get("/logs/search", params={"q": "users", "order": "rank", "cursor": "abc"})
+    assert response.status_code == 400
+
+
+def test_time_ordered_search_walks_back_in_windows(setup_storage, monkeypatch):
+    monkeypatch.setattr(storage_module, "SEARCH_WINDOW_ROWS", 3)
+
+    def entries(hours, method):
+        return [
+            LogEntry(datetime(2026, 1, 7, hour, tzinfo=UTC), "10.0.0.1", f"{method} /{hour}", 200, "web", {})
+            for hour in hours
+        ]
+
+    # Newer rows first, then a backfill of older ones: ids do not follow time
+    setup_storage.save_batch(entries(range(12, 20), "GET"))
+    setup_storage.save_batch(entries(range(0, 12), "GET") + entries([5, 15], "POST"))
+
+    def pages(query, **filters):
+        seen, cursor = [], None
+        while True:
+            logs, cursor = setup_storage.search_logs(query, limit=3, cursor=cursor, **filters)
+            seen.extend(log["message"] for log in logs)
+            if not cursor:
+                return seen
+
+    assert pages("GET") == [f"GET /{hour}" for hour in range(19, -1, -1)]
+    assert pages("POST") == ["POST /15", "POST /5"]
+    since, until = datetime(2026, 1, 7, 4, tzinfo=UTC), datetime(2026, 1, 7, 14, tzinfo=UTC)
+    assert pages("GET", since=since, until=until) == [f"GET /{hour}" for hour in range(13, 3, -1)]
+    logs, _ = setup_storage.search_logs("GET", limit=2, offset=3)
+    assert [log["message"] for log in logs] == ["GET /16", "GET /15"]
+
+
+def test_aggregate_buckets_and_top_groups():
+    client.post(
+        "/parse/nginx/batch",
+        json={
+            "raw_logs": [
+                '10.0.0.1 - - [07/Jan/2026:10:00:05 +0000] "GET /a?x=1 HTTP/1.1" 200 10',
+                '10.0.0.1 - - [07/Jan/2026:10:00:30 +0000] "GET /a HTTP/1.1" 404 20',
+                '10.0.0.2 - - [07/Jan/2026:10:01:00 +0000] "GET /b HTTP/1.1" 200 30',
+                '10.0.0.1 - - [07/Jan/2026:10:02:59 +0000] "POST /a HTTP/1.1" 500 40',
+            ]
+        },
+    )
+    window = {"since": "2026-01-07T10:00:00Z", "until": "2026-01-07T10:03:00Z"}
+
+    def aggregate(**params):
+        response = client.get("/aggregate", params={**window, **params})
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    # Whole minutes by status class come from the rollups
+    result = aggregate(interval=60, group_by="status_class")
+    assert (result["source"], result["total"]) == ("rollups", 4)
+    assert result["groups"] == [
+        {"key": "2xx", "total": 2},
+        {"key": "4xx", "total": 1},
+        {"key": "5xx", "total": 1},
+    ]
+    assert [(b["start"], b["total"], b["values"]) for b in result["buckets"]] == [
+        ("2026-01-07T10:00:00+00:00", 2, [1, 1, 0]),
+        ("2026-01-07T10:01:00+00:00", 1, [1, 0, 0]),
+        ("2026-01-07T10:02:00+00:00", 1, [0, 0, 1]),
+    ]
+    # A status filter needs the logs table, with the same answer
+    filtered = aggregate(interval=60, group_by="status_class", status_min=100)
+    assert filtered["source"] == "logs"
+    assert (filtered["groups"], filtered["buckets"]) == (result["groups"], result["buckets"])
+
+    result = aggregate(group_by="source_ip", top=1, metric="bytes")
+    assert result["groups"] == [{"key": "10.0.0.1", "total": 70}]
+    assert (result["total"], "buckets" in result) == (100, False)
+    result = aggregate(group_by="path", interval=120, status_max=499)
+    assert result["groups"] == [{"key": "/a", "total": 2}, {"key": "/b", "total": 1}]
+    assert [(b["total"], b["values"]) for b in result["buckets"]] == [(3, [2, 1]), (0, [0, 0])]
+    assert aggregate(metric="bytes", since="2026-01-07T10:00:30Z")["total"] == 90
+
+    # Caps and bad arguments
+    assert client.get("/aggregate", params={"interval": 1}).status_code == 400
+    assert client.get("/aggregate", params={"group_by": "path", "top": 1000}).status_code == 400
+    assert client.get("/aggregate", params={"group_by": "referer"}).status_code == 422
+    reversed_range = {"since": window["until"], "until": window["since"]}
+    assert client.get("/aggregate", params=reversed_range).status_code == 400
+
+
+def test_aggregate_covers_cold_segments_and_times_out(tmp_path):
+    storage = _tiered_storage(tmp_path)
+    storage.compact(today=date(2026, 1, 5))
+    since, until = datetime(2026, 1, 1, tzinfo=UTC), datetime(2026, 1, 6, tzinfo=UTC)
+
+    result = storage.aggregate(group_by="status_code", interval=86400, since=since, until=until, status_min=0)
+    assert result["groups"] == [{"key": 200, "total": 10}, {"key": 500, "total": 5}]
+    assert [b["values"] for b in result["buckets"]] == [[2, 1]] * 5
+    result = storage.aggregate(metric="bytes", group_by="path", top=2, since=since, until=until)
+    assert result["groups"] == [{"key": "/5/2", "total": 52}, {"key": "/5/1", "total": 51}]
+    assert result["total"] == sum(day * 10 + hour for day in range(1, 6) for hour in range(3))
+
+    # Rollups agree with the scan over both tiers
+    rollups = storage.aggregate(group_by="service", interval=86400, since=since, until=until)
+    scanned = storage.aggregate(group_by="service", interval=86400, since=since, until=until, status_min=0)
+    assert rollups["source"] == "rollups"
+    assert rollups["buckets"] == scanned["buckets"]
+
+    with pytest.raises(QueryTimeoutError):
+        storage.aggregate(group_by="path", since=since, until=until, timeout=1e-9)
+    storage.close()
+
+
+def test_stats_rollups_track_status_classes_and_bytes(setup_storage):
+    now = datetime.now(UTC).strftime("%d/%b/%Y:%H:%M:%S +0000")
+    client.post(
+        "/parse/nginx/batch",
+        json={
+            "raw_logs": [
+                f'10.0.0.1 - - [{now}] "GET /a HTTP/1.1" 200 100',
+                f'10.0.0.2 - - [{now}] "GET /b HTTP/1.1" 404 20',
+                '10.0.0.3 - - [07/Jan/2020:12:00:00 +0000] "GET /c HTTP/1.1" 503 3',
+            ]
+        },
+    )
+    client.post("/parse/nginx", json={"raw_log": f'10.0.0.4 - - [{now}] "GET /d HTTP/1.1" 200 1'})
+
+    stats = client.get("/stats").json()
+    assert stats["total_logs"] == 4
+    assert stats["total_bytes"] == 124
+    assert stats["services"] == {"nginx-access": 4}
+    assert stats["status_classes"] == {"2xx": 2, "4xx": 1, "5xx": 1}
+    assert stats["recent_24h"] == 3
+    assert stats["recent_24h_bytes"] == 121
+
+    # Only int byte counts are stored in the bytes column, and only those are added up
+    flags = LogEntry(datetime.now(UTC), "10.0.0.5", "GET /e HTTP/1.1", 200, "nginx-access", {"bytes": True})
+    setup_storage.save_columns(LogBatch.from_entries([flags]))
+    assert client.get("/stats").json()["total_bytes"] == 124
+    assert setup_storage.aggregate(metric="bytes")["total"] == 121
+    assert client.get("/logs?limit=1").json()[0]["metadata"] == {"bytes": True}
+
+    # Stats are served from the rollup tables, not a scan of the logs table
+    with setup_storage._write() as conn:
+        conn.execute("DELETE FROM logs")
+    assert client.get("/stats").json()["total_logs"] == 5
+
+
+def _tiered_storage(tmp_path) -> LogStorage:
+    storage = LogStorage(
+        db_path=str(tmp_path / "tiered.db"),
+        cold_path=str(tmp_path / "segments"),
+        hot_days=2,
+        retention_days=4,
+        segment_row_group=2,
+    )
+    # Five days of logs, three per day
+    storage.save_batch(
+        [
+            LogEntry(
+                timestamp=datetime(2026, 1, day, hour, tzinfo=UTC),
+                source_ip=f"10.0.0.{hour}",
+                message=f"GET /{day}/{hour} HTTP/1.1",
+                status_code=500 if hour == 2 else 200,
+                service_name="nginx-access",
+                metadata={"bytes": day * 10 + hour},
+            )
+            for day in range(1, 6)
+            for hour in range(3)
+        ]
+    )
+    return storage
+
+
+def _all_pages(storage: LogStorage, **filters) -> list[str]:
+    seen, cursor = [], None
+    while True:
+        logs, cursor = storage.get_logs_page(limit=4, cursor=cursor, **filters)
+        seen.extend(log["message"] for log in logs)
+        if not cursor:
+            return seen
+
+
+def test_compaction_moves_old_days_to_segments_read_transparently(tmp_path):
+    storage = _tiered_storage(tmp_path)
+    before = storage.get_logs(limit=100)
+    filtered = storage.get_logs(limit=100, status_min=500, since=datetime(2026, 1, 2, tzinfo=UTC))
+
+    assert storage.compact(today=date(2026, 1, 5)) == ["2026-01-01", "2026-01-02"]
+    assert sorted(p.name for p in (tmp_path / "segments").iterdir()) == ["2026-01-01.seg", "2026-01-02.seg"]
+    with storage._read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == 9
+
+    assert storage.get_logs(limit=100) == before
+    assert storage.get_logs(limit=100, status_min=500, since=datetime(2026, 1, 2, tzinfo=UTC)) == filtered
+    assert storage.get_logs(limit=3, offset=10) == before[10:13]
+    assert _all_pages(storage) == [log["message"] for log in before]
+    assert before[-1]["metadata"] == {"bytes": 10}
+
+    stats = storage.get_stats()
+    assert (stats["cold_days"], stats["cold_logs"], stats["total_logs"]) == (2, 6, 15)
+
+    # Compacted rows leave the full-text index with the table
+    assert len(storage.search_logs("GET", limit=100)[0]) == 9
+    with storage._write() as conn:
+        conn.execute("INSERT INTO logs_fts (logs_fts, rank) VALUES ('integrity-check', 1)")
+    storage.rebuild_search_index()
+    assert len(storage.search_logs("GET", limit=100)[0]) == 9
+    storage.close()
+
+
+def test_late_rows_are_merged_and_retention_drops_whole_days(tmp_path):
+    storage = _tiered_storage(tmp_path)
+    storage.compact(today=date(2026, 1, 5))
+
+    # A straggler for an already compacted day lands in the hot table, then joins its segment
+    late = LogEntry(datetime(2026, 1, 1, 12, tzinfo=UTC), "10.9.9.9", "late", 200, "nginx-access", {})
+    storage.save_log(late)
+    assert storage.maintain(today=date(2026, 1, 5)) == {"compacted": ["2026-01-01"], "expired": []}
+    assert storage.get_stats()["cold_logs"] == 7
+    assert "late" in _all_pages(storage)
+
+    result = storage.maintain(today=date(2026, 1, 6))
+    assert result == {"compacted": ["2026-01-03"], "expired": ["2026-01-01"]}
+    # The per-minute rollups of expired days go with them
+    day_one = storage.aggregate(
+        since=datetime(2026, 1, 1, tzinfo=UTC), until=datetime(2026, 1, 2, tzinfo=UTC)
+    )
+    assert day_one["total"] == 0
+    # ... and so do their counts in the totals: 3 + 1 late rows of day one are gone
+    stats = storage.get_stats()
+    assert (stats["total_logs"], stats["total_bytes"]) == (12, sum(day * 30 + 3 for day in range(2, 6)))
+    assert stats["services"] == {"nginx-access": 12}
+    assert stats["status_classes"] == {"2xx": 8, "5xx": 4}
+    assert not (tmp_path / "segments" / "2026-01-01.seg").exists()
+    messages = _all_pages(storage)
+    assert len(messages) == 12
+    assert not any(message.startswith("GET /1/") for message in messages)
+
+    # A straggler still in the hot table when its day expires stays counted until its own segment goes
+    late = LogEntry(
+        datetime(2026, 1, 2, 12, tzinfo=UTC), "10.9.9.9", "late", 404, "nginx-access", {"bytes": 7}
+    )
+    storage.save_log(late)
+    # A segment written before footers carried totals is counted from its rows
+    storage._segments.totals("2026-01-02")
+    del storage._segments._footers["2026-01-02"][1]["totals"]
+    assert storage.apply_retention(today=date(2026, 1, 7)) == ["2026-01-02"]
+    stats = storage.get_stats()
+    assert (stats["total_logs"], stats["total_bytes"]) == (10, sum(day * 30 + 3 for day in range(3, 6)) + 7)
+    assert stats["status_classes"] == {"2xx": 6, "4xx": 1, "5xx": 3}
+
+    assert storage.compact(today=date(2026, 1, 7)) == ["2026-01-02", "2026-01-04"]
+    assert storage.apply_retention(today=date(2026, 1, 7)) == ["2026-01-02"]
+    stats = storage.get_stats()
+    assert (stats["total_logs"], stats["status_classes"]) == (9, {"2xx": 6, "5xx": 3})
+    storage.close()
+
+
+def test_retention_requires_compaction(tmp_path):
+    with pytest.raises(ConfigurationError):
+        LogStorage(db_path=str(tmp_path / "a.db"), retention_days=30)
+    with pytest.raises(ConfigurationError):
+        LogStorage(db_path=str(tmp_path / "a.db"), hot_days=7, retention_days=3)
+
+
+def test_periodic_task_runs_until_stopped():
+    from src.scheduler import PeriodicTask
+
+    calls = []
+    task = PeriodicTask("count", lambda: calls.append(1) or len(calls), interval=0.01)
+
+    async def scenario():
+        task.start()
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+        await task.stop()
+
+    asyncio.run(scenario())
+    stats = task.get_stats()
+    assert stats["running"] is False
+    assert stats["runs"] == len(calls) >= 3
+    assert stats["last_result"] == len(calls)
+
+
+def test_stream_ingest_plain_text(monkeypatch):
+    from src.api import routes
+
+    monkeypatch.setitem(routes.stream_settings, "chunk_lines", 2)
+    body = "\n".join(
+        [
+            '10.0.0.1 - - [07/Jan/2026:10:00:00 +0000] "GET /a HTTP/1.1" 200 10',
+            "garbage",
+            "",
+            '10.0.0.2 - - [07/Jan/2026:10:00:01 +0000] "GET /b HTTP/1.1" 200 10',
+            '10.0.0.3 - - [07/Jan/2026:10:00:02 +0000] "GET /c HTTP/1.1" 200 10',
+        ]
+    )
+
+    response = client.post(
+        "/ingest/nginx/stream", content=body.encode(), headers={"Content-Type": "text/plain"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "accepted": 3,
+        "rejected": 1,
+        "errors": [{"line": 2, "error": "log line cannot be parsed"}],
+    }
+    assert client.get("/stats").json()["total_logs"] == 3
+
+
+def test_stream_ingest_gzipped_ndjson(monkeypatch):
+    from src.api import routes
+
+    monkeypatch.setitem(routes.stream_settings, "max_line_bytes", 200)
+    log = '10.0.0.1 - - [07/Jan/2026:10:00:00 +0000] "GET /a HTTP/1.1" 200 10'
+    body = "\n".join([json.dumps(log), json.dumps({"raw_log": log}), json.dumps(42), json.dumps("x" * 500)])
+
+    response = client.post(
+        "/ingest/nginx/stream",
+        content=gzip.compress(body.encode()),
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary["accepted"], summary["rejected"]) == (2, 2)
+    assert [error["line"] for error in summary["errors"]] == [3, 4]
+    assert "exceeds 200 bytes" in summary["errors"][1]["error"]
+
+
+def test_stream_ingest_rejects_unsupported_body():
+    response = client.post(
+        "/ingest/nginx/stream", content=b"{}", headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 415
+
+
+def test_iter_body_lines_carries_partial_lines_across_chunks():
+    async def chunks():
+        for piece in (b"first li", b"ne\nsec", b"ond\n", b"x" * 20, b"\nlast"):
+            yield piece
+
+    async def collect():
+        return [line async for line in iter_body_lines(chunks(), max_line_bytes=10)]
+
+    assert asyncio.run(collect()) == [b"first line", b"second", None, b"last"]
+
+
+def test_iter_body_lines_reads_every_gzip_member():
+    members = gzip.compress(b"a\nb\n") + gzip.compress(b"c\nd\n") + gzip.compress(b"e")
+
+    async def chunks(size: int):
+        for start in range(0, len(members), size):
+            yield members[start : start + size]
+
+    async def collect(size: int):
+        return [line async for line in iter_body_lines(chunks(size), gzipped=True)]
+
+    # Whole body at once, members split across chunks, and one byte per chunk
+    for size in (len(members), 7, 1):
+        assert asyncio.run(collect(size)) == [b"a", b"b", b"c", b"d", b"e"]